@@ -10,6 +10,8 @@ the data in it.
 Note that this tool is essentially only visualizing some basic structure of the
 runs contained in the database. It does not to any handling or loading of
 data. it relies on the public qcodes API to get its information.
+The data of the selected run (and of the runs next to it in the list) is
+loaded in the background, such that plotting windows open quickly.
 """
 
 import os
@@ -17,6 +19,8 @@ import time
 import sys
 import argparse
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Optional, Sequence, List, Dict, Iterable, Union, cast, Tuple, Mapping
 
 from typing_extensions import TypedDict
@@ -29,8 +33,10 @@ from plottr import QtCore, QtWidgets, Signal, Slot, QtGui, Flowchart, QAction
 from .. import log as plottrlog
 from ..data.qcodes_dataset import (get_runs_from_db_as_dataframe,
                                    get_runs_from_db, get_runs_from_db_fast,
-                                   get_ds_structure, load_dataset_from)
+                                   get_ds_structure, load_dataset_from,
+                                   cache_dataset)
 from ..data.qcodes_db_overview import get_db_overview
+from ..data.qcodes_run_catalogue import RunCatalogue
 from plottr.gui.widgets import MonitorIntervalInput, FormLayoutWrapper, dictToTreeWidgetItems
 
 from .autoplot import autoplotQcodesDataset, QCAutoPlotMainWindow
@@ -314,6 +320,22 @@ class RunList(QtWidgets.QTreeWidget):
             for i in range(len(self.cols)):
                 self.resizeColumnToContents(i)
 
+    def neighbouringRuns(self, runId: int, n: int) -> List[int]:
+        """Get the IDs of the up to ``n`` runs shown before and after the run
+        ``runId``, ordered by distance (following before preceding)."""
+        items = self.findItems(str(runId), QtCore.Qt.MatchExactly)
+        if len(items) == 0:
+            return []
+        idx = self.indexOfTopLevelItem(items[0])
+        runIds = []
+        for i in range(1, n + 1):
+            for j in (idx + i, idx - i):
+                if 0 <= j < self.topLevelItemCount():
+                    item = self.topLevelItem(j)
+                    assert item is not None
+                    runIds.append(int(item.text(0)))
+        return runIds
+
     @Slot()
     def selectRun(self) -> None:
         selection = self.selectedItems()
@@ -427,9 +449,12 @@ class LoadDBProcess(QtCore.QObject):
     It's good to have this in a separate thread because it can be a bit slow
     for large databases.
 
-    Uses ``get_db_overview`` (direct SQL) by default for maximum speed.
-    Falls back to ``get_runs_from_db_fast`` (qcodes public API) if the
-    SQL approach fails.
+    Can use the run catalogue (:class:`.RunCatalogue`, see
+    :attr:`use_catalogue`), which only needs to read runs that have changed
+    since the database was last opened. Otherwise, or if that fails, uses
+    ``get_db_overview`` (direct SQL), and
+    falls back to ``get_runs_from_db_fast`` (qcodes public API) if the SQL
+    approach fails.
     """
     dbdfLoaded = Signal(object)
     progressUpdated = Signal(int, int)  # (current, total)
@@ -438,9 +463,19 @@ class LoadDBProcess(QtCore.QObject):
     #: If True, use direct SQL queries (fast). If False, use qcodes API.
     use_fast_sql: bool = True
 
+    #: If True, get the overview from the run catalogue (fastest). Off by
+    #: default, since the catalogue is a file in the user's plottr config
+    #: directory (unless :attr:`catalogue_path` is set); enabled with the
+    #: ``--run-catalogue`` option of the inspectr script.
+    use_catalogue: bool = False
+
+    #: Path of the run catalogue file. If None, the default location is used.
+    catalogue_path: Optional[str] = None
+
     def __init__(self) -> None:
         super().__init__()
         self.path: Optional[str] = None
+        self.catalogue: Optional[RunCatalogue] = None
 
     def setPath(self, path: str) -> None:
         self.path = path
@@ -450,7 +485,18 @@ class LoadDBProcess(QtCore.QObject):
         assert self.path is not None
 
         overview: Optional[Dict[int, Any]] = None
-        if self.use_fast_sql:
+        if self.use_catalogue:
+            try:
+                if self.catalogue is None:
+                    self.catalogue = RunCatalogue(self.catalogue_path)
+                self.catalogue.update(self.path)
+                overview = self.catalogue.runs(self.path)
+            except Exception as e:
+                LOGGER.warning(f"Run catalogue failed, reading the "
+                               f"overview from the database: {e}")
+                overview = None
+
+        if overview is None and self.use_fast_sql:
             try:
                 overview = get_db_overview(self.path,
                                            extra_columns=['inspectr_tag'])
@@ -475,6 +521,115 @@ class LoadDBProcess(QtCore.QObject):
         self.progressUpdated.emit(current, total)
 
 
+def load_run_info(path: str, runId: int) -> Dict[str, Any]:
+    """Load the information about a run that is shown in the inspectr:
+    data structure, metadata, and snapshot."""
+    if sys.version_info >= (3, 11):
+        ds = load_dataset_from(path, runId, read_only=True)
+    else:
+        ds = load_dataset_from(path, runId)
+    snap = None
+    if hasattr(ds, 'snapshot'):
+        snap = ds.snapshot
+
+    structure = cast(Dict[str, dict], get_ds_structure(ds))
+    # cast away typed dict so we can pop a key
+    for k, v in structure.items():
+        v.pop('values')
+    return {'Data structure': structure,
+            'Metadata': ds.metadata,
+            'QCoDeS Snapshot': snap}
+
+
+class LoadRunInfoProcess(QtCore.QObject):
+    """
+    Worker object for loading the information about a run (see
+    :func:`load_run_info`). Loading a dataset can be slow, so this lives in a
+    separate thread, which is started when information is requested, and
+    finishes when there are no more requests.
+
+    Only the most recent request is served: requests that are superseded by a
+    newer one before loading has started are skipped, and information loaded
+    for superseded requests is not emitted.
+    """
+    #: Signal(int, dict) -- emitted with the run ID and the information
+    #: about the run.
+    infoLoaded = Signal(int, dict)
+
+    #: Signal() -- emitted when all requests have been served.
+    finished = Signal()
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._request: Optional[Tuple[str, int]] = None
+
+    def request(self, path: str, runId: int) -> None:
+        """Request loading information about a run. Can be called from any
+        thread; the loading happens in :meth:`loadInfo`."""
+        with self._lock:
+            self._request = (path, runId)
+
+    def pending(self) -> bool:
+        """Whether there is a request that has not been served yet."""
+        with self._lock:
+            return self._request is not None
+
+    @Slot()
+    def loadInfo(self) -> None:
+        while True:
+            with self._lock:
+                request, self._request = self._request, None
+            if request is None:
+                break
+
+            path, runId = request
+            try:
+                info = load_run_info(path, runId)
+            except Exception as e:
+                LOGGER.warning(f"Could not load information about run {runId}: {e}")
+                continue
+            if not self.pending():
+                self.infoLoaded.emit(runId, info)
+        self.finished.emit()
+
+
+class RunPrefetcher:
+    """
+    Loads the data of runs into the cache of loaded data in background
+    threads, such that plotting them later does not need to load them again.
+    Runs that are too large for the cache are skipped (see
+    :func:`~plottr.data.qcodes_dataset.cache_dataset`).
+    """
+
+    def __init__(self, maxWorkers: int = 2) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers,
+                                            thread_name_prefix='inspectr-prefetch')
+        self._pending: Dict[Tuple[str, int], Future] = {}
+
+    def prefetch(self, path: str, runIds: Sequence[int]) -> None:
+        """Load the given runs, in the given order. Prefetching of other runs
+        that has not started yet is cancelled."""
+        keys = [(path, runId) for runId in runIds]
+        for key, future in list(self._pending.items()):
+            if future.done() or (key not in keys and future.cancel()):
+                del self._pending[key]
+        for key in keys:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self._load, *key)
+
+    @staticmethod
+    def _load(path: str, runId: int) -> None:
+        try:
+            cache_dataset(path, runId)
+        except Exception as e:
+            LOGGER.debug(f"Could not prefetch run {runId}: {e}")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+
+
 class QCodesDBInspector(QtWidgets.QMainWindow):
     """
     Main window of the inspectr tool.
@@ -488,6 +643,11 @@ class QCodesDBInspector(QtWidgets.QMainWindow):
     #: run to the widget that displays the information
     _sendInfo = Signal(dict)
 
+    #: Number of runs shown before and after the selected run whose data is
+    #: loaded in the background (in addition to the selected run).
+    #: 0 disables prefetching.
+    prefetchRuns: int = 2
+
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None,
                  dbPath: Optional[str] = None,
                  plotWidgetClass: Optional[type] = None):
@@ -636,10 +796,22 @@ class QCodesDBInspector(QtWidgets.QMainWindow):
         self.loadDBProcess.moveToThread(self.loadDBThread)
         self.loadDBProcess.pathSet.connect(self.loadDBThread.start)
         self.loadDBProcess.dbdfLoaded.connect(self.DBLoaded)
-        self.loadDBProcess.dbdfLoaded.connect(self.loadDBThread.quit)
         self.loadDBProcess.progressUpdated.connect(self.onLoadProgress)
         self.loadDBThread.started.connect(self.loadDBProcess.loadDB)
 
+        # loading information about the selected run.
+        self._selectedRunId: Optional[int] = None
+        self.loadRunInfoProcess = LoadRunInfoProcess()
+        self.loadRunInfoThread = QtCore.QThread()
+        self.loadRunInfoProcess.moveToThread(self.loadRunInfoThread)
+        self.loadRunInfoProcess.infoLoaded.connect(self.runInfoLoaded)
+        self.loadRunInfoProcess.finished.connect(self.loadRunInfoThread.quit)
+        self.loadRunInfoThread.started.connect(self.loadRunInfoProcess.loadInfo)
+        self.loadRunInfoThread.finished.connect(self._loadRunInfoFinished)
+
+        # loading run data ahead of plotting it.
+        self.prefetcher = RunPrefetcher()
+
         ### connect signals/slots
 
         self.dbdfUpdated.connect(self.updateDates)
@@ -668,6 +840,10 @@ class QCodesDBInspector(QtWidgets.QMainWindow):
         for runId, info in self._plotWindows.items():
             info['window'].close()
 
+        self.prefetcher.shutdown()
+        self.loadRunInfoThread.quit()
+        self.loadRunInfoThread.wait()
+
     @Slot()
     def showDBPath(self) -> None:
         tstamp = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -720,6 +896,11 @@ class QCodesDBInspector(QtWidgets.QMainWindow):
             f"Loading database... ({current}/{total} datasets)")
 
     def DBLoaded(self, dbdf: pandas.DataFrame) -> None:
+        # the worker is done at this point; finish its thread right away, such
+        # that a new load isn't skipped because the thread is still running.
+        self.loadDBThread.quit()
+        self.loadDBThread.wait()
+
         if dbdf.size == 0 and self.dbdf is not None:
             LOGGER.debug('DB reloaded with no new data. Skipping update.')
             self.runList.setOverlayText(
@@ -840,22 +1021,28 @@ class QCodesDBInspector(QtWidgets.QMainWindow):
     @Slot(int)
     def setRunSelection(self, runId: int) -> None:
         assert self.filepath is not None
-        if sys.version_info >= (3, 11):
-            ds = load_dataset_from(self.filepath, runId, read_only=True)
-        else:
-            ds = load_dataset_from(self.filepath, runId)
-        snap = None
-        if hasattr(ds, 'snapshot'):
-            snap = ds.snapshot
-
-        structure = cast(Dict[str, dict], get_ds_structure(ds))
-        # cast away typed dict so we can pop a key
-        for k, v in structure.items():
-            v.pop('values')
-        contentInfo = {'Data structure': structure,
-                       'Metadata': ds.metadata,
-                       'QCoDeS Snapshot': snap}
-        self._sendInfo.emit(contentInfo)
+        if self.prefetchRuns > 0:
+            self.prefetcher.prefetch(
+                self.filepath,
+                [runId] + self.runList.neighbouringRuns(runId, self.prefetchRuns))
+
+        # the info is loaded in the background, and sent once it's there.
+        self._selectedRunId = runId
+        self.loadRunInfoProcess.request(self.filepath, runId)
+        if not self.loadRunInfoThread.isRunning():
+            self.loadRunInfoThread.start()
+
+    @Slot()
+    def _loadRunInfoFinished(self) -> None:
+        # a request may have come in after the worker was done, but before
+        # the thread finished.
+        if self.loadRunInfoProcess.pending():
+            self.loadRunInfoThread.start()
+
+    @Slot(int, dict)
+    def runInfoLoaded(self, runId: int, contentInfo: Dict[str, Any]) -> None:
+        if runId == self._selectedRunId:
+            self._sendInfo.emit(contentInfo)
 
     @Slot(int)
     def plotRun(self, runId: int) -> None:
@@ -951,6 +1138,10 @@ def script() -> None:
     parser.add_argument("--console-log-level",
                         choices=("ERROR", "WARNING", "INFO", "DEBUG"),
                         default="WARNING")
+    parser.add_argument('--run-catalogue', action='store_true',
+                        help='keep an overview of the runs in a catalogue file in the '
+                             'plottr config directory, to open large databases faster')
     args = parser.parse_args()
+    LoadDBProcess.use_catalogue = args.run_catalogue
     main(args.dbpath, args.console_log_level)
 
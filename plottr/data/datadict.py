@@ -7,10 +7,12 @@ import warnings
 import copy as cp
 import re
 import logging
+import weakref
+import hashlib
 import pandas as pd
 import numpy as np
-from functools import reduce
-from typing import List, Tuple, Dict, Sequence, Union, Any, Iterator, Optional, TypeVar
+from functools import reduce, wraps
+from typing import List, Tuple, Dict, Sequence, Union, Any, Iterator, Optional, TypeVar, Callable
 
 from plottr.utils import num, misc
 
@@ -74,6 +76,152 @@ class GriddingError(ValueError):
     pass
 
 
+class LazyArray(np.lib.mixins.NDArrayOperatorsMixin):
+    """Placeholder for data values that are only loaded when they are used.
+
+    Shape and dtype are known without loading the data, so validation and
+    structure/shape inspection of a dataset don't load anything. Any other
+    use (numpy functions and ufuncs, indexing, array methods) loads the data
+    once by calling ``load``. :meth:`DataDictBase.data_vals` replaces the
+    placeholder in the dataset by the loaded array.
+
+    :param load: Function without arguments that returns the values.
+    :param shape: Shape of the values.
+    :param dtype: dtype of the values.
+    """
+
+    def __init__(self, load: Callable[[], np.ndarray],
+                 shape: Tuple[int, ...], dtype: Any):
+        self._load = load
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._values: Optional[np.ndarray] = None
+
+    def __repr__(self) -> str:
+        return f"LazyArray(shape={self.shape}, dtype={self.dtype}, loaded={self.loaded})"
+
+    @property
+    def loaded(self) -> bool:
+        return self._values is not None
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def itemsize(self) -> int:
+        return self.dtype.itemsize
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.itemsize
+
+    def values(self) -> np.ndarray:
+        """Load (if not done yet) and return the values."""
+        if self._values is None:
+            values = np.asanyarray(self._load())
+            if values.shape != self.shape:
+                raise ValueError(f"Loaded values have shape {values.shape}, "
+                                 f"expected {self.shape}.")
+            self._values = values
+        return self._values
+
+    @staticmethod
+    def _loaded(obj: Any) -> Any:
+        if isinstance(obj, LazyArray):
+            return obj.values()
+        elif isinstance(obj, (list, tuple)):
+            return type(obj)(LazyArray._loaded(o) for o in obj)
+        return obj
+
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> np.ndarray:
+        if copy:
+            return np.array(self.values(), dtype=dtype, copy=True)
+        return np.asarray(self.values(), dtype=dtype)
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str, *inputs: Any, **kwargs: Any) -> Any:
+        inputs = self._loaded(inputs)
+        if 'out' in kwargs:
+            kwargs['out'] = self._loaded(kwargs['out'])
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func: Callable, types: Any, args: Any, kwargs: Any) -> Any:
+        # shape inspection doesn't need the values.
+        if func is np.shape and not kwargs:
+            return self.shape
+        if func is np.ndim and not kwargs:
+            return self.ndim
+        return func(*self._loaded(args), **{k: self._loaded(v) for k, v in kwargs.items()})
+
+    def __len__(self) -> int:
+        if len(self.shape) == 0:
+            raise TypeError('len() of unsized object')
+        return self.shape[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.values())
+
+    def __getitem__(self, idx: Any) -> Any:
+        return self.values()[idx]
+
+    def __setitem__(self, idx: Any, val: Any) -> None:
+        self.values()[idx] = val
+
+    def __getattr__(self, name: str) -> Any:
+        # everything else is delegated to the loaded array.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.values(), name)
+
+    def __copy__(self) -> 'LazyArray':
+        ret = LazyArray(self._load, self.shape, self.dtype)
+        ret._values = self._values
+        return ret
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'LazyArray':
+        ret = LazyArray(self._load, self.shape, self.dtype)
+        if self._values is not None:
+            ret._values = self._values.copy()
+        return ret
+
+
+#: Types of data values that validation accepts as they are.
+_ARRAY_TYPES = (np.ndarray, np.ma.core.MaskedArray, np.memmap, LazyArray)
+
+
+def _cached_validation(validate: Callable[[T], bool]) -> Callable[[T], bool]:
+    """Decorator for ``validate`` methods of DataDictBase (sub)classes.
+
+    If the dataset has not changed since the last successful validation,
+    ``validate`` returns ``True`` right away. Only the outermost call is cached,
+    so ``super().validate()`` inside an overriding ``validate`` works as usual.
+    """
+    @wraps(validate)
+    def wrapper(self: T) -> bool:
+        outermost = self._validating == 0
+        if outermost and self._validation_is_current():
+            return True
+
+        self._validating += 1
+        try:
+            ret = validate(self)
+        finally:
+            self._validating -= 1
+
+        if outermost and ret:
+            self._validated_state = self._validation_state()
+        return ret
+
+    return wrapper
+
+
 class DataDictBase(dict):
     """
     Simple data storage class that is based on a regular dictionary.
@@ -84,7 +232,14 @@ class DataDictBase(dict):
 
     def __init__(self, **kw: Any):
         super().__init__(self, **kw)
-        self.d_ = DataDictBase._DataAccess(self) 
+        self.d_ = DataDictBase._DataAccess(self)
+        self._validated_state: Optional[List[Tuple[Any, ...]]] = None
+        self._validating = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_validated_state'] = None
+        return state
 
     def __eq__(self, other: object) -> bool:
         """Check for content equality of two datadicts."""
@@ -261,7 +416,11 @@ class DataDictBase(dict):
         """
         if self._is_meta_key(key):
             raise ValueError(f"{key} is a meta key.")
-        return self[key].get('values', np.array([]))
+        vals = self[key].get('values', np.array([]))
+        if isinstance(vals, LazyArray):
+            vals = vals.values()
+            self[key]['values'] = vals
+        return vals
 
     def has_meta(self, key: str) -> bool:
         """Check whether meta field exists in the dataset.
@@ -509,7 +668,7 @@ class DataDictBase(dict):
                 return sum([v['values'].size * v['values'].itemsize 
                             for _, v in self.data_items()])
             else:
-                return self.data_vals(name).size * self.data_vals(name).itemsize
+                return self[name]['values'].size * self[name]['values'].itemsize
         
         return None
 
@@ -605,12 +764,53 @@ class DataDictBase(dict):
         """
         shapes = {}
         for k, v in self.data_items():
-            shapes[k] = np.shape(self.data_vals(k))
+            shapes[k] = np.shape(v.get('values', np.array([])))
 
         return shapes
 
     # validation and sanitizing
 
+    def _validation_state(self) -> Optional[List[Tuple[Any, ...]]]:
+        """Snapshot of everything the validity of the dataset depends on.
+
+        That is the fields, the identity, shape and dtype of their values, and
+        their axes. ``None`` if the state can't be captured (i.e., values that
+        are not arrays).
+        """
+        state = []
+        for n, v in self.data_items():
+            vals = v.get('values')
+            if vals is None or type(vals) not in _ARRAY_TYPES:
+                return None
+            state.append((n, weakref.ref(vals), vals.shape, vals.dtype,
+                          tuple(v.get('axes', ())),
+                          tuple(k in v for k in ('axes', 'unit', 'label', '__shape__'))))
+        return state
+
+    def _validation_is_current(self) -> bool:
+        old = self._validated_state
+        if old is None:
+            return False
+        new = self._validation_state()
+        if new is None or len(new) != len(old):
+            return False
+        for (n0, ref0, *props0), (n1, ref1, *props1) in zip(old, new):
+            if n0 != n1 or ref0() is not ref1() or props0 != props1:
+                return False
+        return True
+
+    def invalidate(self) -> None:
+        """Make the next call to :meth:`validate` perform all checks.
+
+        Validation results are cached: :meth:`validate` on a dataset that has
+        not changed since its last successful validation returns immediately.
+        Adding, removing or replacing fields or values, and changing axes is
+        detected automatically. Changing the contents of value arrays in place
+        is not; call this method after doing that.
+        """
+        self._validated_state = None
+
+    @_cached_validation
     def validate(self) -> bool:
         """
         Check the validity of the dataset.
@@ -652,7 +852,7 @@ class DataDictBase(dict):
                 v['label'] = ''
 
             vals = v.get('values', [])
-            if type(vals) not in [np.ndarray, np.ma.core.MaskedArray]:
+            if type(vals) not in _ARRAY_TYPES:
                 vals = np.array(vals)
             v['values'] = vals
 
@@ -826,6 +1026,39 @@ class DataDictBase(dict):
             self.d_.__dict__[d] = None
 
 
+class _GrowableArray:
+    """Capacity-doubling storage for the values of a data field.
+
+    Records are written into a pre-allocated array that grows by (at least)
+    a factor of two when full, such that appending is amortized O(1) per
+    record. ``view`` is the filled prefix of the storage.
+
+    Data is only ever written beyond the filled prefix, so views handed
+    out earlier (e.g., to shallow copies of the dataset) never change.
+    """
+
+    min_capacity = 16
+
+    def __init__(self, values: np.ndarray):
+        n = values.shape[0]
+        self.data = np.empty((max(self.min_capacity, 2 * n),) + values.shape[1:],
+                             dtype=values.dtype)
+        self.data[:n] = values
+        self.view = self.data[:n]
+
+    def append(self, values: np.ndarray) -> np.ndarray:
+        n, m = self.view.shape[0], values.shape[0]
+        dtype = np.result_type(self.data.dtype, values.dtype)
+        if n + m > self.data.shape[0] or dtype != self.data.dtype:
+            capacity = max(2 * self.data.shape[0], n + m)
+            data = np.empty((capacity,) + self.data.shape[1:], dtype=dtype)
+            data[:n] = self.view
+            self.data = data
+        self.data[n:n + m] = values
+        self.view = self.data[:n + m]
+        return self.view
+
+
 class DataDict(DataDictBase):
     """
     The most basic implementation of the DataDict class.
@@ -837,8 +1070,41 @@ class DataDict(DataDictBase):
     The class further implements simple appending of datadicts through the
     ``DataDict.append`` method, as well as allowing addition of DataDict
     instances.
+
+    Appended values are stored in arrays with spare capacity (that grows by
+    doubling), so adding data record by record is amortized O(1) per record.
+    The values of each field are always a view of the filled part of that
+    storage.
     """
 
+    def __init__(self, **kw: Any):
+        super().__init__(**kw)
+        self._value_buffers: Dict[str, _GrowableArray] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # don't pickle/copy the spare capacity of the value storage.
+        state = super().__getstate__()
+        state['_value_buffers'] = {}
+        return state
+
+    def _appended_values(self, name: str, values: np.ndarray) -> np.ndarray:
+        """Return the values of field ``name`` with ``values`` appended.
+
+        The field itself is not modified. Uses (and creates, if necessary)
+        the growable storage of the field when possible.
+        """
+        current = self[name]['values']
+        if type(current) is not np.ndarray or type(values) is not np.ndarray \
+                or current.ndim == 0 or current.shape[1:] != values.shape[1:]:
+            self._value_buffers.pop(name, None)
+            return np.append(current, values, axis=0)
+
+        buf = self._value_buffers.get(name)
+        if buf is None or buf.view is not current:
+            buf = _GrowableArray(current)
+            self._value_buffers[name] = buf
+        return buf.append(values)
+
     def __add__(self, newdata: 'DataDict') -> 'DataDict':
         """
         Adding two datadicts by appending each data array.
@@ -882,11 +1148,7 @@ class DataDict(DataDictBase):
                     v['values'], list):
                 newvals[k] = self[k]['values'] + v['values']
             else:
-                newvals[k] = np.append(
-                    self[k]['values'],
-                    v['values'],
-                    axis=0
-                )
+                newvals[k] = self._appended_values(k, v['values'])
 
         # only actually
         for k, v in newvals.items():
@@ -901,24 +1163,28 @@ class DataDict(DataDictBase):
         meta data or dependencies, etc.
 
         :param kw: one array per data field (none can be omitted).
+        :raises: ``ValueError`` if the new data does not fit the dataset.
         """
-        dd = self._build_structure(same_type=True)
-        for name, _ in dd.data_items():
+        for name, _ in self.data_items():
             if name not in kw:
                 kw[name] = None
 
+        # to_records makes sure all records have the same length.
         records = self.to_records(**kw)
-        for name, datavals in records.items():
-            dd[name]['values'] = datavals
+        for name in records:
+            if name not in self or self._is_meta_key(name):
+                raise ValueError(f"'{name}' is not a data field.")
+
+        nrecords = self.nrecords()
+        if nrecords is not None and nrecords > 0:
+            newvals = {name: self._appended_values(name, datavals)
+                       for name, datavals in records.items()}
+        else:
+            newvals = records
 
-        if dd.validate():
-            nrecords = self.nrecords()
-            if nrecords is not None and nrecords > 0:
-                self.append(dd)
-            else:
-                for key, val in dd.data_items():
-                    self[key]['values'] = val['values']
-            self.validate()
+        for name, vals in newvals.items():
+            self[name]['values'] = vals
+        self.validate()
 
     # shape information and expansion
 
@@ -1005,6 +1271,7 @@ class DataDict(DataDictBase):
 
     # validation and sanitizing
 
+    @_cached_validation
     def validate(self) -> bool:
         """
         Check dataset validity.
@@ -1021,8 +1288,7 @@ class DataDict(DataDictBase):
             msg = '\n'
 
             for n, v in self.data_items():
-                if type(v['values']) not in [np.ndarray,
-                                             np.ma.core.MaskedArray]:
+                if type(v['values']) not in _ARRAY_TYPES:
                     self[n]['values'] = np.array(v['values'])
 
                 if nvals is None:
@@ -1121,6 +1387,7 @@ class MeshgridDataDict(DataDictBase):
             return np.array(self.data_vals(d)).shape
         return None
 
+    @_cached_validation
     def validate(self) -> bool:
         """
         Validation of the dataset.
@@ -1153,7 +1420,7 @@ class MeshgridDataDict(DataDictBase):
         data_items = dict(self.data_items())
 
         for n, v in data_items.items():
-            if type(v['values']) not in [np.ndarray, np.ma.core.MaskedArray]:
+            if type(v['values']) not in _ARRAY_TYPES:
                 self[n]['values'] = np.array(v['values'])
 
             if shp is None:
@@ -1316,24 +1583,42 @@ def _mesh_slice(data: MeshgridDataDict, **kwargs: Dict[str, Union[slice, int]])
 
 # Tools for converting between different data types
 
-def guess_shape_from_datadict(data: DataDict) -> \
+def guess_shape_from_datadict(
+        data: DataDict,
+        guessers: Optional[Dict[Tuple[str, ...], num.SweepGridGuesser]] = None) -> \
         Dict[str, Union[None, Tuple[List[str], Tuple[int, ...]]]]:
     """
     Try to guess the shape of the datadict dependents from the axes values.
 
+    The shape is inferred only once for each distinct list of axes;
+    dependents with the same axes share the result.
+
     :param data: Dataset to examine.
+    :param guessers: If given, use (and add, if missing) a
+        :class:`.SweepGridGuesser` per list of axes from this dictionary.
+        When the same dictionary is used for a growing dataset, only the new
+        values need to be analyzed.
     :return: A dictionary with the dependents as keys, and inferred shapes as
              values. Value is ``None``, if the shape could not be inferred.
     """
 
     shapes = {}
+    guesses: Dict[Tuple[str, ...], Union[None, Tuple[List[str], Tuple[int, ...]]]] = {}
     for d in data.dependents():
-        axnames = data.axes(d)
-        axes: Dict[str, np.ndarray] = {}
-        for a in axnames:
-            axdata = data.data_vals(a)
-            axes[a] = axdata
-        shapes[d] = num.guess_grid_from_sweep_direction(**axes)
+        axnames = tuple(data.axes(d))
+        if axnames not in guesses:
+            axes: Dict[str, np.ndarray] = {}
+            for a in axnames:
+                axdata = data.data_vals(a)
+                axes[a] = axdata
+            if guessers is None:
+                guesses[axnames] = num.guess_grid_from_sweep_direction(**axes)
+            else:
+                guesses[axnames] = guessers.setdefault(
+                    axnames, num.SweepGridGuesser()).guess(**axes)
+
+        guess = guesses[axnames]
+        shapes[d] = None if guess is None else (guess[0].copy(), guess[1])
 
     return shapes
 
@@ -1342,7 +1627,9 @@ def datadict_to_meshgrid(data: DataDict,
                          target_shape: Union[Tuple[int, ...], None] = None,
                          inner_axis_order: Union[None, Sequence[str]] = None,
                          use_existing_shape: bool = False,
-                         copy: bool = True) \
+                         copy: bool = True,
+                         shape_guessers: Optional[Dict[Tuple[str, ...], num.SweepGridGuesser]] = None,
+                         out: Optional[Dict[str, np.ndarray]] = None) \
         -> MeshgridDataDict:
     """
     Try to make a meshgrid from a dataset.
@@ -1366,6 +1653,14 @@ def datadict_to_meshgrid(data: DataDict,
         If ``False``, flatten and reshape.
     :param copy: if ``True``, then we make a copy of the data arrays.
         if ``False``, data array is modified in-place.
+    :param shape_guessers: passed to ``guess_shape_from_datadict`` as
+        ``guessers`` when the shape is inferred.
+    :param out: arrays to write the gridded values into, by field name
+        (see ``out`` in :func:`.num.array1d_to_meshgrid`). Newly allocated
+        arrays are added to the dictionary, such that passing the same
+        dictionary again re-uses them as long as shape and dtype don't
+        change. Note that this overwrites the values of previously returned
+        data.
 
     :raises: GriddingError (subclass of ValueError) if the data cannot be gridded.
     :returns: The generated ``MeshgridDataDict``.
@@ -1385,7 +1680,7 @@ def datadict_to_meshgrid(data: DataDict,
 
     # guess what the shape likely is.
     if target_shape is None:
-        shp_specs = guess_shape_from_datadict(data)
+        shp_specs = guess_shape_from_datadict(data, guessers=shape_guessers)
         shps = set(order_shape[1] if order_shape is not None
                    else None for order_shape in shp_specs.values())
         if len(shps) > 1:
@@ -1401,7 +1696,10 @@ def datadict_to_meshgrid(data: DataDict,
     axlist = data.axes(data.dependents()[0])
 
     for k, v in data.data_items():
-        vals = num.array1d_to_meshgrid(v['values'], target_shape, copy=copy)
+        vals = num.array1d_to_meshgrid(v['values'], target_shape, copy=copy,
+                                       out=None if out is None else out.get(k))
+        if out is not None and not np.may_share_memory(vals, v['values']):
+            out[k] = vals
 
         # if an inner axis order is given, we transpose to transform from that
         # to the specified order.
@@ -1458,7 +1756,46 @@ def _find_replacement_name(ddict: DataDictBase, name: str) -> str:
         return newname
 
 
-def combine_datadicts(*dicts: DataDict) -> Union[DataDictBase, DataDict]:
+def _values_fingerprint(vals: np.ndarray,
+                        cache: Dict[int, Tuple[Any, Tuple[Any, ...]]]) -> Tuple[Any, ...]:
+    """Cheap-to-compare fingerprint of an array (shape, dtype and a hash of
+    the data), computed once per array object and kept in ``cache``.
+
+    Cache entries hold a weak reference to their array, such that an entry
+    is not used for another array that got the same ``id`` after the first
+    one was freed.
+    """
+    entry = cache.get(id(vals))
+    if entry is None or entry[0]() is not vals:
+        arr = np.ascontiguousarray(vals)
+        digest = hashlib.blake2b(arr.reshape(-1).view(np.uint8).data,
+                                 digest_size=16).digest()
+        entry = (weakref.ref(vals), (arr.shape, arr.dtype.str, digest))
+        cache[id(vals)] = entry
+    return entry[1]
+
+
+def _same_values(a: np.ndarray, b: np.ndarray,
+                 cache: Dict[int, Tuple[Any, Tuple[Any, ...]]]) -> bool:
+    """Check whether two value arrays are equal (see :func:`.num.arrays_equal`).
+
+    The same object, or arrays with the same fingerprint, are equal without
+    comparing them element-wise. Only otherwise, the arrays are compared.
+    """
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) and isinstance(b, np.ndarray) \
+            and not isinstance(a, np.ma.MaskedArray) \
+            and not isinstance(b, np.ma.MaskedArray) \
+            and not a.dtype.hasobject and not b.dtype.hasobject:
+        if a.shape != b.shape:
+            return False
+        if _values_fingerprint(a, cache) == _values_fingerprint(b, cache):
+            return True
+    return num.arrays_equal(a, b)
+
+
+def combine_datadicts(*dicts: DataDict, copy: bool = True) -> Union[DataDictBase, DataDict]:
     """
     Try to make one datadict out of multiple.
 
@@ -1468,6 +1805,13 @@ def combine_datadicts(*dicts: DataDict) -> Union[DataDictBase, DataDict]:
     - Return type is 'downgraded' to DataDictBase if the contents are not
       compatible (i.e., different numbers of records in the inputs).
 
+    Axes of the same name are merged if their values are equal. Values that
+    are the same array, or have the same fingerprint (computed once per
+    array), are not compared element-wise.
+
+    :param dicts: DataDicts to combine.
+    :param copy: If ``False``, don't copy the values of the first input, but
+        share them (useful when the inputs have just been created).
     :returns: Combined data.
     """
 
@@ -1479,11 +1823,11 @@ def combine_datadicts(*dicts: DataDict) -> Union[DataDictBase, DataDict]:
 
     ret: Union[DataDictBase, None] = None
     rettype: Union[type[DataDictBase], None] = None
-
+    fingerprints: Dict[int, Tuple[Any, Tuple[Any, ...]]] = {}
 
     for d in dicts:
         if ret is None:
-            ret = d.copy()
+            ret = d.copy(deep=copy)
             rettype = type(d)
 
         else:
@@ -1504,7 +1848,8 @@ def combine_datadicts(*dicts: DataDict) -> Union[DataDictBase, DataDict]:
             ax_map = {}
             for d_ax in d.axes():
                 if d_ax in ret.axes():
-                    if num.arrays_equal(d.data_vals(d_ax), ret.data_vals(d_ax)):
+                    if _same_values(d.data_vals(d_ax), ret.data_vals(d_ax),
+                                    fingerprints):
                         ax_map[d_ax] = d_ax
                     else:
                         newax = _find_replacement_name(ret, d_ax)
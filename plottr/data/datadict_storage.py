@@ -14,13 +14,18 @@ import datetime
 import uuid
 import json
 import shutil
+import threading
+from collections import deque
+from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Union, Optional, Dict, Type, Collection
+from typing import Any, Union, Optional, Dict, List, Type, Collection, Deque
 from types import TracebackType
 from pathlib import Path
 
 import numpy as np
 import h5py
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
 
 from qcodes.utils import NumpyJSONEncoder
 from plottr import Signal, Slot, QtWidgets, QtCore
@@ -29,7 +34,7 @@ from ..node import (
     Node, NodeWidget, updateOption,
 )
 
-from .datadict import DataDict, is_meta_key, DataDictBase
+from .datadict import DataDict, is_meta_key, DataDictBase, LazyArray
 
 __author__ = 'Wolfgang Pfaff'
 __license__ = 'MIT'
@@ -37,6 +42,10 @@ __license__ = 'MIT'
 DATAFILEXT = 'ddh5'
 TIMESTRFORMAT = "%Y-%m-%d %H:%M:%S"
 
+#: Target size of an HDF5 chunk in bytes when chunk sizes are determined
+#: automatically (see :func:`chunk_rows`).
+CHUNK_TARGET_NBYTES = 256 * 1024
+
 logger = logging.getLogger(__name__)
 
 # FIXME: need correct handling of dtypes and list/array conversion
@@ -127,6 +136,24 @@ def add_cur_time_attr(h5obj: Any, name: str = 'creation',
     set_attr(h5obj, prefix + name + '_time_str' + suffix, tstr)
 
 
+def chunk_rows(row_nbytes: int, nrecords: Optional[int] = None,
+               target_nbytes: int = CHUNK_TARGET_NBYTES) -> int:
+    """Determine the number of records per HDF5 chunk.
+
+    Chunks are sized to hold about `target_nbytes`, but never more records
+    than the expected total number of records.
+
+    :param row_nbytes: Size of a single record in bytes.
+    :param nrecords: Expected total number of records, if known.
+    :param target_nbytes: Target size of a chunk in bytes.
+    :return: Number of records per chunk (at least 1).
+    """
+    rows = max(1, target_nbytes // max(1, row_nbytes))
+    if nrecords is not None and nrecords > 0:
+        rows = min(rows, nrecords)
+    return int(rows)
+
+
 # elementary reading/writing
 
 def _data_file_path(file: Union[str, Path], init_directory: bool = False) -> Path:
@@ -146,7 +173,8 @@ def datadict_to_hdf5(datadict: DataDict,
                      path: Union[str, Path],
                      groupname: str = 'data',
                      append_mode: AppendMode = AppendMode.new,
-                     file_timeout: Optional[float] = None) -> None:
+                     file_timeout: Optional[float] = None,
+                     expected_nrecords: Optional[int] = None) -> None:
     """Write a DataDict to DDH5
 
     Note: Meta data is only written during initial writing of the dataset.
@@ -166,6 +194,9 @@ def datadict_to_hdf5(datadict: DataDict,
     :param file_timeout: How long the function will wait for the ddh5 file to unlock. Only relevant if you are
         writing to a file that already exists and some other program is trying to read it at the same time.
         If none uses the default value from the :class:`FileOpener`.
+    :param expected_nrecords: Expected final number of records. Only used for
+        datasets that are newly created, to determine their chunk size
+        (see :func:`chunk_rows`). If ``None``, h5py chooses the chunking.
 
     """
     filepath = _data_file_path(path, True)
@@ -173,52 +204,83 @@ def datadict_to_hdf5(datadict: DataDict,
         append_mode = AppendMode.none
 
     with FileOpener(filepath, 'a', file_timeout) as f:
-        if append_mode is AppendMode.none:
-            init_file(f, groupname)
-        assert groupname in f
-        grp = f[groupname]
+        datadict_to_h5file(f, datadict, groupname=groupname,
+                           append_mode=append_mode,
+                           expected_nrecords=expected_nrecords)
 
-        # add top-level meta data.
-        for k, v in datadict.meta_items(clean_keys=False):
-            set_attr(grp, k, v)
-
-        for k, v in datadict.data_items():
-            data = v['values']
-            shp = data.shape
-            nrows = shp[0]
 
-            # create new dataset, add axes and unit metadata
-            if k not in grp:
-                maxshp = tuple([None] + list(shp[1:]))
-                ds = grp.create_dataset(k, maxshape=maxshp, data=data)
-
-                # add meta data
-                add_cur_time_attr(ds)
+def datadict_to_h5file(f: h5py.File,
+                       datadict: DataDict,
+                       groupname: str = 'data',
+                       append_mode: AppendMode = AppendMode.new,
+                       expected_nrecords: Optional[int] = None) -> None:
+    """Write a DataDict to an HDF5 file that is already open.
+
+    Same as :func:`datadict_to_hdf5`, but does not open the file itself (and
+    thus does not create a lock file); the caller is responsible for that.
+    If the group does not exist yet, it is created. The file is flushed once
+    at the end. If the file is in SWMR mode, no attributes are written (HDF5
+    doesn't allow that), i.e., the top-level meta data is not updated; the
+    meta data of datasets is only written when they are created anyway.
+
+    :param f: The open HDF5 file (writable).
+    :param datadict: Datadict to write.
+    :param groupname: Name of the top level group to store the data in.
+    :param append_mode: See :func:`datadict_to_hdf5`.
+    :param expected_nrecords: See :func:`datadict_to_hdf5`.
+    """
+    if append_mode is AppendMode.none or groupname not in f:
+        init_file(f, groupname)
+    grp = f[groupname]
 
-                if v.get('axes', []):
-                    set_attr(ds, 'axes', v['axes'])
-                if v.get('unit', "") != "":
-                    set_attr(ds, 'unit', v['unit'])
+    # add top-level meta data.
+    if not f.swmr_mode:
+        for k, v in datadict.meta_items(clean_keys=False):
+            set_attr(grp, k, v)
 
-                for kk, vv in datadict.meta_items(k, clean_keys=False):
-                    set_attr(ds, kk, vv)
-                ds.flush()
+    for k, v in datadict.data_items():
+        data = v['values']
+        shp = data.shape
+        nrows = shp[0]
+
+        # create new dataset, add axes and unit metadata
+        if k not in grp:
+            maxshp = tuple([None] + list(shp[1:]))
+            chunks = None
+            if expected_nrecords is not None and 0 not in shp[1:]:
+                row_nbytes = data.dtype.itemsize * int(np.prod(shp[1:]))
+                chunks = tuple([chunk_rows(row_nbytes, expected_nrecords)]
+                               + list(shp[1:]))
+            ds = grp.create_dataset(k, maxshape=maxshp, data=data,
+                                    chunks=chunks)
+
+            # add meta data
+            add_cur_time_attr(ds)
+
+            if v.get('axes', []):
+                set_attr(ds, 'axes', v['axes'])
+            if v.get('unit', "") != "":
+                set_attr(ds, 'unit', v['unit'])
+
+            for kk, vv in datadict.meta_items(k, clean_keys=False):
+                set_attr(ds, kk, vv)
+
+        # if the dataset already exits, append data according to
+        # chosen append mode.
+        else:
+            ds = grp[k]
+            dslen = ds.shape[0]
 
-            # if the dataset already exits, append data according to
-            # chosen append mode.
-            else:
-                ds = grp[k]
-                dslen = ds.shape[0]
+            if append_mode == AppendMode.new:
+                newshp = tuple([nrows] + list(shp[1:]))
+                ds.resize(newshp)
+                ds[dslen:] = data[dslen:]
+            elif append_mode == AppendMode.all:
+                newshp = tuple([dslen + nrows] + list(shp[1:]))
+                ds.resize(newshp)
+                ds[dslen:] = data[:]
 
-                if append_mode == AppendMode.new:
-                    newshp = tuple([nrows] + list(shp[1:]))
-                    ds.resize(newshp)
-                    ds[dslen:] = data[dslen:]
-                elif append_mode == AppendMode.all:
-                    newshp = tuple([dslen + nrows] + list(shp[1:]))
-                    ds.resize(newshp)
-                    ds[dslen:] = data[:]
-                ds.flush()
+    f.flush()
 
 
 def init_file(f: h5py.File,
@@ -242,7 +304,10 @@ def datadict_from_hdf5(path: Union[str, Path],
                        stopidx: Union[int, None] = None,
                        structure_only: bool = False,
                        ignore_unequal_lengths: bool = True,
-                       file_timeout: Optional[float] = None) -> DataDict:
+                       file_timeout: Optional[float] = None,
+                       swmr: bool = False,
+                       lazy: bool = False,
+                       fields: Optional[Collection[str]] = None) -> DataDict:
     """Load a DataDict from file.
 
     :param path: Full filepath without the file extension.
@@ -254,7 +319,17 @@ def datadict_from_hdf5(path: Union[str, Path],
         unequal length; will return the longest consistent DataDict possible.
     :param file_timeout: How long the function will wait for the ddh5 file to unlock. If none uses the default
         value from the :class:`FileOpener`.
+    :param swmr: If ``True``, open the file as SWMR reader. This does not use the lock file, and allows
+        reading while a :class:`DDH5Writer` with ``swmr=True`` is writing to the file.
+        Datasets may have unequal lengths in that case (see `ignore_unequal_lengths`).
+    :param lazy: If ``True``, don't read the data values yet. Values are
+        :class:`.LazyArray` placeholders that are read from the file when they
+        are first used (see :func:`lazy_dataset_values`).
+    :param fields: Names of the data fields to load. The axes of these fields
+        (from the ``axes`` attributes of the datasets) are added automatically;
+        no other datasets are read. If ``None``, load all fields.
     :return: Validated DataDict.
+    :raises: ``ValueError`` if a field in ``fields`` does not exist.
     """
     filepath = _data_file_path(path)
     if not filepath.exists():
@@ -264,15 +339,23 @@ def datadict_from_hdf5(path: Union[str, Path],
         startidx = 0
 
     res = {}
-    with FileOpener(filepath, 'r', file_timeout) as f:
+    with FileOpener(filepath, 'r', file_timeout, swmr=swmr) as f:
         if groupname not in f:
             raise ValueError('Group does not exist.')
 
         grp = f[groupname]
-        keys = list(grp.keys())
-        lens = [len(grp[k][:]) for k in keys]
+        if fields is None:
+            keys = list(grp.keys())
+        else:
+            keys = _fields_with_axes(grp, fields)
+
+        # lengths and shapes come from the dataset metadata only; the only
+        # read of actual data is the requested slice below.
+        lens = [grp[k].shape[0] for k in keys]
 
-        if len(set(lens)) > 1:
+        if len(lens) == 0:
+            stopidx = 0
+        elif len(set(lens)) > 1:
             if not ignore_unequal_lengths:
                 raise RuntimeError('Unequal lengths in the datasets.')
 
@@ -288,7 +371,8 @@ def datadict_from_hdf5(path: Union[str, Path],
 
         for k in keys:
             ds = grp[k]
-            entry: Dict[str, Union[Collection[Any], np.ndarray]] = dict(values=np.array([]), )
+            entry: Dict[str, Union[Collection[Any], np.ndarray]] = dict(
+                values=np.array([], dtype=ds.dtype), )
 
             if 'axes' in ds.attrs:
                 entry['axes'] = deh5ify(ds.attrs['axes']).tolist()
@@ -298,15 +382,18 @@ def datadict_from_hdf5(path: Union[str, Path],
             if 'unit' in ds.attrs:
                 entry['unit'] = deh5ify(ds.attrs['unit'])
 
-            if not structure_only:
+            if lazy and not structure_only:
+                entry['values'] = lazy_dataset_values(
+                    filepath, groupname, k, ds, startidx, stopidx,
+                    file_timeout=file_timeout, swmr=swmr)
+            elif not structure_only:
                 entry['values'] = ds[startidx:stopidx]
 
-            entry['__shape__'] = ds[:].shape
+            entry['__shape__'] = ds.shape
 
             # and now the meta data
             for attr in ds.attrs:
                 if is_meta_key(attr):
-                    _val = deh5ify(ds.attrs[attr])
                     entry[attr] = deh5ify(ds.attrs[attr])
 
             res[k] = entry
@@ -316,6 +403,62 @@ def datadict_from_hdf5(path: Union[str, Path],
     return dd
 
 
+def _fields_with_axes(grp: h5py.Group, fields: Collection[str]) -> List[str]:
+    """Names of the datasets in ``grp`` that are needed to load ``fields``,
+    i.e., the fields themselves and their axes, in file order."""
+    needed = set()
+    for k in fields:
+        if k not in grp:
+            raise ValueError(f"Field '{k}' does not exist.")
+        needed.add(k)
+        if 'axes' in grp[k].attrs:
+            needed.update(deh5ify(grp[k].attrs['axes']).tolist())
+    return [k for k in grp.keys() if k in needed]
+
+
+def lazy_dataset_values(filepath: Path, groupname: str, name: str,
+                        ds: h5py.Dataset, startidx: int, stopidx: int,
+                        file_timeout: Optional[float] = None,
+                        swmr: bool = False) -> Union[LazyArray, np.ndarray]:
+    """Placeholder for the rows ``startidx:stopidx`` of a dataset that reads
+    them only when they are used.
+
+    Contiguous datasets (not chunked, and thus not compressed) are
+    memory-mapped directly from the file, copy-on-write; the OS then only
+    reads the pages that are actually accessed. Chunked datasets are read
+    through h5py, with the same file access as :func:`datadict_from_hdf5`.
+
+    :param filepath: Path of the ddh5 file (with extension).
+    :param groupname: Name of the hdf5 group.
+    :param name: Name of the dataset.
+    :param ds: The dataset; only used for its metadata. The file may be closed
+        before the values are loaded.
+    :param startidx: Start row.
+    :param stopidx: End row + 1.
+    :param file_timeout: See :func:`datadict_from_hdf5`.
+    :param swmr: See :func:`datadict_from_hdf5`.
+    :return: A :class:`.LazyArray`, or the (empty) values if there are no rows.
+    """
+    shape = (max(stopidx - startidx, 0),) + tuple(ds.shape[1:])
+    dtype = ds.dtype
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+
+    offset = ds.id.get_offset()
+    if ds.chunks is None and offset is not None and not dtype.hasobject:
+        row_nbytes = dtype.itemsize * int(np.prod(shape[1:]))
+
+        def load() -> np.ndarray:
+            return np.memmap(filepath, dtype=dtype, mode='c', shape=shape,
+                             offset=offset + startidx * row_nbytes)
+    else:
+        def load() -> np.ndarray:
+            with FileOpener(filepath, 'r', file_timeout, swmr=swmr) as f:
+                return f[groupname][name][startidx:stopidx]
+
+    return LazyArray(load, shape, dtype)
+
+
 def all_datadicts_from_hdf5(path: Union[str, Path], file_timeout: Optional[float] = None, **kwargs: Any) -> Dict[str, Any]:
     """
     Loads all the DataDicts contained on a single HDF5 file. Returns a dictionary with the group names as keys and
@@ -331,7 +474,7 @@ def all_datadicts_from_hdf5(path: Union[str, Path], file_timeout: Optional[float
         raise ValueError("Specified file does not exist.")
 
     ret = {}
-    with FileOpener(filepath, 'r', file_timeout) as f:
+    with FileOpener(filepath, 'r', file_timeout, swmr=kwargs.get('swmr', False)) as f:
         keys = [k for k in f.keys()]
     for k in keys:
         ret[k] = datadict_from_hdf5(path=path, groupname=k, file_timeout=file_timeout, **kwargs)
@@ -340,22 +483,113 @@ def all_datadicts_from_hdf5(path: Union[str, Path], file_timeout: Optional[float
 
 # File access with locking
 
+@dataclass
+class FileOpenStats:
+    """Statistics about a single :class:`FileOpener` access."""
+    #: The file that was opened.
+    path: Path
+    #: The opening mode.
+    mode: str
+    #: Time (in s) spent waiting for a lock file of another process to disappear.
+    lock_wait: float = 0.
+    #: Time (in s) spent waiting for HDF5 to open the file after acquiring the lock.
+    open_wait: float = 0.
+    #: Number of attempts to open the file with h5py.
+    open_attempts: int = 0
+    #: Whether lock file removal was watched with file system events.
+    event_driven: bool = False
+
+    @property
+    def wait(self) -> float:
+        """Total time (in s) until the file was open."""
+        return self.lock_wait + self.open_wait
+
+
+class _LockFileHandler(FileSystemEventHandler):
+    """Watchdog handler that sets an event whenever the lock file is changed."""
+
+    def __init__(self, lock_path: Path, event: threading.Event):
+        super().__init__()
+        self.lock_path = lock_path
+        self.event = event
+
+    def dispatch(self, event: FileSystemEvent) -> None:
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if any(p and Path(os.fsdecode(p)) == self.lock_path for p in paths):
+            self.event.set()
+
+
+class _LockFileWatcher:
+    """Waits for changes of a lock file.
+
+    Uses watchdog (inotify, etc.) to wake up as soon as the lock file is removed.
+    If no observer can be started (e.g., because the OS limit of watches is
+    reached), :meth:`wait` simply sleeps for the given time.
+    """
+
+    def __init__(self, lock_path: Path):
+        self.lock_path = lock_path.absolute()
+        self.changed = threading.Event()
+        self.observer: Optional[Any] = None
+        try:
+            self.observer = Observer()
+            self.observer.schedule(_LockFileHandler(self.lock_path, self.changed),
+                                   str(self.lock_path.parent), recursive=False)
+            self.observer.start()
+        except Exception as e:
+            logger.debug(f"Cannot watch {self.lock_path} ({e}), falling back to polling.")
+            self.observer = None
+
+    @property
+    def active(self) -> bool:
+        return self.observer is not None
+
+    def wait(self, timeout: float) -> None:
+        self.changed.wait(timeout)
+        self.changed.clear()
+
+    def stop(self) -> None:
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+
+
 class FileOpener:
     """
     Context manager for opening files, creates its own file lock to indicate other programs that the file is being
     used. The lock file follows the following structure: "~<file_name>.lock".
 
+    While the file is locked by another program, the FileOpener watches the lock file with watchdog and continues
+    as soon as the lock file is removed. In addition (and if file system events are not available), the file is
+    polled with exponentially increasing delays, starting at ``min_delay`` and going up to ``test_delay``.
+    How long opening the file took is recorded in :attr:`stats` (see :class:`FileOpenStats`); the statistics of
+    the most recent accesses are also kept in :attr:`FileOpener.recent_stats`.
+
     :param path: The file path.
     :param mode: The opening file mode. Only the following modes are supported: 'r', 'w', 'w-', 'a'. Defaults to 'r'.
     :param timeout: Time, in seconds, the context manager waits for the file to unlock. Defaults to 30.
-    :param test_delay: Length of time in between checks. I.e. how long the FileOpener waits to see if a file got
-        unlocked again
+    :param test_delay: Maximum length of time in between checks. I.e. how long the FileOpener waits at most to see
+        if a file got unlocked again
+    :param swmr: If ``True``, use HDF5 single-writer/multiple-reader (SWMR) access.
+        In read mode, the file is opened as SWMR reader and no lock file is used or
+        created; the file can then be read while an SWMR writer (see :class:`DDH5Writer`)
+        is writing to it. In write modes, the file is opened with the latest HDF5 file
+        format, which is required for switching to SWMR mode later
+        (``f.swmr_mode = True``); the lock file is used as usual.
    """
 
+    #: Initial delay (in s) between checks.
+    min_delay = 1e-3
+
+    #: Statistics of the most recent file accesses (newest last).
+    recent_stats: Deque[FileOpenStats] = deque(maxlen=1000)
+
     def __init__(self, path: Union[Path, str],
                  mode: str = 'r',
                  timeout: Optional[float] = None,
-                 test_delay: float = 0.1):
+                 test_delay: float = 0.1,
+                 swmr: bool = False):
         self.path = Path(path)
         self.lock_path = self.path.parent.joinpath("~" + str(self.path.stem) + '.lock')
         if mode not in ['r', 'w', 'w-', 'a']:
@@ -367,8 +601,11 @@ class FileOpener:
         else:
             self.timeout = timeout
         self.test_delay = test_delay
+        self.swmr = swmr
 
         self.file: Optional[h5py.File] = None
+        self.stats = FileOpenStats(self.path, self.mode)
+        self._has_lock = False
 
     def __enter__(self) -> h5py.File:
         self.file = self.open_when_unlocked()
@@ -382,32 +619,79 @@ class FileOpener:
             assert self.file is not None
             self.file.close()
         finally:
-            if self.lock_path.is_file():
+            if self._has_lock and self.lock_path.is_file():
                 self.lock_path.unlink()
-
-    def open_when_unlocked(self) -> h5py.File:
-        t0 = time.time()
+            self._has_lock = False
+
+    def _open(self) -> h5py.File:
+        self.stats.open_attempts += 1
+        if self.swmr and self.mode == 'r':
+            return h5py.File(str(self.path), 'r', libver='latest', swmr=True)
+        elif self.swmr:
+            return h5py.File(str(self.path), self.mode, libver='latest')
+        return h5py.File(str(self.path), self.mode)
+
+    def _open_with_retries(self, t0: float) -> h5py.File:
+        delay = self.min_delay
         while True:
-            if not self.lock_path.is_file():
-                try:
-                    self.lock_path.touch(exist_ok=False)
-                # This happens if some other process beat this one and created the file beforehand
-                except FileExistsError:
+            try:
+                return self._open()
+            except (OSError, PermissionError, RuntimeError):
+                pass
+            if time.monotonic() - t0 > self.timeout:
+                raise RuntimeError('Waiting or file unlock timeout')
+            time.sleep(delay)  # don't overwhelm the FS by very fast repeated calls.
+            delay = min(2 * delay, self.test_delay)
+
+    def _acquire_lock(self, t0: float) -> None:
+        delay = self.min_delay
+        watcher: Optional[_LockFileWatcher] = None
+        try:
+            while True:
+                if not self.lock_path.is_file():
+                    try:
+                        self.lock_path.touch(exist_ok=False)
+                    # This happens if some other process beat this one and created the file beforehand
+                    except FileExistsError:
+                        continue
+                    self._has_lock = True
+                    return
+
+                remaining = self.timeout - (time.monotonic() - t0)
+                if remaining <= 0:
+                    raise RuntimeError('Lock file remained for longer than timeout time')
+
+                # only start watching once we actually have to wait. Checking the
+                # lock again right after starting the observer ensures we don't
+                # miss a removal that happened in between.
+                if watcher is None:
+                    watcher = _LockFileWatcher(self.lock_path)
+                    self.stats.event_driven = watcher.active
                     continue
 
-                while True:
-                    try:
-                        f = h5py.File(str(self.path), self.mode)
-                        return f
-                    except (OSError, PermissionError, RuntimeError):
-                        pass
-                    time.sleep(self.test_delay)  # don't overwhelm the FS by very fast repeated calls.
-                    if time.time() - t0 > self.timeout:
-                        raise RuntimeError('Waiting or file unlock timeout')
+                watcher.wait(min(delay, remaining))
+                delay = min(2 * delay, self.test_delay)
+        finally:
+            self.stats.lock_wait = time.monotonic() - t0
+            if watcher is not None:
+                watcher.stop()
 
-            time.sleep(self.test_delay)  # don't overwhelm the FS by very fast repeated calls.
-            if time.time() - t0 > self.timeout:
-                raise RuntimeError('Lock file remained for longer than timeout time')
+    def open_when_unlocked(self) -> h5py.File:
+        t0 = time.monotonic()
+        try:
+            # SWMR readers do not need the lock. Opening only fails while a
+            # writer has the file open without having switched to SWMR mode yet.
+            if not (self.swmr and self.mode == 'r'):
+                self._acquire_lock(t0)
+            return self._open_with_retries(t0)
+        except BaseException:
+            if self._has_lock and self.lock_path.is_file():
+                self.lock_path.unlink()
+            self._has_lock = False
+            raise
+        finally:
+            self.stats.open_wait = time.monotonic() - t0 - self.stats.lock_wait
+            self.recent_stats.append(self.stats)
 
 
 # Node for monitoring #
@@ -420,20 +704,32 @@ class DDH5LoaderWidget(NodeWidget):
 
         self.fileinput = QtWidgets.QLineEdit()
         self.groupinput = QtWidgets.QLineEdit('data')
+        self.incrementalinput = QtWidgets.QCheckBox('Only load new data')
+        self.swmrinput = QtWidgets.QCheckBox('SWMR read access')
+        self.lazyinput = QtWidgets.QCheckBox('Load values only when used')
         self.reload = QtWidgets.QPushButton('Reload')
 
         self.optSetters = {
             'filepath': self.fileinput.setText,
             'groupname': self.groupinput.setText,
+            'incremental': self.incrementalinput.setChecked,
+            'swmr': self.swmrinput.setChecked,
+            'lazy': self.lazyinput.setChecked,
         }
         self.optGetters = {
             'filepath': self.fileinput.text,
             'groupname': self.groupinput.text,
+            'incremental': self.incrementalinput.isChecked,
+            'swmr': self.swmrinput.isChecked,
+            'lazy': self.lazyinput.isChecked,
         }
 
         flayout = QtWidgets.QFormLayout()
         flayout.addRow('File path:', self.fileinput)
         flayout.addRow('Group:', self.groupinput)
+        flayout.addRow(self.incrementalinput)
+        flayout.addRow(self.swmrinput)
+        flayout.addRow(self.lazyinput)
 
         vlayout = QtWidgets.QVBoxLayout()
         vlayout.addLayout(flayout)
@@ -447,10 +743,42 @@ class DDH5LoaderWidget(NodeWidget):
         self.groupinput.textEdited.connect(
             lambda x: self.signalOption('groupname')
         )
+        self.incrementalinput.toggled.connect(
+            lambda x: self.signalOption('incremental')
+        )
+        self.swmrinput.toggled.connect(
+            lambda x: self.signalOption('swmr')
+        )
+        self.lazyinput.toggled.connect(
+            lambda x: self.signalOption('lazy')
+        )
         self.reload.pressed.connect(self.node.update)
 
 
 class DDH5Loader(Node):
+    """Node that loads data from a DDH5 file.
+
+    By default, the full file is read on every update.
+    If :attr:`incremental` is ``True``, the loader keeps the data it has
+    already read and on each update only reads the records that have been
+    appended to the file since the previous load. A full reload is done
+    automatically when the file structure changes or the file shrinks
+    (e.g., because it was re-created).
+
+    If :attr:`swmr` is ``True``, the file is read with HDF5 SWMR access, without
+    using the lock file. Use this for live plotting of data written by a
+    :class:`DDH5Writer` with ``swmr=True``; reading then does not delay the
+    writer, and several loaders can read the same file at the same time.
+
+    If :attr:`lazy` is ``True`` (and :attr:`incremental` is not), data values
+    are only read from the file when they are used downstream (see
+    :func:`datadict_from_hdf5`). Fields that are dropped early, e.g., by a
+    :class:`.DataSelector`, are then never read.
+
+    If :attr:`fields` is set, only these fields and their axes are read from
+    the file (see :func:`datadict_from_hdf5`). This can, for instance, be set
+    to the ``selectedData`` of a downstream :class:`.DataSelector`.
+    """
 
     nodeName = 'DDH5Loader'
     uiClass = DDH5LoaderWidget
@@ -461,6 +789,10 @@ class DDH5Loader(Node):
     def __init__(self, name: str):
         self._filepath: Optional[str] = None
         self._groupname: str = 'data'
+        self._incremental: bool = False
+        self._swmr: bool = False
+        self._lazy: bool = False
+        self._fields: Optional[List[str]] = None
 
         super().__init__(name)
 
@@ -492,12 +824,50 @@ class DDH5Loader(Node):
     def groupname(self, val: str) -> None:
         self._groupname = val
 
+    @property
+    def incremental(self) -> bool:
+        """If ``True``, only read records appended since the last load."""
+        return self._incremental
+
+    @incremental.setter
+    @updateOption('incremental')
+    def incremental(self, val: bool) -> None:
+        self._incremental = val
+
+    @property
+    def swmr(self) -> bool:
+        """If ``True``, read the file with SWMR access, without lock file."""
+        return self._swmr
+
+    @swmr.setter
+    @updateOption('swmr')
+    def swmr(self, val: bool) -> None:
+        self._swmr = val
+
+    @property
+    def lazy(self) -> bool:
+        """If ``True``, only read data values when they are used."""
+        return self._lazy
+
+    @lazy.setter
+    @updateOption('lazy')
+    def lazy(self, val: bool) -> None:
+        self._lazy = val
+
+    @property
+    def fields(self) -> Optional[List[str]]:
+        """Fields to load (with their axes); ``None`` loads all fields."""
+        return self._fields
+
+    @fields.setter
+    @updateOption('fields')
+    def fields(self, val: Optional[List[str]]) -> None:
+        self._fields = None if val is None else list(val)
+
     # Data processing #
 
     def process(self, dataIn: Optional[DataDictBase] = None) -> Optional[Dict[str, Any]]:
 
-        # TODO: maybe needs an optional way to read only new data from file? -- can make that an option
-
         # this is the flow when process is called due to some trigger
         if self._filepath is None or self._groupname is None:
             return None
@@ -506,6 +876,10 @@ class DDH5Loader(Node):
 
         if not self.loadingThread.isRunning():
             self.loadingWorker.setPathAndGroup(self.filepath, self.groupname)
+            self.loadingWorker.incremental = self.incremental
+            self.loadingWorker.swmr = self.swmr
+            self.loadingWorker.lazy = self.lazy
+            self.loadingWorker.setFields(self.fields)
             self.loadingThread.start()
         return None
 
@@ -536,18 +910,86 @@ class _Loader(QtCore.QObject):
         super().__init__()
         self.filepath = filepath
         self.groupname = groupname
+        self.incremental = False
+        self.swmr = False
+        self.lazy = False
+        self.fields: Optional[List[str]] = None
+
+        #: data loaded so far; only kept in incremental mode.
+        self.data: Optional[DataDict] = None
 
     def setPathAndGroup(self, filepath: Optional[str], groupname: Optional[str]) -> None:
+        if filepath != self.filepath or groupname != self.groupname:
+            self.data = None
         self.filepath = filepath
         self.groupname = groupname
 
+    def setFields(self, fields: Optional[List[str]]) -> None:
+        if fields != self.fields:
+            self.data = None
+        self.fields = fields
+
     def loadData(self) -> bool:
         if self.filepath is None or self.groupname is None:
             self.dataLoaded.emit(None)
             return True
 
-        data = datadict_from_hdf5(self.filepath, groupname=self.groupname)
-        self.dataLoaded.emit(data)
+        if not self.incremental:
+            self.data = None
+            data = datadict_from_hdf5(self.filepath, groupname=self.groupname,
+                                      swmr=self.swmr, lazy=self.lazy,
+                                      fields=self.fields)
+            self.dataLoaded.emit(data)
+            return True
+
+        if self.data is None:
+            self.data = datadict_from_hdf5(self.filepath, groupname=self.groupname,
+                                           swmr=self.swmr, fields=self.fields)
+        elif not self.appendNewData():
+            self.dataLoaded.emit(None)
+            return True
+
+        # emit a shallow copy, so downstream nodes can't modify the
+        # data we keep around.
+        self.dataLoaded.emit(self.data.copy(deep=False))
+        return True
+
+    def appendNewData(self) -> bool:
+        """Read the records that were added to the file since the last
+        load, and append them to the data we already have.
+        If the structure of the data in the file has changed, or the file
+        has fewer records than we have loaded, the data is reloaded fully.
+
+        :returns: ``True`` if data has changed, ``False`` otherwise.
+        """
+        assert self.data is not None and self.filepath is not None \
+            and self.groupname is not None
+        nloaded = self.data.nrecords()
+        assert nloaded is not None
+
+        newdata = datadict_from_hdf5(self.filepath, groupname=self.groupname,
+                                     startidx=nloaded, swmr=self.swmr,
+                                     fields=self.fields)
+        nrecords_in_file = min(
+            [newdata.meta_val('shape', k)[0] for k, _ in newdata.data_items()],
+            default=0)
+
+        if nrecords_in_file < nloaded or \
+                not DataDictBase.same_structure(self.data, newdata):
+            self.data = datadict_from_hdf5(self.filepath, groupname=self.groupname,
+                                           swmr=self.swmr, fields=self.fields)
+            return True
+
+        newrecords = newdata.nrecords()
+        if newrecords is None or newrecords == 0:
+            return False
+
+        self.data.append(newdata)
+        for k, v in newdata.meta_items():
+            self.data.add_meta(k, v)
+        for k, _ in newdata.data_items():
+            for kk, vv in newdata.meta_items(k):
+                self.data.add_meta(kk, vv, data=k)
         return True
 
 
@@ -572,11 +1014,35 @@ class DDH5Writer(object):
     :param filename: Filename to use. Defaults to 'data.ddh5'.
     :param file_timeout: How long the function will wait for the ddh5 file to unlock. If none uses the default
         value from the :class:`FileOpener`.
+    :param streaming: If ``True``, data added with :meth:`add_data` is not kept
+        in :attr:`datadict`. Instead, records are collected in a buffer of at most
+        `buffer_size` records that is written to the file whenever it is full,
+        and when the writer is closed. Memory use then does not grow with the
+        size of the dataset.
+    :param buffer_size: Number of records kept in memory before they are written
+        to file. Only used if `streaming` is ``True``, or if `flush_interval` is
+        given.
+    :param expected_nrecords: Expected total number of records, if known (for
+        example the number of points in the sweep). Used to size the HDF5 chunks
+        of the datasets in the file (see :func:`chunk_rows`).
+    :param keep_open: If ``True``, the file is opened (and locked) once when entering
+        the context manager and stays open until exiting. This avoids the cost of
+        opening the file and creating the lock file on every write, but no other
+        program can read the file while the writer is open.
+    :param flush_interval: If given, new records are written to file at most every
+        `flush_interval` seconds, or once `buffer_size` records are pending,
+        whichever comes first. Otherwise, data is written on every call of
+        :meth:`add_data` (or when the buffer is full, in streaming mode).
+        Note that the interval is only checked when data is added; remaining data
+        is written when the writer is closed.
+    :param swmr: If ``True``, write the file in HDF5 single-writer/multiple-reader (SWMR)
+        mode. Implies `keep_open`. After the first write (which creates all datasets),
+        the file is switched to SWMR mode; from then on, readers that open the file with
+        ``swmr=True`` (see :func:`datadict_from_hdf5` and :class:`DDH5Loader`) can read
+        it at any time without waiting for the lock, and without delaying the writer.
+        Readers that do not use SWMR cannot open the file until the writer is closed.
     """
 
-    # TODO: need an operation mode for not keeping data in memory.
-    # TODO: a mode for working with pre-allocated data
-
     def __init__(self,
                  datadict: DataDict,
                  basedir: Union[str, Path] = '.',
@@ -584,11 +1050,32 @@ class DDH5Writer(object):
                  name: Optional[str] = None,
                  filename: str = 'data',
                  filepath: Optional[Union[str, Path]] = None,
-                 file_timeout: Optional[float] = None):
+                 file_timeout: Optional[float] = None,
+                 streaming: bool = False,
+                 buffer_size: int = 1000,
+                 expected_nrecords: Optional[int] = None,
+                 keep_open: bool = False,
+                 flush_interval: Optional[float] = None,
+                 swmr: bool = False):
         """Constructor for :class:`.DDH5Writer`"""
 
         self.basedir = Path(basedir)
         self.datadict = datadict
+        self.streaming = streaming
+        self.buffer_size = buffer_size
+        self.expected_nrecords = expected_nrecords
+        self.keep_open = keep_open or swmr
+        self.flush_interval = flush_interval
+        self.swmr = swmr
+
+        #: records that have been added but not written yet (streaming mode).
+        self._buffer: Optional[DataDict] = None
+        #: number of records written to the file so far.
+        self.nrecords_written = 0
+        self._last_flush = time.monotonic()
+
+        self._file_opener: Optional[FileOpener] = None
+        self._file: Optional[h5py.File] = None
 
         if name is None:
             name = ''
@@ -607,16 +1094,26 @@ class DDH5Writer(object):
 
     def __enter__(self) -> "DDH5Writer":
         if self.filepath is None:
-            self.filepath = _data_file_path(self.data_file_path(), True)
+            self.filepath = self.data_file_path()
+        self.filepath = _data_file_path(self.filepath, True)
         logger.info(f'Data location: {self.filepath}')
 
+        if self.keep_open:
+            self._file_opener = FileOpener(self.filepath, 'a', timeout=self.file_timeout,
+                                           swmr=self.swmr)
+            self._file = self._file_opener.__enter__()
+
         nrecords: Optional[int] = self.datadict.nrecords()
         if nrecords is not None and nrecords > 0:
-            datadict_to_hdf5(self.datadict,
-                             str(self.filepath),
-                             groupname=self.groupname,
-                             append_mode=AppendMode.none,
-                             file_timeout=self.file_timeout)
+            self._write(self.datadict, AppendMode.none)
+            self.nrecords_written = nrecords
+            if self.swmr:
+                self._stamp_last_change()
+                self._start_swmr()
+
+        if self.streaming:
+            self._buffer = self._empty_buffer()
+        self._last_flush = time.monotonic()
         return self
 
     def __exit__(self,
@@ -624,8 +1121,26 @@ class DDH5Writer(object):
                  exc_value: Optional[BaseException],
                  exc_traceback: Optional[TracebackType]) -> None:
         assert self.filepath is not None
-        with FileOpener(self.filepath, 'a', timeout=self.file_timeout) as f:
-            add_cur_time_attr(f.require_group(self.groupname), name='close')
+        try:
+            self.flush()
+            # attributes can't be added reliably in SWMR mode; stamp after closing.
+            if self._file is not None and not self.swmr:
+                add_cur_time_attr(self._file.require_group(self.groupname), name='close')
+        finally:
+            if self._file_opener is not None:
+                self._file_opener.__exit__(exc_type, exc_value, exc_traceback)
+                self._file_opener = None
+                self._file = None
+
+        if not self.keep_open or self.swmr:
+            with FileOpener(self.filepath, 'a', timeout=self.file_timeout) as f:
+                grp = f.require_group(self.groupname)
+                # meta data added while in SWMR mode could not be written before.
+                if self.swmr:
+                    for k, v in self.datadict.meta_items(clean_keys=False):
+                        set_attr(grp, k, v)
+                add_cur_time_attr(grp, name='close')
+
         if exc_type is None:
             # exiting because the measurement is complete
             self.add_tag('__complete__')
@@ -676,19 +1191,98 @@ class DDH5Writer(object):
         If some data is scalar and others are not, then the data should be reshaped
         to (1, ) for the scalar data, and (1, ...) for the others; in other words,
         an outer dimension with length 1 is added for all.
+
+        In streaming mode, or if a `flush_interval` is set, the data is only
+        written once enough records are pending (or when :meth:`flush` is called);
+        see the class documentation for details.
         """
-        self.datadict.add_data(**kwargs)
-        nrecords = self.datadict.nrecords()
-        if nrecords is not None and nrecords > 0:
-            datadict_to_hdf5(self.datadict, str(self.filepath),
+        if self.streaming:
+            assert self._buffer is not None
+            self._buffer.add_data(**kwargs)
+        else:
+            self.datadict.add_data(**kwargs)
+
+        if self._flush_due():
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all records that have been added but not written yet."""
+        if self.streaming:
+            if self._buffer is None:
+                return
+            nbuffered = self._buffer.nrecords()
+            if nbuffered is None or nbuffered == 0:
+                return
+            self._write(self._buffer, AppendMode.all)
+            self.nrecords_written += nbuffered
+            self._buffer = self._empty_buffer()
+        else:
+            nrecords = self.datadict.nrecords()
+            if nrecords is None or nrecords <= self.nrecords_written:
+                return
+            self._write(self.datadict, AppendMode.new)
+            self.nrecords_written = nrecords
+
+        if self._file is not None and self._file.swmr_mode:
+            # attributes can't be written reliably in SWMR mode; they have been
+            # stamped before it was enabled. Only make the new data visible.
+            self._file.flush()
+        else:
+            self._stamp_last_change()
+            self._start_swmr()
+        self._last_flush = time.monotonic()
+
+    def _start_swmr(self) -> None:
+        # all datasets exist after the first write, and the last change attributes
+        # have been created, so it's now safe to switch to SWMR mode.
+        if self.swmr and self._file is not None and not self._file.swmr_mode:
+            self._file.swmr_mode = True
+
+    def _pending_records(self) -> int:
+        if self.streaming:
+            if self._buffer is None:
+                return 0
+            return self._buffer.nrecords() or 0
+        return (self.datadict.nrecords() or 0) - self.nrecords_written
+
+    def _flush_due(self) -> bool:
+        pending = self._pending_records()
+        if pending == 0:
+            return False
+        if self.flush_interval is not None and \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            return True
+        if self.streaming or self.flush_interval is not None:
+            return pending >= self.buffer_size
+        return True
+
+    def _write(self, datadict: DataDict, append_mode: AppendMode) -> None:
+        if self._file is not None:
+            datadict_to_h5file(self._file, datadict,
+                               groupname=self.groupname,
+                               append_mode=append_mode,
+                               expected_nrecords=self.expected_nrecords)
+        else:
+            datadict_to_hdf5(datadict, str(self.filepath),
                              groupname=self.groupname,
-                             file_timeout=self.file_timeout)
+                             append_mode=append_mode,
+                             file_timeout=self.file_timeout,
+                             expected_nrecords=self.expected_nrecords)
 
-            assert self.filepath is not None
-            with FileOpener(self.filepath, 'a', timeout=self.file_timeout) as f:
-                add_cur_time_attr(f, name='last_change')
-                add_cur_time_attr(f[self.groupname], name='last_change')
+    def _empty_buffer(self) -> DataDict:
+        return self.datadict._build_structure(same_type=True)
 
+    def _stamp_last_change(self) -> None:
+        if self._file is not None:
+            add_cur_time_attr(self._file, name='last_change')
+            add_cur_time_attr(self._file[self.groupname], name='last_change')
+            self._file.flush()
+            return
+
+        assert self.filepath is not None
+        with FileOpener(self.filepath, 'a', timeout=self.file_timeout) as f:
+            add_cur_time_attr(f, name='last_change')
+            add_cur_time_attr(f[self.groupname], name='last_change')
 
     # convenience methods for saving things in the same directory as the ddh5 file
 
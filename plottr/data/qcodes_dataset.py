@@ -3,12 +3,17 @@ qcodes_dataset.py
 
 Dealing with qcodes dataset (the database) data in plottr.
 """
+import io
 import os
 import sys
+import sqlite3
+import threading
+from collections import OrderedDict
 from contextlib import closing
 from datetime import datetime
 from itertools import chain
 from operator import attrgetter
+from pathlib import Path
 from typing import Dict, List, Set, Union, TYPE_CHECKING, Any, Tuple, Optional, cast
 
 from typing_extensions import TypedDict
@@ -20,7 +25,10 @@ from qcodes.dataset.experiment_container import experiments
 from qcodes.dataset.sqlite.database import conn_from_dbpath_or_conn, initialise_or_create_database_at
 from qcodes.dataset.sqlite.queries import get_last_run
 
+import numpy as np
+
 from .datadict import DataDictBase, DataDict, combine_datadicts
+from ..utils import num
 from ..node.node import Node, updateOption
 
 __author__ = 'Wolfgang Pfaff'
@@ -320,10 +328,202 @@ def get_runs_from_db_fast(path: str,
 
 # Extracting data
 
+#: Values of the parameters of a dataset, in the format of
+#: ``DataSet.cache.data()``: for each dependent, a dictionary with the
+#: values of the dependent and its setpoints.
+ParameterData = Dict[str, Dict[str, np.ndarray]]
+
+
+def _cached_parameter_data(ds: 'DataSetProtocol') -> ParameterData:
+    if hasattr(ds, 'cache'):
+        return ds.cache.data()
+    # qcodes < 0.17
+    return ds.get_parameter_data()
+
+
+def _npy_blobs_to_array(blobs: List[bytes]) -> Optional[np.ndarray]:
+    """Decode values that qcodes stored as ``.npy`` blobs (``array`` and
+    ``complex`` parameters) into one array of shape ``(len(blobs), ...)``.
+
+    All blobs must have the same header (i.e., dtype and shape). The header
+    is parsed once; the data of all blobs is then copied into the
+    pre-allocated result in one go. Returns ``None`` if the blobs can't be
+    decoded that way.
+    """
+    if len(blobs) == 0 or not isinstance(blobs[0], bytes):
+        return None
+    # the first blob gives dtype and shape (for any version of the format);
+    # the header is what comes before the data.
+    try:
+        first = np.lib.format.read_array(io.BytesIO(blobs[0]), allow_pickle=False)
+    except (ValueError, OSError):
+        return None
+    if first.ndim > 1 and not first.flags.c_contiguous:
+        return None
+    dtype, shape = first.dtype, first.shape
+
+    n = len(blobs)
+    hdrlen = len(blobs[0]) - first.nbytes
+    nbytes = len(blobs[0])
+    ret = np.empty((n,) + tuple(shape), dtype=dtype)
+    try:
+        if any(len(blob) != nbytes for blob in blobs):
+            return None
+        raw = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(n, nbytes)
+    except TypeError:
+        return None
+    if not np.all(raw[:, :hdrlen] == raw[0, :hdrlen]):
+        return None
+    if ret.size > 0:
+        ret.reshape(n, -1).view(np.uint8)[:] = raw[:, hdrlen:]
+    return ret
+
+
+def _read_numeric_column(conn: sqlite3.Connection, table: str, name: str,
+                         where: str, params: Tuple[Any, ...]) -> np.ndarray:
+    """Read the values of a ``numeric`` column in one query.
+
+    qcodes converts ``numeric`` values from their SQLite text representation
+    (see ``qcodes.dataset.sqlite.database._convert_numeric``). To get the
+    same values, SQLite converts the column to text, and joins it into a
+    single string, which numpy then parses at once. Missing values are
+    ``nan``. Like ``DataSet.get_parameter_data``, the values are always
+    floats, also if they are all integers.
+    """
+    (text,) = conn.execute(
+        f"SELECT group_concat(COALESCE(CAST(\"{name}\" AS TEXT), 'nan'), ',') "
+        f'FROM (SELECT "{name}" FROM "{table}" {where} ORDER BY rowid)',
+        params).fetchone()
+    if text is None:
+        return np.array([])
+    return np.array(text.split(','), dtype=float)
+
+
+def _pad_to_shape(vals: np.ndarray, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+    """Reshape values to ``shape``, padding with ``nan`` like the qcodes cache
+    does for datasets with known shapes. ``None`` if the values don't fit."""
+    size = int(np.prod(shape))
+    if vals.size > size or (vals.size < size and vals.dtype.kind not in 'fc'):
+        return None
+    ret = np.full(size, np.nan, dtype=vals.dtype)
+    ret[:vals.size] = vals.reshape(-1)
+    return ret.reshape(shape)
+
+
+def _reshape_datadict(data: DataDict, shapes: Dict[str, Any]) -> Optional[DataDict]:
+    """Reshape (and pad) the dependents in ``shapes``, and their axes, of
+    data read without shapes (see :func:`_pad_to_shape`).
+
+    :returns: A shallow copy of the data with the reshaped values. ``None``
+        if the values don't fit the shapes, or an axis is shared by
+        dependents of different shapes.
+    """
+    ret = data.copy(deep=False)
+    reshaped: Dict[str, Tuple[int, ...]] = {}
+    for d in data.dependents():
+        if d not in shapes:
+            continue
+        shape = tuple(shapes[d])
+        for field in [d] + data.axes(d):
+            if field in reshaped:
+                if reshaped[field] != shape:
+                    return None
+                continue
+            vals = _pad_to_shape(np.asarray(data.data_vals(field)), shape)
+            if vals is None:
+                return None
+            ret[field]['values'] = vals
+            reshaped[field] = shape
+    return ret
+
+
+def read_parameter_data_from_db(ds: 'DataSetProtocol', after_rowid: int = 0,
+                                reshape: bool = True) \
+        -> Optional[Tuple[ParameterData, int]]:
+    """Read the values of a dataset directly from the results table of its
+    database file, bypassing the qcodes dataset cache.
+
+    The values are read column by column: ``numeric`` values in one query,
+    as text that is parsed into a float array at once (see
+    :func:`_read_numeric_column`); ``array`` and ``complex`` values (stored
+    as ``.npy`` blobs) are decoded into one pre-allocated array per column
+    (see :func:`_npy_blobs_to_array`).
+
+    :param ds: qcodes dataset.
+    :param after_rowid: Only read rows of the results table with a larger
+        rowid, e.g., the rowid returned by a previous call.
+    :param reshape: If ``True`` and the dataset specifies shapes, reshape
+        (and pad with ``nan``) the values to these, like the qcodes cache does.
+    :returns: The parameter data in the format of ``DataSet.cache.data()``,
+        and the largest rowid that has been considered. ``None`` if the data
+        can't be read this way (e.g., for ``text`` parameters, arrays of
+        different sizes, or if there's no results table); use the cache then.
+    """
+    path = getattr(ds, 'path_to_db', None)
+    table = getattr(ds, 'table_name', None)
+    if path is None or table is None or not os.path.exists(path):
+        return None
+
+    trees = {p: [p] + list(spec.depends_on_) for p, spec in ds.paramspecs.items()
+             if spec.depends_on != ''}
+    for names in trees.values():
+        types = set(ds.paramspecs[n].type for n in names)
+        if not (types <= {'numeric', 'complex'} or types == {'array'}):
+            return None
+    shapes = getattr(ds.description, 'shapes', None) if reshape else None
+
+    pdata: ParameterData = {}
+    try:
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as conn:
+            last_rowid = conn.execute(
+                f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+            for p, names in trees.items():
+                where = f'WHERE "{p}" IS NOT NULL AND rowid > ? AND rowid <= ?'
+                nrows = conn.execute(f'SELECT COUNT(*) FROM "{table}" {where}',
+                                     (after_rowid, last_rowid)).fetchone()[0]
+                pdata[p] = {}
+                for name in names:
+                    vals: Optional[np.ndarray]
+                    if nrows == 0:
+                        vals = np.array([])
+                    elif ds.paramspecs[name].type == 'numeric':
+                        vals = _read_numeric_column(conn, table, name, where,
+                                                    (after_rowid, last_rowid))
+                    else:
+                        cursor = conn.execute(
+                            f'SELECT "{name}" FROM "{table}" {where} ORDER BY rowid',
+                            (after_rowid, last_rowid))
+                        vals = _npy_blobs_to_array([row[0] for row in cursor])
+                        if vals is not None and ds.paramspecs[name].type == 'complex':
+                            vals = vals.reshape(nrows) if vals.size == nrows else None
+                    if vals is None:
+                        return None
+                    pdata[p][name] = vals
+    except (sqlite3.Error, TypeError, ValueError):
+        return None
+
+    if shapes is not None:
+        for p, values in pdata.items():
+            if p not in shapes:
+                continue
+            for name, vals in values.items():
+                padded = _pad_to_shape(vals, tuple(shapes[p]))
+                if padded is None:
+                    return None
+                values[name] = padded
+
+    return pdata, last_rowid
+
+
 def ds_to_datadicts(ds: 'DataSetProtocol') -> Dict[str, DataDict]:
     """
     Make DataDicts from a qcodes DataSet.
 
+    The values are read directly from the database file where possible
+    (see :func:`read_parameter_data_from_db`), and from the dataset cache
+    otherwise.
+
     Parameters whose values are not present in the dataset's cache (e.g.,
     when the underlying ``.nc`` file is missing or the dataset is metadata
     only) are skipped rather than raising ``KeyError``.  This lets callers
@@ -335,13 +535,23 @@ def ds_to_datadicts(ds: 'DataSetProtocol') -> Dict[str, DataDict]:
               key: name of the dependent
               value: DataDict containing that dependent and its axes.
     """
-    ret: Dict[str, DataDict] = {}
-    has_cache = hasattr(ds, 'cache')
-    if has_cache:
-        pdata = ds.cache.data()
+    from_db = read_parameter_data_from_db(ds)
+    if from_db is not None and any(v[p].size > 0 for p, v in from_db[0].items()):
+        pdata = from_db[0]
     else:
-        # qcodes < 0.17
-        pdata = ds.get_parameter_data()
+        pdata = _cached_parameter_data(ds)
+    return parameter_data_to_datadicts(ds, pdata)
+
+
+def parameter_data_to_datadicts(ds: 'DataSetProtocol',
+                                pdata: ParameterData) -> Dict[str, DataDict]:
+    """Make DataDicts from the parameter data of a qcodes DataSet.
+
+    :param ds: qcodes dataset; used for the parameter specs.
+    :param pdata: parameter data, see :data:`ParameterData`.
+    :returns: see :func:`ds_to_datadicts`.
+    """
+    ret: Dict[str, DataDict] = {}
     for p, spec in ds.paramspecs.items():
         if spec.depends_on == '':
             continue
@@ -368,13 +578,174 @@ def ds_to_datadicts(ds: 'DataSetProtocol') -> Dict[str, DataDict]:
 
 def ds_to_datadict(ds: 'DataSetProtocol') -> DataDictBase:
     ddicts = ds_to_datadicts(ds)
-    ddict = combine_datadicts(*[v for k, v in ddicts.items()])
+    ddict = combine_datadicts(*[v for k, v in ddicts.items()], copy=False)
     return ddict
 
 
+def _load_datadict(ds: 'DataSetProtocol', reshape: bool = True) \
+        -> Tuple[DataDictBase, Optional[int]]:
+    """Load all data of a dataset.
+
+    :param reshape: If ``False``, don't reshape the values read from the
+        database to the shapes of the dataset (see
+        :func:`read_parameter_data_from_db`). Values from the dataset cache
+        are always shaped.
+    :returns: The data, and the last row of the results table that is
+        contained in it (``None`` if the data was not read from the
+        database directly).
+    """
+    lastRowId = None
+    from_db = read_parameter_data_from_db(ds, reshape=reshape)
+    if from_db is not None and any(v[p].size > 0 for p, v in from_db[0].items()):
+        pdata, lastRowId = from_db
+    else:
+        pdata = _cached_parameter_data(ds)
+    data = combine_datadicts(*parameter_data_to_datadicts(ds, pdata).values(),
+                             copy=False)
+    return data, lastRowId
+
+
+### cache of loaded data
+
+class LoadedDataCache:
+    """Thread-safe LRU cache of data loaded from qcodes datasets.
+
+    Entries are keyed by database path and run ID. The cache is bounded by
+    the total size of the data values (``max_bytes``); the least recently
+    used entries are dropped when it is exceeded. Each entry remembers the
+    number of results the dataset had when it was loaded, so that data of
+    datasets that have grown since is not used.
+
+    The data is stored and returned as shallow copies, so the entries are not
+    affected by modifications of the data fields of the returned data.
+    """
+
+    def __init__(self, max_bytes: int = 2**30):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Tuple[str, int], Tuple[DataDictBase, int, Optional[int], int]] \
+            = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path: str, runId: int) -> Tuple[str, int]:
+        return os.path.abspath(path), int(runId)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached data values."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pathAndId: Tuple[str, int]) -> bool:
+        with self._lock:
+            return self._key(*pathAndId) in self._entries
+
+    def get(self, path: str, runId: int, nresults: Optional[int] = None) \
+            -> Optional[Tuple[DataDictBase, Optional[int]]]:
+        """Get cached data.
+
+        :param path: Path of the database.
+        :param runId: Run ID of the dataset.
+        :param nresults: If not ``None``, only return data that was loaded
+            when the dataset had this number of results.
+        :returns: ``None`` if there is no (matching) entry, otherwise the
+            data and the last row of the results table contained in it (see
+            :meth:`put`).
+        """
+        key = self._key(path, runId)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (nresults is not None and entry[1] != nresults):
+                return None
+            self._entries.move_to_end(key)
+            return entry[0].copy(deep=False), entry[2]
+
+    def put(self, path: str, runId: int, data: DataDictBase, nresults: int,
+            lastRowId: Optional[int] = None) -> None:
+        """Add data to the cache, replacing an existing entry.
+
+        Data that is larger than the cache is not added.
+
+        :param path: Path of the database.
+        :param runId: Run ID of the dataset.
+        :param data: Data loaded from the dataset.
+        :param nresults: Number of results of the dataset before loading.
+        :param lastRowId: Last row of the results table contained in the data,
+            if read from the database directly.
+        """
+        key = self._key(path, runId)
+        nbytes = data.nbytes() or 0
+        data = data.copy(deep=False)
+        with self._lock:
+            self._remove(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (data, nresults, lastRowId, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[3]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+#: Data loaded from qcodes datasets, shared by the loader nodes and the
+#: inspectr.
+loaded_data_cache = LoadedDataCache()
+
+
+def _estimate_nbytes(ds: 'DataSetProtocol', nresults: int) -> int:
+    """Estimate the size of the data values of a dataset without loading
+    them: one value per result and parameter, of 16 bytes for complex and 8
+    bytes for other parameters."""
+    return sum(nresults * (16 if spec.type == 'complex' else 8)
+               for spec in ds.paramspecs.values())
+
+
+def cache_dataset(path: str, runId: int) -> None:
+    """Load the data of a dataset into :data:`loaded_data_cache`, unless
+    it is cached already, or its estimated size exceeds the size of the
+    cache.
+
+    Can be called from a thread other than the one using the data.
+    """
+    if (path, runId) in loaded_data_cache:
+        return
+    ds = load_dataset_from(path, runId, read_only=True)
+    nresults = ds.number_of_results
+    if _estimate_nbytes(ds, nresults) > loaded_data_cache.max_bytes:
+        return
+    data, lastRowId = _load_datadict(ds)
+    loaded_data_cache.put(path, runId, data, nresults, lastRowId)
+
+
 ### qcodes dataset loader node
 
 class QCodesDSLoader(Node):
+    """Node that loads a qcodes dataset.
+
+    The data is loaded fully the first time (or taken from
+    :data:`loaded_data_cache`, if the dataset has not changed since it was
+    cached; fully loaded data is added to the cache). On later updates, only the
+    records that are new in the database (or, if the data can't be read
+    from the database directly, in the dataset cache) are appended to the
+    data loaded before, as long as they fit its structure; otherwise the data
+    is loaded fully again. For datasets with known shapes, the records read
+    from the database are kept as they are, and reshaped (and padded) to the
+    shapes for the output; data from the dataset cache (which is
+    pre-allocated to the shapes) is always loaded fully.
+    """
+
     nodeName = 'QCodesDSLoader'
     uiClass = None
     useUi = False
@@ -384,6 +755,12 @@ class QCodesDSLoader(Node):
         self.nLoadedRecords = 0
         self._dataset: Optional[DataSetProtocol] = None
 
+        #: data loaded so far, if new records can be appended to it (not
+        #: reshaped to the shapes of the dataset).
+        self._data: Optional[DataDict] = None
+        #: last row of the results table in the data, if read from the database.
+        self._lastRowId: Optional[int] = None
+
         super().__init__(*arg, **kw)
 
     ### Properties
@@ -399,6 +776,100 @@ class QCodesDSLoader(Node):
             self._pathAndId = val
             self.nLoadedRecords = 0
             self._dataset = None
+            self._data = None
+            self._lastRowId = None
+
+    def _loadData(self, nresults: int) -> DataDictBase:
+        """Load all data of the dataset (which has ``nresults`` results), and
+        keep it if new records can be appended to it later."""
+        assert self._dataset is not None
+        self._data = None
+        self._lastRowId = None
+
+        shapes = getattr(self._dataset.description, "shapes", None)
+        path, runId = cast(Tuple[str, int], self._pathAndId)
+        cached = loaded_data_cache.get(path, runId, nresults)
+        if cached is not None:
+            data, lastRowId = cached
+            # cached data with shapes has been reshaped already.
+            if isinstance(data, DataDict) and shapes is None:
+                self._data = data
+                self._lastRowId = lastRowId
+            return data
+
+        data, lastRowId = _load_datadict(self._dataset, reshape=shapes is None)
+        if shapes is None:
+            if isinstance(data, DataDict):
+                self._data = data
+                self._lastRowId = lastRowId
+        elif lastRowId is not None:
+            # read from the database without shapes: keep that, and output
+            # the reshaped data.
+            shaped = _reshape_datadict(data, shapes) \
+                if isinstance(data, DataDict) else None
+            if shaped is not None:
+                self._data = cast(DataDict, data)
+                self._lastRowId = lastRowId
+                data = shaped
+            else:
+                data, lastRowId = _load_datadict(self._dataset)
+        loaded_data_cache.put(path, runId, data, nresults, lastRowId)
+        return data
+
+    def _appendNewData(self) -> Optional[DataDict]:
+        """Append the records that are new in the database (or dataset
+        cache) to the data loaded before.
+
+        :returns: The data (reshaped, if the dataset has shapes), or ``None``
+            if the new data does not fit the structure of the loaded data.
+        """
+        assert self._dataset is not None and self._data is not None
+        lastRowId = self._lastRowId
+        if lastRowId is not None:
+            from_db = read_parameter_data_from_db(
+                self._dataset, after_rowid=lastRowId, reshape=False)
+            if from_db is None:
+                return None
+            pdata, lastRowId = from_db
+            nloaded = 0
+        elif hasattr(self._dataset, 'cache'):
+            pdata = self._dataset.cache.data()
+            nrecords = self._data.nrecords()
+            assert nrecords is not None
+            nloaded = nrecords
+        else:
+            return None
+
+        newvals: Dict[str, np.ndarray] = {}
+        for p in self._data.dependents():
+            if p not in pdata:
+                return None
+            names = [p] + list(self._dataset.paramspecs[p].depends_on_)
+            fields = [p] + self._data.axes(p)
+            if len(names) != len(fields) or any(n not in pdata[p] for n in names):
+                return None
+
+            for name, field in zip(names, fields):
+                vals = np.asarray(pdata[p][name])[nloaded:]
+                # axes shared between dependents must be identical.
+                if field in newvals:
+                    if not num.arrays_equal(newvals[field], vals):
+                        return None
+                else:
+                    newvals[field] = vals
+
+        if set(newvals.keys()) != set(k for k, _ in self._data.data_items()) \
+                or len(set(len(v) for v in newvals.values())) != 1:
+            return None
+
+        if len(next(iter(newvals.values()))) > 0:
+            self._data.add_data(**newvals)
+        self._lastRowId = lastRowId
+
+        shapes = getattr(self._dataset.description, "shapes", None)
+        if shapes is not None:
+            return _reshape_datadict(self._data, shapes)
+        return self._data
 
     def process(self, dataIn: Optional[DataDictBase] = None) -> Optional[Dict[str, Any]]:
         if dataIn is not None:
@@ -409,7 +880,8 @@ class QCodesDSLoader(Node):
             if self._dataset is None:
                 self._dataset = load_dataset_from(path, runId, read_only=True)
 
-            if self._dataset.number_of_results > self.nLoadedRecords:
+            nresults = self._dataset.number_of_results
+            if nresults > self.nLoadedRecords:
 
                 guid = self._dataset.guid
 
@@ -429,7 +901,15 @@ class QCodesDSLoader(Node):
 Finished: {completed_timestamp}
 DB-File [ID]: {path} [{runId}]"""
 
-                data = ds_to_datadict(self._dataset)
+                data: Optional[DataDictBase] = None
+                if self._data is not None:
+                    data = self._appendNewData()
+                if data is None:
+                    data = self._loadData(nresults)
+
+                # emit a shallow copy, so downstream nodes can't modify the
+                # data we keep around.
+                data = data.copy(deep=False)
 
                 data.add_meta('qcodes_experiment_name', experiment_name)
                 data.add_meta('qcodes_sample_name', sample_name)
@@ -446,7 +926,7 @@ DB-File [ID]: {path} [{runId}]"""
                 qcodes_shape = getattr(self._dataset.description, "shapes", None)
                 data.add_meta('qcodes_shape', qcodes_shape)
 
-                self.nLoadedRecords = self._dataset.number_of_results
+                self.nLoadedRecords = nresults
 
                 return dict(dataOut=data)
 
@@ -0,0 +1,235 @@
+"""
+plottr.data.qcodes_run_catalogue -- persistent catalogue of the runs in
+QCoDeS databases.
+
+Building the overview of a database with :func:`get_db_overview` queries all
+runs, and counts the rows of the results table of each run. For databases
+with many runs this is slow, and it is repeated on each refresh.
+:class:`RunCatalogue` keeps the overview in a separate SQLite file instead.
+Each database in the catalogue is identified by its path, and the catalogue
+is only updated when the database file has changed since. Updating then only
+reads the runs that are new or were not completed yet (plus the tags of all
+runs, which may change at any time). The catalogue has indexes on date,
+experiment, sample and tag, such that filtering runs is fast.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
+
+from .. import configPaths
+from .qcodes_db_overview import get_db_overview
+
+#: Version of the catalogue layout. Catalogues with a different version are
+#: rebuilt.
+SCHEMA_VERSION = 1
+
+#: Columns of the catalogued runs, as in the overview dicts returned by
+#: :func:`get_db_overview`, plus the inspectr tag (empty for runs without tag).
+RUN_COLUMNS = ('run_id', 'experiment', 'sample', 'name',
+               'started_date', 'started_time',
+               'completed_date', 'completed_time',
+               'records', 'guid', 'inspectr_tag')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS databases (
+    db_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    stamp TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    db_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    experiment TEXT,
+    sample TEXT,
+    name TEXT,
+    started_date TEXT,
+    started_time TEXT,
+    completed_date TEXT,
+    completed_time TEXT,
+    records INTEGER,
+    guid TEXT,
+    inspectr_tag TEXT,
+    PRIMARY KEY (db_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS runs_started_date ON runs (db_id, started_date);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (db_id, experiment);
+CREATE INDEX IF NOT EXISTS runs_sample ON runs (db_id, sample);
+CREATE INDEX IF NOT EXISTS runs_tag ON runs (db_id, inspectr_tag);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def default_catalogue_path() -> str:
+    """Location of the catalogue used by default (in the user's plottr
+    config directory, see :func:`plottr.configPaths`)."""
+    return os.path.join(configPaths()[1], 'run_catalogue.sqlite')
+
+
+def _db_stamp(path: str) -> str:
+    """Identifies the state of a database file: modification times and sizes
+    of the file and of its write-ahead log."""
+    parts = []
+    for p in (path, path + '-wal'):
+        if os.path.exists(p):
+            st = os.stat(p)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+    return '|'.join(parts)
+
+
+def _read_tags(path: str) -> Dict[int, str]:
+    """Get the inspectr tags of all runs in a database (empty for runs
+    without tag)."""
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(runs)")]
+        tag = "COALESCE(inspectr_tag, '')" if 'inspectr_tag' in columns else "''"
+        return dict(conn.execute(f"SELECT run_id, {tag} FROM runs"))
+
+
+class RunCatalogue:
+    """Catalogue of the runs in QCoDeS databases, kept in an SQLite file.
+
+    Each operation opens its own connection to the catalogue, so a catalogue
+    can be used from different threads.
+
+    :param path: Path of the catalogue file. It is created if it doesn't
+        exist. If ``None``, :func:`default_catalogue_path` is used.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = default_catalogue_path()
+        self.path = path
+
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        with closing(self._connect()) as conn:
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS runs; "
+                                   "DROP TABLE IF EXISTS databases;")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _db_id(conn: sqlite3.Connection, dbPath: str) -> Optional[int]:
+        row = conn.execute("SELECT db_id FROM databases WHERE path = ?",
+                           (os.path.abspath(dbPath),)).fetchone()
+        return None if row is None else row[0]
+
+    def update(self, dbPath: str) -> bool:
+        """Update the catalogue of a database, if the database has changed
+        since it was last catalogued.
+
+        :param dbPath: Path of the database.
+        :returns: ``True`` if the catalogue was updated.
+        """
+        dbPath = os.path.abspath(dbPath)
+        if not os.path.exists(dbPath):
+            raise FileNotFoundError(f"Database {dbPath} does not exist.")
+        stamp = _db_stamp(dbPath)
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT db_id, stamp FROM databases WHERE path = ?",
+                               (dbPath,)).fetchone()
+            if row is not None and row[1] == stamp:
+                return False
+
+            if row is None:
+                db_id = conn.execute("INSERT INTO databases (path) VALUES (?)",
+                                     (dbPath,)).lastrowid
+                start = 0
+            else:
+                # runs that are new, or not completed, need to be read again.
+                db_id = row[0]
+                (start,) = conn.execute(
+                    "SELECT MIN(run_id) - 1 FROM runs "
+                    "WHERE db_id = ? AND completed_date = ''",
+                    (db_id,)).fetchone()
+                if start is None:
+                    (start,) = conn.execute(
+                        "SELECT COALESCE(MAX(run_id), 0) FROM runs WHERE db_id = ?",
+                        (db_id,)).fetchone()
+
+            overview = get_db_overview(dbPath, start_run_id=start,
+                                       extra_columns=['inspectr_tag'])
+            conn.executemany(
+                f"INSERT OR REPLACE INTO runs (db_id, {', '.join(RUN_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(RUN_COLUMNS))})",
+                [(db_id,) + tuple(entry.get(c) for c in RUN_COLUMNS[:-1])
+                 + (entry.get('inspectr_tag') or '',)
+                 for entry in overview.values()])
+
+            # tags can be changed, and runs deleted, at any time.
+            tags = _read_tags(dbPath)
+            catalogued = dict(conn.execute(
+                "SELECT run_id, inspectr_tag FROM runs WHERE db_id = ?", (db_id,)))
+            conn.executemany(
+                "DELETE FROM runs WHERE db_id = ? AND run_id = ?",
+                [(db_id, r) for r in catalogued if r not in tags])
+            conn.executemany(
+                "UPDATE runs SET inspectr_tag = ? WHERE db_id = ? AND run_id = ?",
+                [(t, db_id, r) for r, t in tags.items()
+                 if r in catalogued and catalogued[r] != t])
+
+            conn.execute("UPDATE databases SET stamp = ? WHERE db_id = ?",
+                         (stamp, db_id))
+        return True
+
+    def runs(self, dbPath: str,
+             dates: Optional[Sequence[str]] = None,
+             experiment: Optional[str] = None,
+             sample: Optional[str] = None,
+             tag: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+        """Get the catalogued runs of a database, optionally filtered.
+
+        :param dbPath: Path of the database.
+        :param dates: Only return runs started on one of these dates
+            (``YYYY-MM-DD``).
+        :param experiment: Only return runs of this experiment.
+        :param sample: Only return runs of this sample.
+        :param tag: Only return runs with this inspectr tag (``''`` for runs
+            without tag).
+        :returns: Dictionary mapping run ID to an overview of the run, with
+            the keys in :data:`RUN_COLUMNS`, in order of run ID.
+        """
+        conditions = ["db_id = ?"]
+        params: List[Any] = []
+        if dates is not None:
+            conditions.append(f"started_date IN ({', '.join('?' * len(dates))})")
+            params += list(dates)
+        for column, value in (('experiment', experiment), ('sample', sample),
+                              ('inspectr_tag', tag)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        with closing(self._connect()) as conn:
+            db_id = self._db_id(conn, dbPath)
+            if db_id is None:
+                return {}
+            rows = conn.execute(
+                f"SELECT {', '.join(RUN_COLUMNS)} FROM runs "
+                f"WHERE {' AND '.join(conditions)} ORDER BY run_id",
+                [db_id] + params).fetchall()
+        return {row[0]: dict(zip(RUN_COLUMNS, row)) for row in rows}
+
+    def dates(self, dbPath: str) -> List[str]:
+        """Get the (sorted) dates on which runs in a database were started."""
+        with closing(self._connect()) as conn:
+            db_id = self._db_id(conn, dbPath)
+            if db_id is None:
+                return []
+            return [r[0] for r in conn.execute(
+                "SELECT DISTINCT started_date FROM runs WHERE db_id = ? "
+                "ORDER BY started_date", (db_id,))]
+
+    def remove(self, dbPath: str) -> None:
+        """Remove a database from the catalogue."""
+        with closing(self._connect()) as conn, conn:
+            db_id = self._db_id(conn, dbPath)
+            if db_id is not None:
+                conn.execute("DELETE FROM runs WHERE db_id = ?", (db_id,))
+                conn.execute("DELETE FROM databases WHERE db_id = ?", (db_id,))
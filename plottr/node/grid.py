@@ -9,11 +9,14 @@ from typing import Tuple, Dict, Any, List, Optional, Sequence, cast
 
 from typing_extensions import TypedDict
 
+import numpy as np
+
 from plottr import Signal, Slot, QtWidgets
 from .node import Node, NodeWidget, updateOption, updateGuiFromNode
 from ..data import datadict as dd
 from ..data.datadict import DataDict, MeshgridDataDict, DataDictBase, GriddingError
 from plottr.icons import get_gridIcon
+from ..utils import num
 
 __author__ = 'Wolfgang Pfaff'
 __license__ = 'MIT'
@@ -364,6 +367,15 @@ class DataGridder(Node[DataGridderNodeWidget]):
         self._shape = None
         self._invalid = False
 
+        #: shape guessers for the axes of the data, kept across updates such
+        #: that only new data needs to be analyzed when guessing the shape.
+        self._shapeGuessers: Dict[Tuple[str, ...], num.SweepGridGuesser] = {}
+
+        self._reuseBuffers = False
+        #: arrays holding the gridded values, by field name; re-used across
+        #: updates if :attr:`reuseBuffers` is ``True``.
+        self._meshgridBuffers: Dict[str, np.ndarray] = {}
+
         super().__init__(name)
 
     # Properties
@@ -441,6 +453,24 @@ class DataGridder(Node[DataGridderNodeWidget]):
 
         self._grid = method, opts
 
+    @property
+    def reuseBuffers(self) -> bool:
+        """If ``True``, keep the arrays that hold gridded values, and write
+        the values of the next update into them when the grid shape (and
+        dtype) has not changed; arrays are only allocated when that changes.
+        The input data is then also not copied before gridding.
+        Saves allocating and copying memory on every update of live data,
+        but overwrites the values of the data returned previously.
+        """
+        return self._reuseBuffers
+
+    @reuseBuffers.setter
+    @updateOption('reuseBuffers')
+    def reuseBuffers(self, val: bool) -> None:
+        self._reuseBuffers = val
+        if not val:
+            self._meshgridBuffers = {}
+
     # Processing
 
     def validateOptions(self, data: Any) -> bool:
@@ -470,11 +500,22 @@ class DataGridder(Node[DataGridderNodeWidget]):
             return None
         dataout = data['dataOut']
         assert dataout is not None
-        data = dataout.copy()
+        method, opts = self._grid
+
+        # when gridding into our own buffers, the values are copied into them
+        # anyway, and we don't need to copy the input beforehand.
+        buffers: Optional[Dict[str, np.ndarray]] = None
+        if self._reuseBuffers and isinstance(dataout, DataDict) \
+                and method is not GridOption.noGrid:
+            buffers = self._meshgridBuffers
+            data = dataout
+        else:
+            data = dataout.copy()
+        copy = buffers is not None
+
         self.axesList.emit(data.axes())
 
         dout: Optional[DataDictBase] = None
-        method, opts = self._grid
         order = opts.get('order', data.axes())
 
         if isinstance(data, DataDict):
@@ -482,18 +523,20 @@ class DataGridder(Node[DataGridderNodeWidget]):
                 if method is GridOption.noGrid:
                     dout = data.expand()
                 elif method is GridOption.guessShape:
-                    dout = dd.datadict_to_meshgrid(data, copy=False)
+                    dout = dd.datadict_to_meshgrid(
+                        data, copy=copy, shape_guessers=self._shapeGuessers,
+                        out=buffers)
                 elif method is GridOption.specifyShape:
                     dout = dd.datadict_to_meshgrid(
                         data, target_shape=opts['shape'],
                         inner_axis_order=order,
-                        copy=False,
+                        copy=copy, out=buffers,
                     )
                 elif method is GridOption.metadataShape:
                     try:
                         dout = dd.datadict_to_meshgrid(
                             data, use_existing_shape=True,
-                            copy=False,
+                            copy=copy, out=buffers,
                         )
                     except ValueError as err:
                         if "Malformed data" in str(err):
@@ -501,11 +544,14 @@ class DataGridder(Node[DataGridderNodeWidget]):
                                 "Shape/Setpoint order does"
                                 " not match data. Falling back to guessing shape"
                                 )
-                            dout = dd.datadict_to_meshgrid(data, copy=False)
+                            dout = dd.datadict_to_meshgrid(
+                                data, copy=copy,
+                                shape_guessers=self._shapeGuessers,
+                                out=buffers)
                         else:
                             raise err
             except GriddingError:
-                dout = data.expand()
+                dout = data.copy().expand() if copy else data.expand()
                 self.node_logger.info("data could not be gridded. Falling back "
                                    "to no grid")
                 if self.ui is not None:
@@ -0,0 +1,291 @@
+"""
+``plottr.plot.decimation`` -- Level-of-detail tools for plotting large data.
+
+Drawing a trace with many more points than the plot has pixels is slow, and
+doesn't show more than a reduced version of the trace would. The tools here
+reduce data to what can be shown at the current view range and resolution.
+They are independent of the plotting backend; the backends use them to
+update their plot items when the view changes.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+#: Traces with up to this many points are plotted without decimation.
+DECIMATE_ABOVE = 100_000
+
+#: Images with up to this many pixels are plotted at full resolution.
+IMAGE_DECIMATE_ABOVE = 2 ** 22
+
+
+class LinePyramid:
+    """Multi-resolution min/max envelope of a 1d trace ``y(x)``.
+
+    On construction, the trace is divided into blocks of ``minBlock`` points,
+    and the positions of the minimum and maximum of each block are stored.
+    Each coarser level combines ``factor`` blocks of the level below.
+    :meth:`decimate` then picks the level that fits the requested resolution,
+    such that the cost of a query only depends on the number of pixels, not
+    on the length of the trace.
+
+    The envelope contains the points at the minima and maxima, in their
+    original order; that way, peaks are always preserved. Decimation requires
+    ``x`` to be monotonic. Otherwise (and for short traces) the full data is
+    returned.
+
+    :param x: x values. Points where ``x`` is invalid are not plotted.
+    :param y: y values.
+    :param minBlock: number of points in the blocks of the finest level.
+    :param factor: number of blocks of a level combined in the next level.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray,
+                 minBlock: int = 4, factor: int = 4):
+        x = np.ma.filled(np.ma.asarray(x, dtype=float), np.nan).ravel()
+        y = np.ma.filled(np.ma.asarray(y, dtype=float), np.nan).ravel()
+        if x.size != y.size:
+            raise ValueError('x and y need to have the same number of points.')
+        valid = np.isfinite(x)
+        if not valid.all():
+            x, y = x[valid], y[valid]
+
+        self.minBlock = minBlock
+        self.factor = factor
+        self.levels: List[Tuple[np.ndarray, np.ndarray]] = []
+
+        dx: np.ndarray = np.diff(x)
+        if np.all(dx <= 0) and x.size > 1:
+            x, y = x[::-1], y[::-1]
+            dx = -dx[::-1]
+        self.x: np.ndarray = x
+        self.y: np.ndarray = y
+        self.monotonic = bool(np.all(dx >= 0))
+
+        if self.monotonic and x.size > 2 * minBlock:
+            self._build()
+
+        # points that have to be in any envelope to keep the data limits.
+        if x.size > 0:
+            anchors = [0, x.size - 1]
+            if np.isfinite(y).any():
+                anchors += [int(np.nanargmin(y)), int(np.nanargmax(y))]
+            self._anchors = np.unique(anchors)
+        else:
+            self._anchors = np.zeros(0, dtype=int)
+
+    def __len__(self) -> int:
+        return self.x.size
+
+    def _build(self) -> None:
+        n = self.y.size
+        nblocks = -(-n // self.minBlock)
+        npad = nblocks * self.minBlock - n
+
+        # invalid values are never the minimum or maximum of a block
+        # (unless all values in it are invalid).
+        ylo = np.where(np.isnan(self.y), np.inf, self.y)
+        yhi = np.where(np.isnan(self.y), -np.inf, self.y)
+        ylo = np.append(ylo, np.full(npad, np.inf)).reshape(nblocks, -1)
+        yhi = np.append(yhi, np.full(npad, -np.inf)).reshape(nblocks, -1)
+        offsets = np.arange(nblocks) * self.minBlock
+        imin = np.minimum(offsets + ylo.argmin(axis=1), n - 1)
+        imax = np.minimum(offsets + yhi.argmax(axis=1), n - 1)
+        ylo, yhi = ylo.ravel()[:n], yhi.ravel()[:n]
+        self.levels.append((imin, imax))
+
+        while imin.size > 1:
+            nblocks = -(-imin.size // self.factor)
+            npad = nblocks * self.factor - imin.size
+            imin = np.append(imin, np.full(npad, imin[-1])).reshape(nblocks, -1)
+            imax = np.append(imax, np.full(npad, imax[-1])).reshape(nblocks, -1)
+            rows = np.arange(nblocks)
+            imin = imin[rows, ylo[imin].argmin(axis=1)]
+            imax = imax[rows, yhi[imax].argmax(axis=1)]
+            self.levels.append((imin, imax))
+
+    def blockSize(self, level: int) -> int:
+        """Number of points per block in a level."""
+        return self.minBlock * self.factor ** level
+
+    def decimate(self, xmin: Optional[float] = None, xmax: Optional[float] = None,
+                 pixels: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the points to plot for a view range and resolution.
+
+        :param xmin: lower end of the visible x range. ``None`` for the
+            start of the data.
+        :param xmax: upper end of the visible x range. ``None`` for the
+            end of the data.
+        :param pixels: number of pixels the visible x range is shown on.
+        :returns: x and y values of the points to plot. There are between
+            2 and ``2 * factor`` points per pixel in the visible range
+            (unless the data is plotted in full there). Points just
+            outside the range, and the first, last, lowest and highest points
+            of the trace, are included as well, such that lines extend beyond
+            the view, and the data limits are the same as for the full trace.
+        """
+        if not self.levels:
+            return self.x, self.y
+
+        n = self.x.size
+        i0 = 0 if xmin is None else max(int(np.searchsorted(self.x, xmin)) - 1, 0)
+        i1 = n if xmax is None else min(int(np.searchsorted(self.x, xmax, 'right')) + 1, n)
+        if i1 <= i0:
+            return self.x[self._anchors], self.y[self._anchors]
+
+        pointsPerPixel = (i1 - i0) / max(pixels, 1)
+        level = int(np.floor(np.log(max(pointsPerPixel, 1) / self.minBlock)
+                             / np.log(self.factor)))
+        if level < 0:
+            idx = np.arange(i0, i1)
+        else:
+            level = min(level, len(self.levels) - 1)
+            bs = self.blockSize(level)
+            imin, imax = self.levels[level]
+            b0, b1 = i0 // bs, -(-i1 // bs)
+            imin, imax = imin[b0:b1], imax[b0:b1]
+            idx = np.column_stack([np.minimum(imin, imax),
+                                   np.maximum(imin, imax)]).ravel()
+
+        idx = np.union1d(idx, self._anchors)
+        return self.x[idx], self.y[idx]
+
+
+def block_reduce(arr: np.ndarray, factor: Tuple[int, int],
+                 reduce: str = 'mean') -> np.ndarray:
+    """Reduce the resolution of a 2d array by combining blocks of elements.
+
+    Invalid (NaN) elements are ignored; blocks with only invalid elements
+    give NaN. If the shape of the array is not a multiple of the block size,
+    the last blocks are smaller.
+
+    :param arr: the array.
+    :param factor: block size along the two axes.
+    :param reduce: ``'mean'`` or ``'max'``: how the elements of a block are
+        combined.
+    :returns: the reduced array.
+    """
+    f0, f1 = factor
+    if f0 == 1 and f1 == 1:
+        return arr
+    if reduce not in ('mean', 'max'):
+        raise ValueError(f"Unknown reduction '{reduce}'.")
+
+    n0, n1 = -(-arr.shape[0] // f0), -(-arr.shape[1] // f1)
+    if arr.shape != (n0 * f0, n1 * f1):
+        padded = np.full((n0 * f0, n1 * f1), np.nan)
+        padded[:arr.shape[0], :arr.shape[1]] = arr
+        arr = padded
+    blocks = arr.reshape(n0, f0, n1, f1)
+
+    # fast path without invalid values: NaNs propagate to the result.
+    # reducing one axis at a time is faster than both at once.
+    if reduce == 'mean':
+        ret = blocks.sum(axis=3).sum(axis=1) / (f0 * f1)
+    else:
+        ret = blocks.max(axis=3).max(axis=1)
+    if not np.isnan(ret).any():
+        return ret
+
+    invalid = np.isnan(blocks)
+    if reduce == 'mean':
+        count = (~invalid).sum(axis=(1, 3))
+        total = np.where(invalid, 0., blocks).sum(axis=(1, 3))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+    else:
+        ret = np.where(invalid, -np.inf, blocks).max(axis=(1, 3))
+        ret[ret == -np.inf] = np.nan
+        return ret
+
+
+class ImagePyramid:
+    """Multi-resolution pyramid of an image, for showing large images at
+    screen resolution.
+
+    Level ``k`` of the pyramid has a resolution reduced by ``2**k`` along both
+    axes (see :func:`block_reduce`). Levels are divided into tiles of
+    ``tileSize`` x ``tileSize`` pixels, which are only computed when they are
+    first needed, and are kept for later views. Showing the full image thus
+    only requires computing a coarse level, and zooming in only computes the
+    tiles of finer levels in the zoomed region.
+
+    :param img: the image. The first axis (rows) is along y, the second
+        (columns) along x, as for ``imshow`` with ``origin='lower'``.
+    :param extent: ``(x0, x1, y0, y1)``: the coordinates the image spans,
+        with ``x0 < x1`` and ``y0 < y1``.
+    :param reduce: how pixels are combined, ``'mean'`` or ``'max'``.
+    :param tileSize: number of pixels along each axis of a tile.
+    """
+
+    def __init__(self, img: np.ndarray, extent: Sequence[float],
+                 reduce: str = 'mean', tileSize: int = 256):
+        # plain float arrays (e.g., the transposed data) are used without a copy.
+        if isinstance(img, np.ma.MaskedArray):
+            img = np.ma.filled(img.astype(float), np.nan)
+        self.img: np.ndarray = np.asarray(img, dtype=float)
+        x0, x1, y0, y1 = (float(e) for e in extent)
+        self.extent = (x0, x1, y0, y1)
+        self.reduce = reduce
+        self.tileSize = tileSize
+        self._tiles: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.img.shape[0], self.img.shape[1]
+
+    def tile(self, level: int, row: int, col: int) -> np.ndarray:
+        """Get a tile of a level of the pyramid."""
+        key = (level, row, col)
+        if key not in self._tiles:
+            span = self.tileSize * 2 ** level
+            src = self.img[row * span:(row + 1) * span, col * span:(col + 1) * span]
+            self._tiles[key] = block_reduce(src, (2 ** level, 2 ** level), self.reduce)
+        return self._tiles[key]
+
+    def view(self, xlim: Optional[Sequence[float]] = None,
+             ylim: Optional[Sequence[float]] = None,
+             pixels: Tuple[float, float] = (1000, 1000)) \
+            -> Tuple[np.ndarray, Tuple[float, float, float, float]]:
+        """Get the image to show for a view range and resolution.
+
+        :param xlim: visible x range. ``None`` for the full x extent.
+        :param ylim: visible y range. ``None`` for the full y extent.
+        :param pixels: number of screen pixels the view range is shown on,
+            along x and y.
+        :returns: an image covering (at least) the visible part of the
+            image, with about one to two pixels per screen pixel, or the full
+            resolution; and its extent (as ``(x0, x1, y0, y1)``).
+        """
+        x0, x1, y0, y1 = self.extent
+        nrows, ncols = self.shape
+        dx, dy = (x1 - x0) / ncols, (y1 - y0) / nrows
+
+        def visible(lim: Optional[Sequence[float]], start: float,
+                    step: float, n: int) -> Tuple[int, int]:
+            if lim is None:
+                return 0, n
+            lo, hi = sorted(lim)
+            i0 = int(np.clip(np.floor((lo - start) / step), 0, n))
+            i1 = int(np.clip(np.ceil((hi - start) / step), 0, n))
+            if i1 <= i0:
+                return 0, n
+            return i0, i1
+
+        c0, c1 = visible(xlim, x0, dx, ncols)
+        r0, r1 = visible(ylim, y0, dy, nrows)
+        reduction = max((c1 - c0) / max(pixels[0], 1), (r1 - r0) / max(pixels[1], 1))
+        level = int(np.floor(np.log2(reduction))) if reduction >= 2 else 0
+        f = 2 ** level
+        span = self.tileSize * f
+
+        rows = range(r0 // span, -(-r1 // span))
+        cols = range(c0 // span, -(-c1 // span))
+        img = np.block([[self.tile(level, r, c) for c in cols] for r in rows])
+
+        # tiles at the end of the image may be padded by up to f - 1 pixels.
+        vx0 = x0 + cols[0] * span * dx
+        vy0 = y0 + rows[0] * span * dy
+        extent = (vx0, vx0 + img.shape[1] * f * dx,
+                  vy0, vy0 + img.shape[0] * f * dy)
+        return img, extent
@@ -11,16 +11,19 @@ from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PathCollection
+from matplotlib.image import AxesImage
 
 from plottr import QtWidgets, QtCore, Signal, Slot
 from plottr.data.datadict import DataDictBase
 from plottr.icons import (get_singleTracePlotIcon, get_multiTracePlotIcon, get_imagePlotIcon,
                           get_colormeshPlotIcon, get_scatterPlot2dIcon)
 from plottr.gui.tools import dpiScalingFactor
-from .plotting import PlotType, colorplot2d
+from .plotting import PlotType, DecimatedLine, colorplot2d, update_colorplot2d
 from .widgets import MPLPlotWidget
 from ..base import AutoFigureMaker as BaseFM, PlotDataType, \
     PlotItem, ComplexRepresentation, determinePlotDataType, PlotWidgetContainer
+from ..decimation import DECIMATE_ABOVE
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +35,14 @@ class FigureMaker(BaseFM):
     The class tries to lay out the subplots to be generated on a grid that's as close as possible to square.
     The allocation of plot to subplots depends on the type of plot we're making, and the type of data.
     Subplots may contain either one 2d plot (image, 2d scatter, etc) or multiple 1d plots.
+
+    If a ``previous`` figure maker that has plotted into the same figure is given,
+    and the new plot has the same layout (plot type, subplots, and plot items),
+    the artists of the previous plot are updated with the new data, instead of
+    clearing the figure and creating everything anew.
     """
 
-    def __init__(self, fig: Figure) -> None:
+    def __init__(self, fig: Figure, previous: Optional["FigureMaker"] = None) -> None:
         super().__init__()
         self.fig = fig
 
@@ -42,6 +50,20 @@ class FigureMaker(BaseFM):
         #: Incompatibility with the data provided will result in failure.
         self.plotType = PlotType.empty
 
+        #: figure maker whose artists we try to update.
+        self.previous = previous
+
+        #: whether the artists of ``previous`` have been updated (instead of
+        #: re-creating the figure).
+        self.updated = False
+
+        #: whether updating the artists has changed axes or color limits.
+        self.limitsChanged = False
+
+        #: lines with more than ``DECIMATE_ABOVE`` points are decimated to
+        #: the visible range (see :class:`.DecimatedLine`), by plot ID.
+        self.decimatedLines: Dict[int, DecimatedLine] = {}
+
     # re-implementing to get correct type annotation.
     def __enter__(self) -> "FigureMaker":
         return self
@@ -49,9 +71,79 @@ class FigureMaker(BaseFM):
     def __exit__(self, exc_type: Optional[Type[BaseException]],
                  exc_value: Optional[BaseException],
                  traceback: Optional[TracebackType]) -> None:
+        previous, self.previous = self.previous, None
+        if previous is not None and previous.fig is self.fig \
+                and self._updateFrom(previous):
+            self.updated = True
+            return None
+
         self.fig.clear()
         return super().__exit__(exc_type, exc_value, traceback)
 
+    def _updateFrom(self, previous: "FigureMaker") -> bool:
+        """Put the data of our plot items into the artists of ``previous``.
+
+        :returns: ``False`` if the artists can't be re-used. The figure then
+            needs to be re-created.
+        """
+        if self.plotType is not previous.plotType \
+                or self.nSubPlots() != len(previous.subPlots) \
+                or list(self.plotItems) != list(previous.plotItems):
+            return False
+        for id, item in self.plotItems.items():
+            prev = previous.plotItems[id]
+            if item.subPlot != prev.subPlot or len(item.data) != len(prev.data) \
+                    or item.labels != prev.labels or prev.plotReturn is None:
+                return False
+
+        limits = {}
+        for subPlot in previous.subPlots.values():
+            for ax in subPlot.axes or []:
+                limits[ax] = (ax.get_xlim(), ax.get_ylim())
+
+        lineAxes = []
+        for id, item in self.plotItems.items():
+            ret = previous.plotItems[id].plotReturn
+            axes = previous.subPlots[item.subPlot].axes
+            assert axes is not None
+            ax = axes[0]
+            if self.plotType in [PlotType.singletraces, PlotType.multitraces]:
+                if not isinstance(ret, list) or len(ret) != 1:
+                    return False
+                if id in previous.decimatedLines:
+                    self.decimatedLines[id] = previous.decimatedLines[id]
+                    self.decimatedLines[id].setData(*item.data)
+                elif np.size(item.data[0]) > DECIMATE_ABOVE:
+                    return False
+                else:
+                    ret[0].set_data(*item.data)
+                if ax not in lineAxes:
+                    lineAxes.append(ax)
+            else:
+                assert isinstance(ret, ScalarMappable)
+                clim = ret.get_clim()
+                x, y, z = item.data
+                if not update_colorplot2d(ret, x, y, z, plotType=self.plotType):
+                    return False
+                if isinstance(ret, PathCollection):
+                    ax.ignore_existing_data_limits = True
+                    ax.update_datalim(ret.get_datalim(ax.transData).get_points())
+                    ax.autoscale_view()
+                ret.autoscale()
+                if ret.get_clim() != clim:
+                    self.limitsChanged = True
+            item.plotReturn = ret
+
+        for ax in lineAxes:
+            ax.relim()
+            ax.autoscale_view()
+        for ax, lims in limits.items():
+            if (ax.get_xlim(), ax.get_ylim()) != lims:
+                self.limitsChanged = True
+
+        self.subPlots = previous.subPlots
+        return True
+
     # inherited methods
     def addData(self, *data: Union[np.ndarray, np.ma.MaskedArray],
                 join: Optional[int] = None,
@@ -123,6 +215,10 @@ class FigureMaker(BaseFM):
         lbl = plotItem.labels[-1] if isinstance(plotItem.labels, list) and len(plotItem.labels) > 0 else ''
         x, y = plotItem.data
         assert plotItem.plotOptions is not None
+        if np.size(x) > DECIMATE_ABOVE:
+            lines = axes[0].plot([], [], label=lbl, **plotItem.plotOptions)
+            self.decimatedLines[plotItem.id] = DecimatedLine(lines[0], x, y)
+            return lines
         return axes[0].plot(x, y, label=lbl, **plotItem.plotOptions)
 
 
@@ -403,6 +499,8 @@ class AutoPlot(MPLPlotWidget):
 
     When data is set using :meth:`setData` the class will automatically try
     to determine what good plot options are from the structure of the data.
+    If only the values of the data have changed, the existing artists are
+    updated with the new values, instead of re-creating the figure.
 
     User options (for different types of plots, styling, etc) are
     presented through a toolbar.
@@ -414,6 +512,8 @@ class AutoPlot(MPLPlotWidget):
         self.plotDataType = PlotDataType.unknown
         self.plotType = PlotType.empty
         self._inSetData = False
+        self._figureMaker: Optional[FigureMaker] = None
+        self._figureMeta: Tuple[Any, ...] = (None, None)
 
         # The default complex behavior is set here.
         self.complexRepresentation = ComplexRepresentation.realAndImag
@@ -453,6 +553,8 @@ class AutoPlot(MPLPlotWidget):
         """
         super().setData(data)
         if data is None:
+            self._figureMaker = None
+            self.plot.setBlitArtists([])
             self.plot.fig.clear()
             self.updatePlot()
             return
@@ -463,7 +565,8 @@ class AutoPlot(MPLPlotWidget):
         self._processPlotTypeOptions()
         self._processComplexTypeOptions()
         self._inSetData = False
-        self._plotData()
+        self._plotData(update=not (self.dataChanges['dataTypeChanged']
+                                   or self.dataChanges['dataStructureChanged']))
 
     def _processPlotTypeOptions(self) -> None:
         """Given the current data type, figure out what the plot options are."""
@@ -526,8 +629,12 @@ class AutoPlot(MPLPlotWidget):
         self.setScrollable(scrollable)
         self._plotData()
 
-    def _plotData(self) -> None:
-        """Plot the data using previously determined data and plot types."""
+    def _plotData(self, update: bool = False) -> None:
+        """Plot the data using previously determined data and plot types.
+
+        :param update: if ``True``, try to update the artists of the previous
+            plot with the new data instead of re-creating the figure.
+        """
 
         if self.plotDataType is PlotDataType.unknown:
             logger.debug("No plottable data.")
@@ -539,7 +646,8 @@ class AutoPlot(MPLPlotWidget):
         assert self.data is not None
 
         kw: Dict[str, Any] = {}
-        with FigureMaker(self.plot.fig) as fm:
+        previous = self._figureMaker if update else None
+        with FigureMaker(self.plot.fig, previous=previous) as fm:
             fm.plotType = self.plotType
             if not self.dataIsComplex():
                 fm.complexRepresentation = ComplexRepresentation.real
@@ -556,6 +664,32 @@ class AutoPlot(MPLPlotWidget):
                     **kw)
 
             nSubPlots = fm.nSubPlots()
+        self._figureMaker = fm
+
+        meta = tuple(self.data.meta_val(k) if self.data.has_meta(k) else None
+                     for k in ('title', 'info'))
+        if fm.updated:
+            if meta != self._figureMeta:
+                self._figureMeta = meta
+                self.setMeta(self.data)
+                self.updatePlot()
+            else:
+                self.setMeta(self.data, figureText=False)
+                if fm.limitsChanged:
+                    self.updatePlot()
+                else:
+                    self.plot.redrawBlitArtists()
+            return
+
+        # images are always part of the full draw, so there's no use in blitting.
+        artists: List[Any] = []
+        for item in fm.plotItems.values():
+            ret = item.plotReturn
+            artists += ret if isinstance(ret, list) else [ret]
+        if any(a is None or isinstance(a, AxesImage) for a in artists):
+            artists = []
+        self.plot.setBlitArtists(artists)
+        self._figureMeta = meta
 
         # Set canvas minimum height for scrollable mode
         scrollable = self.plotOptionsToolBar.scrollableAction.isChecked()
@@ -2,6 +2,7 @@
 ``plottr.plot.mpl.plotting`` -- Plotting tools (mostly used in Autoplot)
 """
 
+import weakref
 from enum import Enum, auto, unique
 from typing import Any, Optional, Tuple, Union, cast
 
@@ -10,8 +11,11 @@ from matplotlib import colors, rcParams
 from matplotlib.axes import Axes
 from matplotlib.image import AxesImage
 from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PathCollection, QuadMesh
+from matplotlib.lines import Line2D
 
 from plottr.utils import num
+from ..decimation import IMAGE_DECIMATE_ABOVE, ImagePyramid, LinePyramid, block_reduce
 from plottr.utils.num import centers2edges_2d, interp_meshgrid_2d
 
 __author__ = 'Wolfgang Pfaff'
@@ -89,11 +93,50 @@ def colorplot2d(ax: Axes,
     """
     cmap = kw.pop('cmap', rcParams['image.cmap'])
 
+    prepared = colorplot2d_data(x, y, z, plotType)
+    if prepared is None:
+        return None
+    x, y, z, plotType = prepared
+
+    im: Optional[ScalarMappable]
+    if plotType is PlotType.image:
+        im = plotImage(ax, x, y, z, cmap=cmap, **kw)
+    elif plotType is PlotType.colormesh:
+        im = ppcolormesh_from_meshgrid(ax, x, y, z, cmap=cmap, **kw)
+    elif plotType is PlotType.scatter2d:
+        im = ax.scatter(x.ravel(), y.ravel(), c=z.ravel(), cmap=cmap, **kw)
+    else:
+        im = None
+
+    if im is None:
+        return None
+
+    if axLabels[0]:
+        ax.set_xlabel(axLabels[0])
+    if axLabels[1]:
+        ax.set_ylabel(axLabels[1])
+    return im
+
+
+def colorplot2d_data(x: Union[np.ndarray, np.ma.MaskedArray],
+                     y: Union[np.ndarray, np.ma.MaskedArray],
+                     z: Union[np.ndarray, np.ma.MaskedArray],
+                     plotType: PlotType = PlotType.image) \
+        -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, PlotType]]:
+    """Prepare data for a 2d colorplot (see :func:`colorplot2d`).
+
+    For image and colormesh plots, masked values are filled in, and invalid
+    coordinates are interpolated or cropped, if possible. If the data has
+    only a single line, the plot type falls back to a scatter plot.
+
+    :returns: ``None`` if the data can't be plotted, otherwise the x, y and
+        z data and the plot type to use.
+    """
     # first we need to check if our grid can be plotted nicely.
     if plotType in [PlotType.image, PlotType.colormesh]:
-        x = x.astype(float)
-        y = y.astype(float)
-        z = z.astype(float)
+        x = x.astype(float, copy=False)
+        y = y.astype(float, copy=False)
+        z = z.astype(float, copy=False)
 
         # first check if we need to fill some masked values in
         if isinstance(x, np.ma.MaskedArray) and np.ma.is_masked(x):
@@ -104,9 +147,10 @@ def colorplot2d(ax: Axes,
             z = z.filled(np.nan)
 
         # next: try some surgery, if possible
-        if np.all(num.is_invalid(x)) or np.all(num.is_invalid(y)):
+        xinvalid, yinvalid = np.isnan(x), np.isnan(y)
+        if np.all(xinvalid) or np.all(yinvalid):
             return None
-        if np.any(np.isnan(x)) or np.any(np.isnan(y)):
+        if np.any(xinvalid) or np.any(yinvalid):
             x, y = interp_meshgrid_2d(x, y)
         if np.any(num.is_invalid(x)) or np.any(num.is_invalid(y)):
             x, y, z = num.crop2d(x, y, z)
@@ -121,24 +165,64 @@ def colorplot2d(ax: Axes,
             # special case: if we have a single line, a pcolor-type plot won't work.
             elif min(g.shape) < 2:
                 plotType = PlotType.scatter2d
-    im: Optional[ScalarMappable]
-    if plotType is PlotType.image:
-        im = plotImage(ax, x, y, z, cmap=cmap, **kw)
-    elif plotType is PlotType.colormesh:
-        im = ppcolormesh_from_meshgrid(ax, x, y, z, cmap=cmap, **kw)
-    elif plotType is PlotType.scatter2d:
-        im = ax.scatter(x.ravel(), y.ravel(), c=z.ravel(), cmap=cmap, **kw)
-    else:
-        im = None
+    return x, y, z, plotType
 
-    if im is None:
-        return None
 
-    if axLabels[0]:
-        ax.set_xlabel(axLabels[0])
-    if axLabels[1]:
-        ax.set_ylabel(axLabels[1])
-    return im
+def update_colorplot2d(im: ScalarMappable,
+                       x: Union[np.ndarray, np.ma.MaskedArray],
+                       y: Union[np.ndarray, np.ma.MaskedArray],
+                       z: Union[np.ndarray, np.ma.MaskedArray],
+                       plotType: PlotType = PlotType.image) -> bool:
+    """Update a 2d colorplot made with :func:`colorplot2d` with new data,
+    without re-creating it.
+
+    Color limits and axes limits are not adjusted (except for the extent of
+    images).
+
+    :returns: ``False`` if the plot can't be updated (and hasn't been
+        changed), for instance because the type of plot for the new data
+        differs, or the coordinates of a colormesh have changed.
+    """
+    prepared = colorplot2d_data(x, y, z, plotType)
+    if prepared is None:
+        return False
+    x, y, z, plotType = prepared
+
+    if plotType is PlotType.image and isinstance(im, AxesImage):
+        zi, extent = image_data(x, y, z)
+        decimated = _decimatedImages.get(im)
+        if decimated is not None:
+            decimated.setData(zi, extent)
+        elif zi.size > IMAGE_DECIMATE_ABOVE:
+            return False
+        else:
+            im.set_data(zi)
+            im.set_extent(extent)
+        return True
+
+    elif plotType is PlotType.colormesh and isinstance(im, QuadMesh):
+        x, y, z = colormesh_data(x, y, z)
+        # the vertices of a colormesh can't be changed.
+        try:
+            xe, ye = centers2edges_2d(x), centers2edges_2d(y)
+        except:
+            return False
+        coords = np.asarray(im.get_coordinates())
+        if not (np.array_equal(coords[..., 0], xe)
+                and np.array_equal(coords[..., 1], ye)):
+            return False
+        arr = np.ma.masked_invalid(z)
+        current = im.get_array()
+        im.set_array(arr if current is not None and np.ndim(current) == 2
+                     else arr.ravel())
+        return True
+
+    elif plotType is PlotType.scatter2d and isinstance(im, PathCollection):
+        im.set_offsets(np.column_stack([np.ravel(x), np.ravel(y)]))
+        im.set_array(np.ma.masked_invalid(np.ravel(z)))
+        return True
+
+    return False
 
 
 def ppcolormesh_from_meshgrid(ax: Axes, x: np.ndarray, y: np.ndarray,
@@ -154,8 +238,13 @@ def ppcolormesh_from_meshgrid(ax: Axes, x: np.ndarray, y: np.ndarray,
     :param z: data values
     :returns: the image returned by `pcolormesh`.
 
+    Meshes with more than ``IMAGE_DECIMATE_ABOVE`` cells are reduced in
+    resolution first (see :func:`colormesh_data`).
+
     Keywords are passed on to `pcolormesh`.
     """
+    x, y, z = colormesh_data(x, y, z)
+
     # the meshgrid we have describes coordinates, but for plotting
     # with pcolormesh we need vertices.
     try:
@@ -170,6 +259,29 @@ def ppcolormesh_from_meshgrid(ax: Axes, x: np.ndarray, y: np.ndarray,
     return im
 
 
+def colormesh_data(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                   maxCells: Optional[int] = None) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reduce the resolution of 2d meshgrid data for a colormesh, if it has
+    more than ``maxCells`` cells, by averaging blocks of cells
+    (see :func:`.block_reduce`).
+
+    :param x: x coordinates (as meshgrid)
+    :param y: y coordinates
+    :param z: z values
+    :param maxCells: maximum number of cells. ``None`` for
+        ``IMAGE_DECIMATE_ABOVE``.
+    :returns: the (reduced) x, y, and z data.
+    """
+    if maxCells is None:
+        maxCells = IMAGE_DECIMATE_ABOVE
+    if z.size <= maxCells:
+        return x, y, z
+    f = int(np.ceil(np.sqrt(z.size / maxCells)))
+    return (block_reduce(x, (f, f)), block_reduce(y, (f, f)),
+            block_reduce(z, (f, f)))
+
+
 def plotImage(ax: Axes, x: np.ndarray, y: np.ndarray,
               z: np.ndarray, **kw: Any) -> AxesImage:
     """Plot 2d meshgrid data as image.
@@ -180,9 +292,37 @@ def plotImage(ax: Axes, x: np.ndarray, y: np.ndarray,
     :param z: z values
     :returns: the image object returned by `imshow`
 
+    Images with more than ``IMAGE_DECIMATE_ABOVE`` pixels are shown at
+    screen resolution (see :class:`DecimatedImage`).
+
     All keywords are passed to `imshow`.
     """
     ax.grid(False)
+    z, extent = image_data(x, y, z)
+    if z.size > IMAGE_DECIMATE_ABOVE:
+        pyramid = ImagePyramid(z, extent)
+        bbox = ax.get_window_extent()
+        zv, extentv = pyramid.view(pixels=(bbox.width, bbox.height))
+        im = ax.imshow(zv, aspect='auto', origin='lower',
+                       extent=extentv, **kw)
+        DecimatedImage(im, pyramid)
+        return im
+
+    im = ax.imshow(z, aspect='auto', origin='lower',
+                   extent=extent, **kw)
+    return im
+
+
+def image_data(x: np.ndarray, y: np.ndarray, z: np.ndarray) \
+        -> Tuple[np.ndarray, Tuple[float, float, float, float]]:
+    """Get the image array and extent for plotting 2d meshgrid data with
+    ``imshow`` (with ``origin='lower'``).
+
+    :param x: x coordinates (as meshgrid)
+    :param y: y coordinates
+    :param z: z values
+    :returns: the image array, and its extent
+    """
     x0, x1 = x.min(), x.max()
     y0, y1 = y.min(), y.max()
 
@@ -208,6 +348,105 @@ def plotImage(ax: Axes, x: np.ndarray, y: np.ndarray,
     if y.shape[1] > 1:
         z = z if y[0, 0] < y[0, 1] else z[:, ::-1]
 
-    im = ax.imshow(z.T, aspect='auto', origin='lower',
-                   extent=extent, **kw)
-    return im
+    return z.T, extent
+
+
+class DecimatedLine:
+    """Keeps the data of a line decimated to the visible x range and the
+    width of its axes (see :class:`.LinePyramid`). The line data is updated
+    whenever the x limits of the axes change.
+
+    When created, the line shows the full range of the trace, and the data
+    limits of the axes are updated to include it.
+
+    :param line: the line. Must have been added to axes already.
+    :param x: x values of the full trace.
+    :param y: y values of the full trace.
+    """
+
+    def __init__(self, line: Line2D, x: np.ndarray, y: np.ndarray):
+        self.line = line
+        self.pyramid = LinePyramid(x, y)
+        ax = line.axes
+        assert ax is not None
+        # (matplotlib only keeps weak references to bound methods; the
+        # lambda keeps us alive as long as the axes are.)
+        ax.callbacks.connect('xlim_changed', lambda _ax: self.update())
+        self.update(full=True)
+        ax.update_datalim(np.column_stack(self.line.get_data()))
+
+    def setData(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Replace the trace data. The line is updated for the current
+        x limits; it still has the data limits of the full trace."""
+        self.pyramid = LinePyramid(x, y)
+        self.update()
+
+    def update(self, full: bool = False) -> None:
+        """Set the line data for the current x limits.
+
+        :param full: if ``True``, use the full range of the data, instead
+            of the current x limits.
+        """
+        ax = self.line.axes
+        if ax is None:
+            return
+        pixels = max(int(ax.get_window_extent().width), 100)
+        if full:
+            x, y = self.pyramid.decimate(pixels=pixels)
+        else:
+            xmin, xmax = sorted(ax.get_xlim())
+            x, y = self.pyramid.decimate(xmin, xmax, pixels=pixels)
+        self.line.set_data(x, y)
+
+
+#: decimated images, by the image they update.
+_decimatedImages: "weakref.WeakKeyDictionary[AxesImage, DecimatedImage]" = \
+    weakref.WeakKeyDictionary()
+
+
+class DecimatedImage:
+    """Keeps an image showing the visible part of a large image at screen
+    resolution (see :class:`.ImagePyramid`). The image data is updated
+    whenever the limits of the axes change.
+
+    :param im: the image. Must have been added to axes already.
+    :param pyramid: pyramid of the full image.
+    """
+
+    def __init__(self, im: AxesImage, pyramid: ImagePyramid):
+        self._image = weakref.ref(im)
+        self.pyramid = pyramid
+        self._updating = False
+        _decimatedImages[im] = self
+
+        ax = im.axes
+        assert ax is not None
+        # (as for DecimatedLine, the lambdas keep us alive with the axes.)
+        ax.callbacks.connect('xlim_changed', lambda _ax: self.update())
+        ax.callbacks.connect('ylim_changed', lambda _ax: self.update())
+
+    def setData(self, img: np.ndarray, extent: Tuple[float, float, float, float]) -> None:
+        """Replace the full image (``imshow``-like, with ``origin='lower'``)."""
+        self.pyramid = ImagePyramid(img, extent)
+        self.update()
+
+    def update(self) -> None:
+        """Set the image data for the current axes limits. Axes that are
+        autoscaled show the full extent."""
+        im = self._image()
+        if im is None or im.axes is None or self._updating:
+            return
+        ax = im.axes
+        x0, x1, y0, y1 = self.pyramid.extent
+        xlim = (x0, x1) if ax.get_autoscalex_on() else ax.get_xlim()
+        ylim = (y0, y1) if ax.get_autoscaley_on() else ax.get_ylim()
+        bbox = ax.get_window_extent()
+        img, extent = self.pyramid.view(xlim, ylim, (bbox.width, bbox.height))
+
+        # setting the extent may set the limits of autoscaled axes.
+        self._updating = True
+        try:
+            im.set_data(img)
+            im.set_extent(extent)
+        finally:
+            self._updating = False
@@ -3,12 +3,13 @@
 """
 
 import io
-from typing import Tuple, Optional, List, Dict
+from typing import Any, Tuple, Optional, List, Dict, Sequence
 
 from matplotlib import rcParams
+from matplotlib.artist import Artist
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
-from matplotlib.backend_bases import LocationEvent, MouseButton, Event
+from matplotlib.backend_bases import LocationEvent, MouseButton, Event, DrawEvent
 from matplotlib.backends.backend_qt5agg import (
     FigureCanvasQTAgg as FCanvas,
     NavigationToolbar2QT as NavBar,
@@ -48,6 +49,10 @@ class MPLPlot(FCanvas):
     sizing, but is otherwise not very different from the class ``FCanvas``
     that comes with matplotlib (and which we inherit).
     It can be used as any QT widget.
+
+    Artists that change frequently can be registered with
+    :meth:`setBlitArtists`. After changing their data, :meth:`redrawBlitArtists`
+    redraws only those artists on top of the (cached) rest of the figure.
     """
 
     #: Signal(str) -- emitted when content is copied to the clipboard, with a message describing what was copied.
@@ -78,6 +83,10 @@ class MPLPlot(FCanvas):
         self._meta_info: Dict[str, str] = {}
         self._constrainedLayout = constrainedLayout
 
+        self._blitArtists: List[Artist] = []
+        self._blitBackground: Optional[Any] = None
+        self.mpl_connect('draw_event', self._onDraw)
+
         self.clearFig()
         self.setParent(parent)
         self.setRcParams()
@@ -92,9 +101,43 @@ class MPLPlot(FCanvas):
 
     def clearFig(self) -> None:
         """clear and reset the canvas."""
+        self.setBlitArtists([])
         self.fig.clear()
         self.autosize()
 
+    def setBlitArtists(self, artists: Sequence[Artist]) -> None:
+        """Set the artists that are redrawn by :meth:`redrawBlitArtists`.
+        They are excluded from regular draws of the figure, and drawn on top
+        of it when it has been drawn.
+
+        :param artists: the artists. An empty list disables blitting.
+        """
+        for a in self._blitArtists:
+            a.set_animated(False)
+        self._blitArtists = list(artists)
+        for a in self._blitArtists:
+            a.set_animated(True)
+        self._blitBackground = None
+
+    def redrawBlitArtists(self) -> None:
+        """Redraw the artists set with :meth:`setBlitArtists` on top of the
+        figure background captured at the last full draw.
+        Makes a full draw if that's not possible."""
+        if not self._blitArtists or self._blitBackground is None:
+            self.draw()
+            return
+        self.restore_region(self._blitBackground)
+        for a in self._blitArtists:
+            self.fig.draw_artist(a)
+        self.blit(self.fig.bbox)
+
+    def _onDraw(self, event: DrawEvent) -> None:
+        if event.canvas is not self or self.is_saving() or not self._blitArtists:
+            return
+        self._blitBackground = self.copy_from_bbox(self.fig.bbox)
+        for a in self._blitArtists:
+            self.fig.draw_artist(a)
+
     def setRcParams(self) -> None:
         """apply matplotlibrc config from plottr configuration files."""
         cfg = plottrconfig().get('main', {}).get('matplotlibrc', {})
@@ -212,17 +255,18 @@ class MPLPlotWidget(PlotWidget):
         if not scrollable:
             self.plot.setMinimumHeight(0)
 
-    def setMeta(self, data: DataDictBase) -> None:
+    def setMeta(self, data: DataDictBase, figureText: bool = True) -> None:
         """Add meta info contained in the data to the figure.
 
         :param data: data object containing the meta information
             if meta field ``title`` or ``info`` are in the data object, then
             they will be added as text info to the figure.
+        :param figureText: if ``False``, don't (re-)draw title and info.
         """
-        if data.has_meta('title'):
+        if figureText and data.has_meta('title'):
             self.plot.setFigureTitle(data.meta_val('title'))
 
-        if data.has_meta('info'):
+        if figureText and data.has_meta('info'):
             self.plot.setFigureInfo(data.meta_val('info'))
 
         all_meta = {}
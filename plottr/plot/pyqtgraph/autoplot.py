@@ -200,7 +200,10 @@ class FigureMaker(BaseFM):
         """Create empty subplots in the widgets.
 
         If ``clearWidget`` was not set to ``True`` in the constructor,
-        existing sub plot widgets are cleared, but not deleted and re-created.
+        existing sub plot widgets are not deleted and re-created, and their
+        plot items are updated with the new data (see :meth:`_1dPlot` and
+        :class:`.PlotWithColorbar`). Line plots whose number of curves doesn't
+        match are cleared.
         """
         plot: PlotBase
         if self.clearWidget:
@@ -214,7 +217,10 @@ class FigureMaker(BaseFM):
                     self.widget.addPlot(plot)
             self.widget._arrangeGrid()
         else:
-            self.widget.clearAllPlots()
+            for i, plot in enumerate(self.widget.subPlots):
+                if isinstance(plot, Plot) and \
+                        len(plot.plot.listDataItems()) != len(self.plotIdsInSubPlot(i)):
+                    plot.clearPlot()
 
         return self.widget.subPlots
 
@@ -273,7 +279,7 @@ class FigureMaker(BaseFM):
 
         subPlot = self.subPlotFromId(plotItem.subPlot)
 
-        assert len(plotItem.data) == 2
+        assert isinstance(subPlot, Plot) and len(plotItem.data) == 2
         x, y = plotItem.data
 
 
@@ -291,15 +297,25 @@ class FigureMaker(BaseFM):
         else:
             y = y.flatten()
 
+        # update the existing curve, if we're re-using the plot.
+        index = self.findPlotIndexInSubPlot(plotItem.id)
+        curves = subPlot.plot.listDataItems()
+        if not self.clearWidget and index < len(curves):
+            subPlot.setCurveData(curves[index], x, y)
+            return curves[index]
+
         #plot either line or scatter depending on what graph is being requested
         if plotItem.plotDataType in [PlotDataType.line1d, PlotDataType.log10_line1d]:
-            return subPlot.plot.plot(x, y, name=name,
-                                     pen=mkPen(color, width=1), symbol=symbol, symbolBrush=color,
-                                     symbolPen=None, symbolSize=symbolSize)
+            curve = subPlot.plot.plot(name=name,
+                                      pen=mkPen(color, width=1), symbol=symbol, symbolBrush=color,
+                                      symbolPen=None, symbolSize=symbolSize)
         else: #plotItem.plotDataType is either PlotDataType.scatter1d or PlotDataType.log10_scatter1d
-            return subPlot.plot.plot(x, y, name=name,
-                                     pen=None, symbol=symbol, symbolBrush=color,
-                                     symbolPen=None, symbolSize=symbolSize)
+            curve = subPlot.plot.plot(name=name,
+                                      pen=None, symbol=symbol, symbolBrush=color,
+                                      symbolPen=None, symbolSize=symbolSize)
+        # long traces are decimated to the view.
+        subPlot.setCurveData(curve, x, y)
+        return curve
 
     def _colorPlot(self, plotItem: PlotItem) -> None:
         subPlot = self.subPlotFromId(plotItem.subPlot)
@@ -414,18 +430,7 @@ class AutoPlot(ClipboardMessageMixin, PlotWidget):
 
         #update FigOptions numAxes and imagData
         self.figOptions.numAxes = len(inds)
-        self.figOptions.imagData = False
-
-        #define imagData for single and multiple value data
-        for val in dvals:
-            try:
-                if not all(val.imag == 0):
-                    self.figOptions.imagData = True
-                    break
-            except:
-                 if not val.imag == 0:
-                    self.figOptions.imagData = True
-                    break
+        self.figOptions.imagData = self.dataIsComplex()
 
         #Assertions to make mypy happy
         assert self.figConfig is not None
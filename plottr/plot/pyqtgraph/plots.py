@@ -1,12 +1,14 @@
 """Convenience tools for generating ``pyqtgraph`` plots that can
 be used in plottr's automatic plotting framework."""
 
-from typing import Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 import pyqtgraph as pg
 
 from plottr import QtCore, QtWidgets, config_entry
+from ..decimation import DECIMATE_ABOVE, IMAGE_DECIMATE_ABOVE, ImagePyramid, \
+    LinePyramid
 
 __all__ = ['PlotBase', 'Plot']
 
@@ -46,6 +48,63 @@ class PlotBase(QtWidgets.QWidget):
         raise NotImplementedError
 
 
+class DecimatedCurve:
+    """Keeps the data of a curve decimated to the visible x range and the
+    width of the view (see :class:`.LinePyramid`). The curve data is updated
+    whenever the x range or the size of the view changes.
+
+    :param curve: the curve.
+    :param viewBox: the view box the curve is shown in.
+    :param x: x values of the full trace.
+    :param y: y values of the full trace.
+    """
+
+    def __init__(self, curve: pg.PlotDataItem, viewBox: pg.ViewBox,
+                 x: np.ndarray, y: np.ndarray):
+        self.curve = curve
+        self.viewBox = viewBox
+        self.pyramid = LinePyramid(x, y)
+        self._updating = False
+
+        viewBox.sigXRangeChanged.connect(self.update)
+        viewBox.sigResized.connect(self.update)
+        self.update(full=True)
+
+    def setData(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Replace the trace data."""
+        self.pyramid = LinePyramid(x, y)
+        self.update()
+
+    def update(self, *args: Any, full: bool = False) -> None:
+        """Set the curve data for the current x range.
+
+        :param full: if ``True``, use the full range of the data, instead of
+            the current x range.
+        """
+        # setting data may cause auto-ranging, which brings us back here.
+        if self._updating:
+            return
+        self._updating = True
+        try:
+            pixels = max(int(self.viewBox.width()), 100)
+            if full:
+                x, y = self.pyramid.decimate(pixels=pixels)
+            else:
+                xmin, xmax = self.viewBox.viewRange()[0]
+                x, y = self.pyramid.decimate(xmin, xmax, pixels=pixels)
+            self.curve.setData(x, y)
+        finally:
+            self._updating = False
+
+    def disconnect(self) -> None:
+        """Stop updating the curve."""
+        for sig in (self.viewBox.sigXRangeChanged, self.viewBox.sigResized):
+            try:
+                sig.disconnect(self.update)
+            except TypeError:
+                pass
+
+
 class Plot(PlotBase):
     """A simple plot with a single ``PlotItem``."""
 
@@ -56,10 +115,60 @@ class Plot(PlotBase):
         legend.layout.setContentsMargins(0, 0, 0, 0)
         self.plot.showGrid(True, True)
 
+        #: curves with many points, that are decimated to the view.
+        self.decimatedCurves: List[DecimatedCurve] = []
+
     def clearPlot(self) -> None:
         """Clear the plot item."""
+        for c in self.decimatedCurves:
+            c.disconnect()
+        self.decimatedCurves = []
         self.plot.clear()
 
+    def setCurveData(self, curve: pg.PlotDataItem,
+                     x: np.ndarray, y: np.ndarray) -> None:
+        """Set the data of a curve in this plot.
+
+        Traces with more than ``DECIMATE_ABOVE`` points are decimated to the
+        visible x range and the width of the plot
+        (see :class:`.DecimatedCurve`).
+
+        :param curve: the curve.
+        :param x: x values
+        :param y: y values
+        """
+        for c in self.decimatedCurves:
+            if c.curve is curve:
+                c.setData(x, y)
+                return
+        if np.size(x) > DECIMATE_ABOVE:
+            self.decimatedCurves.append(
+                DecimatedCurve(curve, self.plot.getViewBox(), x, y))
+        else:
+            curve.setData(x, y)
+
+
+class PyramidImageItem(pg.ImageItem):
+    """Image item that shows part of a larger image (see
+    :class:`.ImagePyramid`). For auto-ranging, it reports the bounds of the
+    full image (:attr:`fullRect`), not of the part currently shown."""
+
+    #: rectangle the full image spans.
+    fullRect: Optional[QtCore.QRectF] = None
+
+    def dataBounds(self, ax: int, frac: float = 1.0,
+                   orthoRange: Optional[Tuple[float, float]] = None) \
+            -> Optional[Tuple[float, float]]:
+        if self.fullRect is None or self.image is None:
+            return None
+        inverse, invertible = self.transform().inverted()
+        if not invertible:
+            return None
+        rect = inverse.mapRect(self.fullRect)
+        if ax == 0:
+            return rect.left(), rect.right()
+        return rect.top(), rect.bottom()
+
 
 class PlotWithColorbar(PlotBase):
     """Plot containing a plot item and a colorbar item.
@@ -67,10 +176,19 @@ class PlotWithColorbar(PlotBase):
     Plot is suited for either an image plot (:meth:`.setImage`) or a color
     scatter plot (:meth:`.setScatter2D`).
     The color scale is displayed in an interactive colorbar.
+    Images with more than ``IMAGE_DECIMATE_ABOVE`` pixels are shown at
+    screen resolution, for the visible range (see :class:`.ImagePyramid`).
+
+    Setting new data of the same kind as before updates the existing image or
+    scatter item in place. The colorbar levels then follow the data range,
+    unless they have been changed by the user.
     """
     #: colorbar
     colorbar: pg.ColorBarItem
 
+    #: number of colors used for coloring scatter points.
+    scatterColors = 256
+
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
         super().__init__(parent)
 
@@ -85,35 +203,59 @@ class PlotWithColorbar(PlotBase):
         self.graphicsLayout.addItem(self.colorbar)
 
         self.img: Optional[pg.ImageItem] = None
+        self.imagePyramid: Optional[ImagePyramid] = None
         self.scatter: Optional[pg.ScatterPlotItem] = None
         self.scatterZVals: Optional[np.ndarray] = None
 
+        # colorbar levels set automatically from the data range most recently.
+        self._autoLevels: Optional[Tuple[float, float]] = None
+
+        # brushes for coloring scatter points, and the colormap they're made from.
+        self._scatterBrushes: Optional[np.ndarray] = None
+        self._scatterBrushesCmap: Optional[pg.ColorMap] = None
+
     def clearPlot(self) -> None:
         """Clear the content of the plot."""
         self.img = None
+        self.imagePyramid = None
         self.scatter = None
         self.scatterZVals = None
+        self._autoLevels = None
         self.plot.clear()
-        try:
-            self.colorbar.sigLevelsChanged.disconnect(self._colorScatterPoints)
-        except TypeError:
-            pass
+        vb = self.plot.getViewBox()
+        for sig, slot in ((self.colorbar.sigLevelsChanged, self._colorScatterPoints),
+                          (vb.sigRangeChanged, self._updateImageView),
+                          (vb.sigResized, self._updateImageView)):
+            try:
+                sig.disconnect(slot)
+            except TypeError:
+                pass
 
     def setImage(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> None:
         """Set data to be plotted as image.
 
         Clears the plot before creating a new image item that gets placed in the
-        plot and linked to the colorscale.
+        plot and linked to the colorscale. If the plot already contains an
+        image, that image is updated instead.
 
         :param x: x coordinates (as 2D meshgrid)
         :param y: y coordinates (as 2D meshgrid)
         :param z: data values (as 2D meshgrid)
         :return: None
         """
-        self.clearPlot()
+        decimate = z.size > IMAGE_DECIMATE_ABOVE
+        update = self.img is not None and self.scatter is None \
+            and isinstance(self.img, PyramidImageItem) == decimate
+        if not update:
+            self.clearPlot()
+            self.img = PyramidImageItem() if decimate else pg.ImageItem()
+            self.plot.addItem(self.img)
+            if decimate:
+                vb = self.plot.getViewBox()
+                vb.sigRangeChanged.connect(self._updateImageView)
+                vb.sigResized.connect(self._updateImageView)
+        assert self.img is not None
 
-        self.img = pg.ImageItem()
-        self.plot.addItem(self.img)
         # pyqtgraph's ImageItem uses col-major ordering by default, i.e.
         # ``image[i, j]`` maps the first array axis to the horizontal (x)
         # display axis and the second array axis to the vertical (y) axis.
@@ -127,43 +269,105 @@ class PlotWithColorbar(PlotBase):
             img_z = img_z[::-1, :]
         if y.shape[1] > 1 and not y[0, 0] < y[0, 1]:
             img_z = img_z[:, ::-1]
-        self.img.setImage(img_z)
-        self.img.setRect(QtCore.QRectF(x.min(), y.min(), x.max() - x.min(), y.max() - y.min()))
-
-        self.colorbar.setImageItem(self.img)
-        self.colorbar.rounding = (z.max() - z.min()) * 1e-2
-        self.colorbar.setLevels((z.min(), z.max()))
+        rect = QtCore.QRectF(x.min(), y.min(), x.max() - x.min(), y.max() - y.min())
+        if decimate:
+            assert isinstance(self.img, PyramidImageItem)
+            # the pyramid uses the (row, column) ordering of matplotlib.
+            self.imagePyramid = ImagePyramid(
+                img_z.T, (rect.left(), rect.right(), rect.top(), rect.bottom()))
+            self.img.fullRect = rect
+            self._updateImageView(autoLevels=not update)
+        else:
+            # when updating, levels are set through the colorbar, no need to
+            # compute them here.
+            self.img.setImage(img_z, autoLevels=not update)
+            self.img.setRect(rect)
+
+        if not update:
+            self.colorbar.setImageItem(self.img)
+        self._setAutoLevels(z)
+
+    def _updateImageView(self, *args: Any, autoLevels: bool = False) -> None:
+        """Show the visible part of the image pyramid at screen resolution."""
+        if self.img is None or self.imagePyramid is None:
+            return
+        vb = self.plot.getViewBox()
+        xlim, ylim = vb.viewRange()
+        img, (x0, x1, y0, y1) = self.imagePyramid.view(
+            xlim, ylim, (vb.width(), vb.height()))
+        self.img.setImage(img.T, autoLevels=autoLevels)
+        self.img.setRect(QtCore.QRectF(x0, y0, x1 - x0, y1 - y0))
+
+    def _setAutoLevels(self, z: np.ndarray) -> None:
+        """Set the colorbar levels to the range of the valid values of ``z``,
+        unless the user has changed them since we've last done that."""
+        if self._autoLevels is not None and not np.array_equal(
+                self.colorbar.levels(), self._autoLevels, equal_nan=True):
+            return
+        # (don't copy large arrays; masked arrays would get their mask changed.)
+        zvals = np.ma.masked_invalid(z, copy=isinstance(z, np.ma.MaskedArray))
+        zmin, zmax = zvals.min(), zvals.max()
+        if zmin is np.ma.masked:
+            return
+        self.colorbar.rounding = (zmax - zmin) * 1e-2
+        self.colorbar.setLevels((zmin, zmax))
+        self._autoLevels = self.colorbar.levels()
 
     def setScatter2d(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> None:
         """Set data to be plotted as image.
 
         Clears the plot before creating a new scatter item (based on flattened
         input data) that gets placed in the plot and linked to the colorscale.
+        If the plot already contains a scatter item, its data is replaced
+        instead.
 
         :param x: x coordinates
         :param y: y coordinates
         :param z: data values
         :return: None
         """
-        self.clearPlot()
+        update = self.scatter is not None and self.img is None
+        if not update:
+            self.clearPlot()
+            self.scatter = pg.ScatterPlotItem()
+            self.plot.addItem(self.scatter)
+        assert self.scatter is not None
 
-        self.scatter = pg.ScatterPlotItem()
         self.scatter.setData(x=x.flatten(), y=y.flatten(), symbol='o', size=8)
-        self.plot.addItem(self.scatter)
         self.scatterZVals = z.flatten()
 
-        self.colorbar.setLevels((z.min(), z.max()))
-        self.colorbar.rounding = (z.max() - z.min()) * 1e-2
+        # make sure the points are colored only once.
+        blocked = self.colorbar.blockSignals(True)
+        self._setAutoLevels(z)
+        self.colorbar.blockSignals(blocked)
         self._colorScatterPoints(self.colorbar)
 
-        self.colorbar.sigLevelsChanged.connect(self._colorScatterPoints)
+        if not update:
+            self.colorbar.sigLevelsChanged.connect(self._colorScatterPoints)
 
-    # TODO: this seems crazy slow.
     def _colorScatterPoints(self, cbar: pg.ColorBarItem) -> None:
         if self.scatter is not None and self.scatterZVals is not None:
             z_norm = self._normalizeColors(self.scatterZVals, cbar.levels())
-            colors = self.colorbar.colorMap().mapToQColor(z_norm)
-            self.scatter.setBrush(colors)
+            z_norm = np.ma.filled(np.ma.asarray(z_norm, dtype=float), np.nan)
+
+            # look up the brush for each point, instead of creating a color
+            # for each of them. invalid values get the last (transparent) brush.
+            n = self.scatterColors
+            idx = np.clip(np.rint(z_norm * (n - 1)), 0, n - 1)
+            idx = np.where(np.isfinite(idx), idx, n).astype(int)
+            self.scatter.setBrush(self._getScatterBrushes()[idx])
+
+    def _getScatterBrushes(self) -> np.ndarray:
+        """Brushes for the :attr:`scatterColors` colors of the colormap,
+        followed by a transparent brush."""
+        cmap = self.colorbar.colorMap()
+        if self._scatterBrushes is None or self._scatterBrushesCmap is not cmap:
+            colors = cmap.mapToQColor(np.linspace(0, 1, self.scatterColors))
+            brushes = [pg.mkBrush(c) for c in colors] + [pg.mkBrush(0, 0, 0, 0)]
+            self._scatterBrushes = np.empty(len(brushes), dtype=object)
+            self._scatterBrushes[:] = brushes
+            self._scatterBrushesCmap = cmap
+        return self._scatterBrushes
 
     def _normalizeColors(self, z: np.ndarray, levels: Tuple[float, float]) -> np.ndarray:
         scale = levels[1] - levels[0]
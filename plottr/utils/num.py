@@ -2,7 +2,7 @@
 
 Tools for numerical operations.
 """
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -131,7 +131,8 @@ def arrays_equal(a: np.ndarray, b: np.ndarray,
 
 def array1d_to_meshgrid(arr: Union[List, np.ndarray],
                         target_shape: Tuple[int, ...],
-                        copy: bool = True) -> np.ndarray:
+                        copy: bool = True,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
     """
     reshape an array to a target shape.
 
@@ -142,28 +143,42 @@ def array1d_to_meshgrid(arr: Union[List, np.ndarray],
     :param arr: input array
     :param target_shape: desired output shape
     :param copy: whether to make a copy before the operation.
+    :param out: array to write the result into, if a new array is needed
+        (i.e., when copying or padding). Used only if it has the target shape
+        and the dtype of the result; otherwise, a new array is allocated.
+        Passing the result of a previous call avoids allocating the output
+        again when the data of an incomplete grid grows.
     :return: re-shaped array.
     """
     if not isinstance(arr, np.ndarray):
         localarr = np.array(arr)
     else:
         localarr = arr
-
-    if copy:
-        localarr = localarr.copy()
     localarr = localarr.reshape(-1)
 
+    target_shape = tuple(target_shape)
     newsize = int(np.prod(target_shape))
-    if newsize < localarr.size:
+    if newsize <= localarr.size:
         localarr = localarr[:newsize]
-    elif newsize > localarr.size:
-        if localarr.dtype in FLOATTYPES:
-            fill = np.zeros(newsize - localarr.size) * np.nan
-        else:
-            fill = np.array((newsize - localarr.size) * [None])
-        localarr = np.append(localarr, fill)
+        if not copy:
+            return localarr.reshape(target_shape)
+        elif isinstance(localarr, np.ma.MaskedArray):
+            return localarr.copy().reshape(target_shape)
+        dtype = localarr.dtype
+    elif localarr.dtype in FLOATTYPES:
+        dtype = np.result_type(localarr.dtype, np.float64)
+    else:
+        dtype = np.dtype(object)
 
-    return localarr.reshape(target_shape)
+    # allocate the output once, and copy the data (and padding) into it.
+    if out is None or out.shape != target_shape or out.dtype != dtype \
+            or not out.flags.c_contiguous:
+        out = np.empty(target_shape, dtype=dtype)
+    flat = out.reshape(-1)
+    flat[:localarr.size] = localarr
+    if newsize > localarr.size:
+        flat[localarr.size:] = np.nan if dtype in FLOATTYPES else None
+    return out
 
 
 def _find_switches(arr: np.ndarray,
@@ -349,6 +364,142 @@ def guess_grid_from_sweep_direction(**axes: np.ndarray) \
     return names[::-1].tolist(), tuple(shape[::-1])
 
 
+class SweepGridGuesser:
+    """Stateful version of :func:`guess_grid_from_sweep_direction` for data
+    that grows over time, like the data of a running sweep.
+
+    After the grid has been guessed from all axes values, subsequent calls to
+    :meth:`guess` only check whether the values added since then continue the
+    pattern that was found, which costs O(number of new values):
+
+    * axes that are faster than the growing (outermost changing) axis repeat
+      with their period,
+    * the growing axis does not change its sweep direction,
+    * axes that are slower than the growing axis stay constant.
+
+    If that is not the case, or the data is not an extension of the data seen
+    before, all values are analyzed again.
+    """
+
+    def __init__(self) -> None:
+        #: Number of times all values have been analyzed.
+        self.nscans = 0
+
+        self._names: Optional[List[str]] = None
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._growing = 0
+        self._size = 0
+        self._last: Dict[str, Any] = {}
+        self._direction = 0.
+        self._threshold = 0.
+
+    def reset(self) -> None:
+        """Forget the grid found in the data."""
+        self._names = None
+        self._shape = None
+        self._size = 0
+        self._last = {}
+
+    def guess(self, **axes: np.ndarray) \
+            -> Union[None, Tuple[List[str], Tuple[int, ...]]]:
+        """Determine order and shape of the axes data.
+
+        :param axes: All axes values as keyword args, given as 1d numpy arrays.
+        :return: See :func:`guess_grid_from_sweep_direction`.
+        :raises: `ValueError` for incorrect input
+        """
+        arrs = {n: np.asarray(v) for n, v in axes.items()}
+        if self._continues_pattern(arrs):
+            assert self._names is not None and self._shape is not None
+            size = arrs[self._names[0]].size
+            inner = int(np.prod(self._shape[self._growing + 1:]))
+            shape = list(self._shape)
+            shape[self._growing] = -(-size // inner)
+            self._shape = tuple(shape)
+            self._remember(arrs)
+            return self._names.copy(), self._shape
+
+        ret = guess_grid_from_sweep_direction(**arrs)
+        self.nscans += 1
+        self._analyze(arrs, ret)
+        return ret
+
+    def _remember(self, arrs: Dict[str, np.ndarray]) -> None:
+        self._size = arrs[next(iter(arrs))].size
+        self._last = {n: a[self._size - 1] for n, a in arrs.items()}
+
+    def _analyze(self, arrs: Dict[str, np.ndarray],
+                 result: Union[None, Tuple[List[str], Tuple[int, ...]]]) -> None:
+        """Set up the state after all values have been analyzed."""
+        self.reset()
+        if result is None or \
+                any(a.dtype.kind not in 'iuf' for a in arrs.values()):
+            return
+
+        names, shape = result
+        growing = next((i for i, n in enumerate(shape) if n > 1), len(shape) - 1)
+        size = arrs[names[0]].size
+        if size == 0 or \
+                (growing < len(shape) - 1 and size <= np.prod(shape[growing + 1:])):
+            # faster axes have not repeated yet; we don't know their periods.
+            return
+
+        vals = arrs[names[growing]]
+        valid = vals[np.isfinite(vals)]
+        if valid.size == 0:
+            return
+        lo, hi = np.percentile(valid, [25, 75])
+        self._threshold = float(np.abs(hi - lo))
+        self._direction = 0.
+        if vals.size > 1:
+            self._direction = float(np.sign(np.nanmean(np.diff(vals))))
+
+        self._names = list(names)
+        self._shape = tuple(shape)
+        self._growing = growing
+        self._remember(arrs)
+
+    def _continues_pattern(self, arrs: Dict[str, np.ndarray]) -> bool:
+        """Check whether the axes values are an extension of the ones seen
+        before, and the new values are consistent with the known grid."""
+        if self._names is None or self._shape is None \
+                or set(arrs.keys()) != set(self._names):
+            return False
+
+        size = self._size
+        newsize = arrs[self._names[0]].size
+        if newsize < size or any(a.ndim != 1 or a.size != newsize or
+                                 a.dtype.kind not in 'iuf'
+                                 for a in arrs.values()):
+            return False
+        if not all(arrays_equal(arrs[n][size - 1:size], np.array([v]))
+                   for n, v in self._last.items()):
+            return False
+
+        for i, name in enumerate(self._names):
+            vals = arrs[name]
+            if i < self._growing:
+                if not arrays_equal(vals[size:], np.full(newsize - size, self._last[name])):
+                    return False
+            elif i == self._growing:
+                deltas = np.diff(vals[size - 1:])
+                if self._direction == 0:
+                    reverse = np.abs(deltas) > self._threshold
+                else:
+                    reverse = (np.sign(deltas) == -self._direction) \
+                              & (np.abs(deltas) >= self._threshold)
+                if np.any(reverse):
+                    return False
+            else:
+                period = int(np.prod(self._shape[i:]))
+                start = max(size, period)
+                if not arrays_equal(vals[start:], vals[start - period:newsize - period],
+                                    rtol=1e-8):
+                    return False
+
+        return True
+
+
 def crop2d_rows_cols(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """
     Get row and col idxs that are completely invalid in a 2d array.
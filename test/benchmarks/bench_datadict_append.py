@@ -0,0 +1,72 @@
+"""Benchmark for adding data to a :class:`DataDict` record by record.
+
+Adds single records with :meth:`DataDict.add_data` and with
+:meth:`DataDict.append`, and reports the total time and the time per record
+for the first and the last block of records (which shows whether the cost
+per record grows with the size of the dataset).
+
+Usage::
+
+    python test/benchmarks/bench_datadict_append.py [--nrecords 1000000]
+"""
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+from plottr.data import datadict as dd
+
+
+def _mkdata() -> dd.DataDict:
+    return dd.DataDict(
+        x=dict(values=np.array([])),
+        y=dict(values=np.array([])),
+        z=dict(values=np.array([]), axes=['x', 'y']),
+    )
+
+
+def run(label: str, nrecords: int,
+        add: Callable[[dd.DataDict, int], None]) -> None:
+    data = _mkdata()
+    block = max(nrecords // 100, 1)
+    t0 = time.perf_counter()
+    t_block = t0
+    first_block = 0.
+    for i in range(nrecords):
+        add(data, i)
+        if i + 1 == block:
+            first_block = time.perf_counter() - t_block
+        if i + 1 == nrecords - block:
+            t_block = time.perf_counter()
+    t1 = time.perf_counter()
+    assert data.nrecords() == nrecords
+    print(f"{label:>9}: {nrecords} records in {t1 - t0:8.2f} s; "
+          f"per record: first {first_block / block * 1e6:6.1f} us, "
+          f"last {(t1 - t_block) / block * 1e6:6.1f} us")
+
+
+def _add_data(data: dd.DataDict, i: int) -> None:
+    data.add_data(x=i, y=2 * i, z=3 * i)
+
+
+def _append(data: dd.DataDict, i: int) -> None:
+    rec = dd.DataDict(
+        x=dict(values=np.array([i])),
+        y=dict(values=np.array([2 * i])),
+        z=dict(values=np.array([3 * i]), axes=['x', 'y']),
+    )
+    data.append(rec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nrecords', type=int, default=10**6)
+    args = parser.parse_args()
+
+    run('add_data', args.nrecords, _add_data)
+    run('append', args.nrecords, _append)
+
+
+if __name__ == '__main__':
+    main()
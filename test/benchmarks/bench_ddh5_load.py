@@ -0,0 +1,80 @@
+"""Benchmark for loading DDH5 files with :func:`datadict_from_hdf5`.
+
+Writes a file of the requested size (default: ~1 GB) and reports load time
+and peak RSS for a full load and a structure-only load. Each measurement
+runs in a fresh process, so peak memory is not polluted by earlier runs.
+
+Usage::
+
+    python test/benchmarks/bench_ddh5_load.py [--size-mb 1024] [--keep]
+
+Peak RSS is measured with the `resource` module, i.e., only on unix.
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from plottr.data import datadict as dd
+from plottr.data import datadict_storage as dds
+
+
+def _mkfile(path: Path, size_mb: int, ndeps: int = 4) -> None:
+    nfields = ndeps + 2
+    nrows = int(size_mb * 2**20 / 8 / nfields)
+    x = np.repeat(np.arange(nrows // 1000 + 1), 1000)[:nrows].astype(float)
+    y = np.tile(np.linspace(0, 1, 1000), nrows // 1000 + 1)[:nrows]
+    fields: Dict[str, Any] = dict(x=dict(values=x), y=dict(values=y))
+    for i in range(ndeps):
+        fields[f'z_{i}'] = dict(values=np.random.rand(nrows), axes=['x', 'y'])
+    dds.datadict_to_hdf5(dd.DataDict(**fields), path,
+                         append_mode=dds.AppendMode.none)
+
+
+def _load(path: Path, structure_only: bool, q: Any) -> None:
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    dds.datadict_from_hdf5(path, structure_only=structure_only)
+    t1 = time.perf_counter()
+    rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    q.put((t1 - t0, (rss1 - rss0) / 1024))
+
+
+def run(path: Path, structure_only: bool) -> None:
+    q: Any = mp.Queue()
+    p = mp.Process(target=_load, args=(path, structure_only, q))
+    p.start()
+    dt, drss = q.get()
+    p.join()
+    label = 'structure only' if structure_only else 'full load'
+    print(f"{label:>16}: {dt * 1e3:10.1f} ms, peak RSS increase {drss:8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--keep', action='store_true',
+                        help='do not delete the test file')
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp())
+    path = tmpdir / 'bench.ddh5'
+    _mkfile(path, args.size_mb)
+    print(f"file: {path} ({path.stat().st_size / 2**20:.0f} MB)")
+
+    try:
+        run(path, structure_only=True)
+        run(path, structure_only=False)
+    finally:
+        if not args.keep:
+            path.unlink()
+            tmpdir.rmdir()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark for writing data point by point with :class:`DDH5Writer`.
+
+Reports the throughput (points/sec) of single-point :meth:`DDH5Writer.add_data`
+calls for the different writer modes.
+
+Usage::
+
+    python test/benchmarks/bench_ddh5_write.py [--npoints 20000]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Any, Dict
+
+from plottr.data import datadict as dd
+from plottr.data import datadict_storage as dds
+
+
+MODES: Dict[str, Dict[str, Any]] = {
+    'default': {},
+    'streaming': dict(streaming=True),
+    'keep open': dict(keep_open=True),
+    'keep open, flush every 1 s': dict(keep_open=True, flush_interval=1.),
+    'streaming, keep open, flush every 1 s': dict(streaming=True, keep_open=True,
+                                                  flush_interval=1.),
+}
+
+
+def run(npoints: int, **kwargs: Any) -> float:
+    basedir = tempfile.mkdtemp()
+    try:
+        data = dd.str2dd("x; y; z(x, y)")
+        t0 = time.perf_counter()
+        with dds.DDH5Writer(data, basedir=basedir, **kwargs) as writer:
+            for i in range(npoints):
+                writer.add_data(x=i // 100, y=i % 100, z=i)
+        return npoints / (time.perf_counter() - t0)
+    finally:
+        shutil.rmtree(basedir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--npoints', type=int, default=20000)
+    args = parser.parse_args()
+
+    for label, kwargs in MODES.items():
+        print(f"{label:>40}: {run(args.npoints, **kwargs):10.0f} points/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark for guessing grid shapes with :func:`guess_shape_from_datadict`.
+
+For each dataset from :mod:`plottr.utils.testdata`, compares the time of
+inferring the shape once per dependent (as it was done before) with the
+time of :func:`guess_shape_from_datadict`, which infers the shape once per
+distinct set of axes.
+
+Usage::
+
+    python test/benchmarks/bench_guess_shape.py [--npts 100] [--ndeps 16] [--repeat 5]
+
+Measured with the defaults (best of 5)::
+
+                   dataset  deps axsets  per dep. (ms)  memoized (ms)  speedup
+             1d_scalar_cos    16      1           5.09           0.36    14.2x
+             2d_scalar_cos    16      1          12.86           0.89    14.5x
+             two_1d_traces     2      1           0.64           0.35     1.8x
+                one_2d_set     1      1           0.81           0.77     1.0x
+         two_compatible_2d     2      1           1.60           0.83     1.9x
+       three_compatible_3d     3      1           4.40           1.48     3.0x
+     three_incompatible_3d     3      3           4.28           4.16     1.0x
+"""
+import argparse
+import time
+from typing import Callable, Dict, Tuple, Union, List
+
+from plottr.data import datadict as dd
+from plottr.utils import num
+from plottr.utils.testdata import testdata
+
+
+def _per_dependent(data: dd.DataDict) \
+        -> Dict[str, Union[None, Tuple[List[str], Tuple[int, ...]]]]:
+    shapes = {}
+    for d in data.dependents():
+        axes = {a: data.data_vals(a) for a in data.axes(d)}
+        shapes[d] = num.guess_grid_from_sweep_direction(**axes)
+    return shapes
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--npts', type=int, default=100,
+                        help='points per axis (fewer for the 3d sets)')
+    parser.add_argument('--ndeps', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    n, n3 = args.npts, max(args.npts // 4, 2)
+    datasets = {
+        '1d_scalar_cos': testdata.get_1d_scalar_cos_data(n * n, args.ndeps),
+        '2d_scalar_cos': testdata.get_2d_scalar_cos_data(n, n, args.ndeps),
+        'two_1d_traces': testdata.two_1d_traces(n * n),
+        'one_2d_set': testdata.one_2d_set(n, n),
+        'two_compatible_2d': testdata.two_compatible_noisy_2d_sets(n, n),
+        'three_compatible_3d': testdata.three_compatible_3d_sets(n3, n3, n3),
+        'three_incompatible_3d': testdata.three_incompatible_3d_sets(n3, n3, n3),
+    }
+
+    print(f"{'dataset':>22} {'deps':>5} {'axsets':>6} "
+          f"{'per dep. (ms)':>14} {'memoized (ms)':>14} {'speedup':>8}")
+    for name, data in datasets.items():
+        ndeps = len(data.dependents())
+        naxsets = len(set(tuple(data.axes(d)) for d in data.dependents()))
+        assert dd.guess_shape_from_datadict(data) == _per_dependent(data)
+
+        t_old = _best_time(lambda: _per_dependent(data), args.repeat)
+        t_new = _best_time(lambda: dd.guess_shape_from_datadict(data), args.repeat)
+        print(f"{name:>22} {ndeps:>5} {naxsets:>6} "
+              f"{t_old * 1e3:>14.2f} {t_new * 1e3:>14.2f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
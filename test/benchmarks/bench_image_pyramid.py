@@ -0,0 +1,76 @@
+"""Benchmark for showing large 2D color plots with matplotlib.
+
+Compares opening an image plot (:func:`plotImage` and a first draw of the
+figure) at full resolution with the image pyramid, which only draws the
+image at screen resolution, as well as zooming into the pyramid.
+
+Usage::
+
+    python test/benchmarks/bench_image_pyramid.py [--nx 10000] [--ny 10000] [--no-full]
+"""
+import argparse
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from plottr.plot.mpl import plotting
+
+
+def _open(xx: np.ndarray, yy: np.ndarray, zz: np.ndarray) -> Figure:
+    fig = Figure(figsize=(8, 6), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    plotting.plotImage(ax, xx, yy, zz)
+    fig.canvas.draw()
+    return fig
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nx', type=int, default=10_000)
+    parser.add_argument('--ny', type=int, default=10_000)
+    parser.add_argument('--no-full', action='store_true',
+                        help="don't compare with drawing at full resolution "
+                             "(which needs several copies of the image in memory)")
+    args = parser.parse_args()
+
+    x = np.linspace(0, 1, args.nx)
+    y = np.linspace(0, 1, args.ny)
+    # read-only views of the grid, to keep the memory for the data low.
+    xx = np.broadcast_to(x[:, None], (args.nx, args.ny))
+    yy = np.broadcast_to(y[None, :], (args.nx, args.ny))
+    zz = np.sin(40 * x)[:, None] * np.cos(30 * y)[None, :]
+    print(f"{args.nx} x {args.ny} image")
+
+    t0 = time.perf_counter()
+    fig = _open(xx, yy, zz)
+    t_pyramid = time.perf_counter() - t0
+
+    ax = fig.axes[0]
+    t0 = time.perf_counter()
+    for i in range(10):
+        ax.set_xlim(0.4 + 0.01 * i, 0.45 + 0.01 * i)
+        ax.set_ylim(0.4, 0.45)
+        fig.canvas.draw()
+    t_zoom = (time.perf_counter() - t0) / 10
+    print(f"          pyramid: {t_pyramid:8.3f} s")
+    print(f"   pan (per draw): {t_zoom:8.3f} s")
+    if args.no_full:
+        return
+
+    threshold = plotting.IMAGE_DECIMATE_ABOVE
+    plotting.IMAGE_DECIMATE_ABOVE = zz.size
+    t0 = time.perf_counter()
+    _open(xx, yy, zz)
+    t_full = time.perf_counter() - t0
+    plotting.IMAGE_DECIMATE_ABOVE = threshold
+
+    print(f"  full resolution: {t_full:8.3f} s  ({t_full / t_pyramid:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark for redrawing 2D color scatter plots with pyqtgraph.
+
+Compares coloring the points of a :class:`PlotWithColorbar` scatter plot by
+creating a color per point (as it was done before) with the brush lookup
+table used now, and the complex-data check by looping over the values with
+the dtype check. Also times a complete redraw with
+:meth:`PlotWithColorbar.setScatter2d`.
+
+Usage::
+
+    python test/benchmarks/bench_pyqtgraph_scatter.py [--npts 1000000] [--repeat 3]
+"""
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+import pyqtgraph as pg
+
+from plottr.plot.pyqtgraph.plots import PlotWithColorbar
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _color_per_point(plot: PlotWithColorbar) -> None:
+    assert plot.scatter is not None and plot.scatterZVals is not None
+    z_norm = plot._normalizeColors(plot.scatterZVals, plot.colorbar.levels())
+    colors = plot.colorbar.colorMap().mapToQColor(z_norm)
+    plot.scatter.setBrush(colors)
+
+
+def _complex_loop(dvals: np.ndarray) -> bool:
+    for val in dvals:
+        try:
+            if not all(val.imag == 0):
+                return True
+        except:
+            if not val.imag == 0:
+                return True
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--npts', type=int, default=10**6)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = pg.mkQApp()
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(size=(2, args.npts))
+    z = np.cos(4 * x) * np.sin(3 * y)
+
+    plot = PlotWithColorbar()
+    plot.setScatter2d(x, y, z)
+    plot.show()
+    app.processEvents()
+
+    t_old = _best_time(lambda: _color_per_point(plot), args.repeat)
+    t_new = _best_time(lambda: plot._colorScatterPoints(plot.colorbar), args.repeat)
+    t_redraw = _best_time(lambda: (plot.setScatter2d(x, y, z), app.processEvents()),
+                          args.repeat)
+    print(f"coloring {args.npts} points:")
+    print(f"  per point: {t_old:8.3f} s")
+    print(f"     lookup: {t_new:8.3f} s  ({t_old / t_new:.1f}x)")
+    print(f"full redraw: {t_redraw:8.3f} s")
+
+    t_old = _best_time(lambda: _complex_loop(z), args.repeat)
+    t_new = _best_time(lambda: np.issubdtype(z.dtype, np.complexfloating), args.repeat)
+    print("complex check on real data:")
+    print(f"       loop: {t_old:8.3f} s")
+    print(f"      dtype: {t_new:8.6f} s")
+
+
+if __name__ == '__main__':
+    main()
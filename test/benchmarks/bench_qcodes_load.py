@@ -0,0 +1,77 @@
+"""Benchmark for loading qcodes datasets into DataDicts.
+
+Creates a database with a complex-valued 2D sweep (default: 963 x 1001
+points, like the one in the performance notes), and compares the time of
+reading the values through the qcodes dataset cache with reading them
+directly from the results table (:func:`read_parameter_data_from_db`).
+Each measurement loads the dataset freshly, so the cache starts empty.
+
+Usage::
+
+    python test/benchmarks/bench_qcodes_load.py [--nx 963] [--ny 1001] [--keep]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import qcodes as qc
+from qcodes import initialise_or_create_database_at, load_or_create_experiment
+from qcodes.dataset.data_set import load_by_id
+
+from plottr.data import qcodes_dataset as qcds
+
+
+def _mkdb(path: Path, nx: int, ny: int) -> int:
+    initialise_or_create_database_at(str(path))
+    exp = load_or_create_experiment('bench', sample_name='bench')
+    m = qc.Measurement(exp=exp)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('y')
+    m.register_custom_parameter('z', setpoints=['x', 'y'], paramtype='complex')
+    y = np.linspace(-1, 1, ny)
+    with m.run() as datasaver:
+        for x in np.linspace(0, 1, nx):
+            z = np.exp(1j * x * y)
+            datasaver.add_result(('x', np.full(ny, x)), ('y', y), ('z', z))
+    return datasaver.dataset.captured_run_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nx', type=int, default=963)
+    parser.add_argument('--ny', type=int, default=1001)
+    parser.add_argument('--keep', action='store_true',
+                        help="don't delete the database file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    path = Path(tmpdir) / 'bench.db'
+    t0 = time.perf_counter()
+    run_id = _mkdb(path, args.nx, args.ny)
+    print(f"created {path} ({path.stat().st_size / 2**20:.0f} MB) "
+          f"in {time.perf_counter() - t0:.1f} s")
+
+    ds = load_by_id(run_id)
+    t0 = time.perf_counter()
+    cached = qcds.parameter_data_to_datadicts(ds, ds.cache.data())
+    t_cache = time.perf_counter() - t0
+
+    ds = load_by_id(run_id)
+    t0 = time.perf_counter()
+    from_db = qcds.read_parameter_data_from_db(ds)
+    assert from_db is not None
+    direct = qcds.parameter_data_to_datadicts(ds, from_db[0])
+    t_direct = time.perf_counter() - t0
+
+    assert direct == cached
+    print(f"   cache: {t_cache:8.3f} s")
+    print(f"  direct: {t_direct:8.3f} s  ({t_cache / t_direct:.1f}x)")
+
+    if not args.keep:
+        path.unlink()
+
+
+if __name__ == '__main__':
+    main()
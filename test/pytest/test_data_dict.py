@@ -1,3 +1,5 @@
+import pickle
+
 import numpy as np
 import pytest
 
@@ -79,6 +81,58 @@ def test_add_data():
     )
 
 
+def test_add_data_record_by_record():
+    """Test appending many single records, and that earlier copies are unaffected."""
+    dd = DataDict(
+        x=dict(values=np.array([0])),
+        y=dict(values=np.array([[0, 0]]), axes=['x']),
+    )
+    snapshots = []
+    for i in range(1, 100):
+        dd.add_data(x=[i], y=[[i, 2 * i]])
+        snapshots.append(dd.copy(deep=False))
+
+    assert dd.nrecords() == 100
+    assert num.arrays_equal(dd.data_vals('x'), np.arange(100))
+    assert num.arrays_equal(dd.data_vals('y'),
+                            np.vstack([np.arange(100), 2 * np.arange(100)]).T)
+    for i, snapshot in enumerate(snapshots):
+        assert num.arrays_equal(snapshot.data_vals('x'), np.arange(i + 2))
+
+    # values that need a different dtype.
+    dd.add_data(x=[0.5], y=[[0.5, 1.0]])
+    assert dd.data_vals('x').dtype == float
+    assert dd.data_vals('x')[-1] == 0.5
+    assert num.arrays_equal(dd.data_vals('x')[:100], np.arange(100))
+
+    # replacing values by hand is respected.
+    dd['x']['values'] = np.arange(101) * 2
+    dd.add_data(x=[1], y=[[1, 1]])
+    assert num.arrays_equal(dd.data_vals('x'), np.append(np.arange(101) * 2, 1))
+
+    pickled = pickle.loads(pickle.dumps(dd))
+    assert pickled == dd
+    pickled.add_data(x=[2], y=[[2, 2]])
+    assert pickled.nrecords() == dd.nrecords() + 1
+
+
+def test_add_data_rejects_bad_shapes():
+    """Records that don't fit the shapes of the data are rejected."""
+    dd = DataDict(
+        x=dict(values=np.array([0])),
+        y=dict(values=np.array([[0, 0]]), axes=['x']),
+    )
+    for i in range(1, 10):
+        dd.add_data(x=[i], y=[[i, 2 * i]])
+
+    with pytest.raises(ValueError):
+        dd.add_data(x=[10], y=[[10, 20, 30]])
+    with pytest.raises(ValueError):
+        dd.add_data(x=[[10, 11]], y=[[10, 20]])
+    assert dd.nrecords() == 10
+    assert dd.shapes() == {'x': (10,), 'y': (10, 2)}
+
+
 def test_expansion_simple():
     """Test whether simple expansion of nested parameters works."""
 
@@ -321,6 +321,33 @@ def test_combine_ddicts():
                            z_0=dict(values=z[::-1], axes=['x', 'y']))
     assert combined_dd == expected_dd
 
+    # fourth case: shared axes that are equal, but not the same arrays, are
+    # merged; without copying, the values of the first input are shared.
+    dd2 = DataDict(x=dict(values=x.copy()),
+                   y=dict(values=y),
+                   z_1=dict(values=z, axes=['x', 'y']))
+    dd2.validate()
+    combined_dd = combine_datadicts(dd1, dd2, copy=False)
+    assert combined_dd.axes('z_1') == ['x', 'y']
+    assert combined_dd.data_vals('x') is dd1.data_vals('x')
+    assert combined_dd.dependents() == ['z', 'z_1']
+
+
+def test_values_fingerprint_cache():
+    """Fingerprints are not re-used for a different array with the same id."""
+    from plottr.data.datadict import _values_fingerprint, _same_values
+    cache = {}
+    a = np.arange(5.)
+    fp = _values_fingerprint(a, cache)
+    assert _values_fingerprint(a, cache) is fp
+
+    # simulate that a is freed, and its id re-used by a different array.
+    b = np.arange(5.) + 1
+    cache[id(b)] = cache.pop(id(a))
+    del a
+    assert _values_fingerprint(b, cache) != fp
+    assert not _same_values(b, np.arange(5.), cache)
+
 
 def test_creation_from_string():
     """Test simplified datadict generation"""
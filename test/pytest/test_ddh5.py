@@ -2,10 +2,13 @@
 
 from pathlib import Path
 from multiprocessing import Process
+from threading import Timer
 import time
 from shutil import rmtree
 
 import numpy as np
+import pytest
+import h5py
 
 from plottr.data import datadict as dd
 from plottr.data import datadict_storage as dds
@@ -61,6 +64,39 @@ def test_file_lock_creation_and_deletion():
     FILEPATH.unlink()
 
 
+def test_file_lock_wait():
+    lock_path = FILEPATH.parent.joinpath("~" + str(FILEPATH.stem) + '.lock')
+    with dds.FileOpener(FILEPATH, 'a') as f:
+        pass
+    assert dds.FileOpener.recent_stats[-1].lock_wait < 0.1
+
+    # the opener wakes up as soon as the lock of another process disappears.
+    lock_path.touch()
+    Timer(0.6, lock_path.unlink).start()
+    opener = dds.FileOpener(FILEPATH, 'r', test_delay=10)
+    with opener as f:
+        assert lock_path.is_file()
+    assert not lock_path.is_file()
+    assert opener.stats.event_driven
+    assert 0.6 <= opener.stats.lock_wait < 0.9
+    assert opener.stats.open_attempts == 1
+    assert dds.FileOpener.recent_stats[-1] is opener.stats
+
+    # timeout: the lock stays.
+    lock_path.touch()
+    opener = dds.FileOpener(FILEPATH, 'r', timeout=0.2)
+    try:
+        with opener as f:
+            pass
+    except RuntimeError:
+        pass
+    assert lock_path.is_file()
+    assert opener.stats.lock_wait >= 0.2
+
+    lock_path.unlink()
+    FILEPATH.unlink()
+
+
 def test_basic_storage_and_retrieval():
     x = np.arange(3)
     y = np.repeat(np.linspace(0, 1, 5).reshape(1, -1), 3, 0)
@@ -87,6 +123,80 @@ def test_basic_storage_and_retrieval():
     FILEPATH.unlink()
 
 
+def test_lazy_retrieval():
+    x = np.arange(3)
+    y = np.repeat(np.linspace(0, 1, 5).reshape(1, -1), 3, 0)
+    z = np.arange(y.size).reshape(y.shape)
+
+    data = dd.DataDict(
+        x=dict(values=x, unit='A'),
+        y=dict(values=y, unit='B'),
+        z=dict(values=z, axes=['x', 'y'], unit='C'),
+    )
+    dds.datadict_to_hdf5(data, str(FILEPATH), append_mode=dds.AppendMode.none)
+
+    # a contiguous dataset, as written by other tools.
+    with h5py.File(FILEPATH, 'a') as f:
+        f['data'].create_dataset('w', data=z + 1.)
+        f['data']['w'].attrs['axes'] = np.array(['x', 'y'], dtype=h5py.string_dtype())
+        f['data']['w'].attrs['unit'] = 'D'
+        dds.add_cur_time_attr(f['data']['w'])
+    data['w'] = dict(values=z + 1., axes=['x', 'y'], unit='D')
+
+    datafromfile = dds.datadict_from_hdf5(str(FILEPATH), lazy=True)
+    for k, v in datafromfile.data_items():
+        assert isinstance(v['values'], dd.LazyArray)
+        assert not v['values'].loaded
+    assert datafromfile.shapes() == data.shapes()
+    assert datafromfile.nrecords() == 3
+
+    assert np.all(datafromfile['w']['values'] - 1 == z)
+    assert datafromfile['w']['values'].loaded
+    assert not datafromfile['z']['values'].loaded
+
+    w = datafromfile.data_vals('w')
+    assert isinstance(w, np.memmap)
+    assert np.all(w == z + 1.)
+
+    zz = datafromfile.data_vals('z')
+    assert type(zz) is np.ndarray
+    assert np.all(zz == z)
+
+    assert _clean_from_file(datafromfile) == data
+
+    # release the memory map before removing the file.
+    del w, datafromfile
+    FILEPATH.unlink()
+
+
+def test_partial_retrieval():
+    x = np.arange(3)
+    y = np.arange(3) + 10
+    data = dd.DataDict(
+        x=dict(values=x),
+        y=dict(values=y),
+        z1=dict(values=x ** 2, axes=['x']),
+        z2=dict(values=x * y, axes=['x', 'y']),
+    )
+    assert data.validate()
+    dds.datadict_to_hdf5(data, str(FILEPATH), append_mode=dds.AppendMode.none)
+
+    datafromfile = _clean_from_file(
+        dds.datadict_from_hdf5(str(FILEPATH), fields=['z1']))
+    assert [k for k, _ in datafromfile.data_items()] == ['x', 'z1']
+    assert datafromfile == data.extract(['z1'])
+
+    datafromfile = _clean_from_file(
+        dds.datadict_from_hdf5(str(FILEPATH), fields=['z2']))
+    assert [k for k, _ in datafromfile.data_items()] == ['x', 'y', 'z2']
+    assert datafromfile == data.extract(['z2'])
+
+    with pytest.raises(ValueError):
+        dds.datadict_from_hdf5(str(FILEPATH), fields=['z3'])
+
+    FILEPATH.unlink()
+
+
 def test_appending():
     x = np.arange(3)
     y = np.repeat(np.linspace(0, 1, 5).reshape(1, -1), 3, 0)
@@ -177,6 +287,69 @@ def test_loader_node(qtbot):
     FILEPATH.unlink()
 
 
+def test_loader_node_incremental(qtbot):
+    dds.DDH5Loader.useUi = False
+
+    x = np.arange(3)
+    y = np.repeat(np.linspace(0, 1, 5).reshape(1, -1), 3, 0)
+    z = np.arange(y.size).reshape(y.shape)
+
+    data = dd.DataDict(
+        x=dict(values=x, unit='A'),
+        y=dict(values=y, unit='B'),
+        z=dict(values=z, axes=['x', 'y'], unit='C'),
+        __desc__='some description',
+    )
+    assert data.validate()
+    dds.datadict_to_hdf5(data, str(FILEPATH), append_mode=dds.AppendMode.none)
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader))
+    node = fc.nodes()['loader']
+    node.incremental = True
+
+    with qtbot.waitSignal(node.loadingWorker.dataLoaded, timeout=1000):
+        node.filepath = str(FILEPATH)
+    qtbot.waitUntil(lambda: fc.outputValues()['dataOut'] is not None,
+                    timeout=2000)
+    assert node.nLoadedRecords == 3
+    resident = node.loadingWorker.data
+
+    # only the new records are read and appended to the resident data.
+    data.add_data(x=[3], y=np.linspace(0, 1, 5).reshape(1, -1),
+                  z=np.arange(5).reshape(1, -1))
+    dds.datadict_to_hdf5(data, str(FILEPATH), append_mode=dds.AppendMode.new)
+    qtbot.waitUntil(lambda: not node.loadingThread.isRunning(), timeout=2000)
+    with qtbot.waitSignal(node.loadingWorker.dataLoaded, timeout=1000):
+        node.update()
+    qtbot.waitUntil(lambda: node.nLoadedRecords == 4, timeout=2000)
+    assert node.loadingWorker.data is resident
+    out = fc.outputValues()['dataOut'].copy()
+    out.pop('__title__')
+    assert _clean_from_file(out) == data
+
+    # nothing new: no data is emitted.
+    qtbot.waitUntil(lambda: not node.loadingThread.isRunning(), timeout=2000)
+    with qtbot.waitSignal(node.loadingWorker.dataLoaded, timeout=1000) as blocker:
+        node.update()
+    assert blocker.args == [None]
+
+    # re-created file with fewer records triggers a full reload.
+    data = data.extract('z')
+    data['x']['values'] = data['x']['values'][:2]
+    data['y']['values'] = data['y']['values'][:2]
+    data['z']['values'] = data['z']['values'][:2]
+    dds.datadict_to_hdf5(data, str(FILEPATH), append_mode=dds.AppendMode.none)
+    qtbot.waitUntil(lambda: not node.loadingThread.isRunning(), timeout=2000)
+    with qtbot.waitSignal(node.loadingWorker.dataLoaded, timeout=1000):
+        node.update()
+    qtbot.waitUntil(lambda: node.nLoadedRecords == 2, timeout=2000)
+    out = fc.outputValues()['dataOut'].copy()
+    out.pop('__title__')
+    assert _clean_from_file(out) == data
+
+    FILEPATH.unlink()
+
+
 # tests for the writer class and concurrent w/r access
 
 def _mkdatachunk(start, nrows, npts=1):
@@ -202,6 +375,110 @@ def test_writer():
     rmtree('./TESTDATA')
 
 
+def test_streaming_writer():
+    dataset = dd.str2dd("x[a.u.]; y[a.u.](x)")
+    with dds.DDH5Writer(dataset, basedir='./TESTDATA', streaming=True,
+                        buffer_size=4, expected_nrecords=10) as writer:
+        for i in range(10):
+            x = _mkdatachunk(i, 1, 1)
+            writer.add_data(x=x, y=x**2)
+
+            # only full buffers are written before closing.
+            assert writer.nrecords_written == 4 * ((i + 1) // 4)
+            assert dataset.nrecords() == 0
+
+    assert writer.nrecords_written == 10
+    dataset_from_file = dds.datadict_from_hdf5(writer.filepath)
+    assert '__last_change_time_sec__' in dataset_from_file
+    assert '__close_time_sec__' in dataset_from_file
+
+    ref_dataset = dd.str2dd("x[a.u.]; y[a.u.](x)")
+    ref_dataset.add_data(x=np.arange(10).reshape(-1, 1),
+                         y=np.arange(10).reshape(-1, 1)**2)
+    ref_dataset.add_meta('dataset.name', '')
+    assert _clean_from_file(dataset_from_file) == ref_dataset
+
+    with dds.FileOpener(writer.filepath, 'r') as f:
+        assert f['data']['x'].chunks == (10, 1)
+
+    rmtree('./TESTDATA')
+
+
+def test_writer_keep_open_and_flush_interval():
+    dataset = dd.str2dd("x[a.u.]; y[a.u.](x)")
+    with dds.DDH5Writer(dataset, basedir='./TESTDATA', keep_open=True,
+                        flush_interval=3600, buffer_size=3) as writer:
+        lock_path = writer.filepath.parent / f"~{writer.filepath.stem}.lock"
+        assert lock_path.is_file()
+        for i in range(10):
+            x = _mkdatachunk(i, 1, 1)
+            writer.add_data(x=x, y=x**2)
+            assert writer.nrecords_written == 3 * ((i + 1) // 3)
+        assert dataset.nrecords() == 10
+
+    assert not lock_path.is_file()
+    assert writer.nrecords_written == 10
+    dataset_from_file = dds.datadict_from_hdf5(writer.filepath)
+    assert '__last_change_time_sec__' in dataset_from_file
+    assert '__close_time_sec__' in dataset_from_file
+    assert _clean_from_file(dataset_from_file) == dataset
+
+    rmtree('./TESTDATA')
+
+
+def test_swmr_writer_stamps_once(monkeypatch):
+    stamps = []
+    stamp = dds.DDH5Writer._stamp_last_change
+    monkeypatch.setattr(dds.DDH5Writer, '_stamp_last_change',
+                        lambda self: (stamps.append(self._file.swmr_mode), stamp(self)))
+
+    dataset = dd.str2dd("x[a.u.]; y[a.u.](x)")
+    with dds.DDH5Writer(dataset, basedir='./TESTDATA', swmr=True,
+                        flush_interval=0) as writer:
+        for i in range(5):
+            x = _mkdatachunk(i, 1, 1)
+            writer.add_data(x=x, y=x**2)
+            assert writer._file.swmr_mode
+
+    # attributes are only written before SWMR mode is enabled.
+    assert stamps == [False]
+    dataset_from_file = dds.datadict_from_hdf5(writer.filepath)
+    assert '__last_change_time_sec__' in dataset_from_file
+    assert _clean_from_file(dataset_from_file) == dataset
+
+    rmtree('./TESTDATA')
+
+
+def test_swmr_writer_with_meta(monkeypatch):
+    # HDF5 does not allow writing attributes in SWMR mode.
+    set_attr = dds.set_attr
+
+    def checked_set_attr(h5obj, name, val):
+        assert not h5obj.file.swmr_mode
+        set_attr(h5obj, name, val)
+    monkeypatch.setattr(dds, 'set_attr', checked_set_attr)
+
+    dataset = dd.str2dd("x[a.u.]; y[a.u.](x)")
+    dataset.add_meta('sample', 'A')
+    dataset.add_meta('gain', 2.0, data='y')
+    with dds.DDH5Writer(dataset, basedir='./TESTDATA', swmr=True,
+                        flush_interval=0) as writer:
+        for i in range(5):
+            x = _mkdatachunk(i, 1, 1)
+            writer.add_data(x=x, y=x**2)
+            assert writer._file.swmr_mode
+            assert writer.nrecords_written == i + 1
+        dataset.add_meta('sample', 'B')
+
+    # meta data that changes in SWMR mode is written when closing.
+    dataset_from_file = dds.datadict_from_hdf5(writer.filepath)
+    assert dataset_from_file.meta_val('sample') == 'B'
+    assert dataset_from_file.meta_val('gain', data='y') == 2.0
+    assert _clean_from_file(dataset_from_file) == dataset
+
+    rmtree('./TESTDATA')
+
+
 class _Writer(Process):
 
     ncols = 100
@@ -213,9 +490,12 @@ class _Writer(Process):
     def mkdata(self):
         return _mkdatachunk(0, self.nrows_per_rep * self.nreps, self.ncols)
 
+    writer_kwargs = {}
+
     def run(self):
         data = self.mkdata()
-        with dds.DDH5Writer(dd.str2dd("x[W]; y[T](x)"), filepath=self.filepath) as writer:
+        with dds.DDH5Writer(dd.str2dd("x[W]; y[T](x)"), filepath=self.filepath,
+                            **self.writer_kwargs) as writer:
             self.filepath = writer.filepath
             for i in range(self.nreps):
                 chunk = data[i*self.nrows_per_rep:(i+1)*self.nrows_per_rep, ...]
@@ -276,3 +556,45 @@ def test_concurrent_write_and_read():
     assert(_clean_from_file(dataset_from_file) == ref_dataset)
 
     rmtree(str(Path(writer.filepath).parent))
+
+
+class _SWMRWriter(_Writer):
+
+    ncols = 10
+    nreps = 20
+    delay = 0.1
+    writer_kwargs = dict(swmr=True)
+
+
+def test_concurrent_swmr_write_and_read():
+    writer = _SWMRWriter()
+
+    ref_data = writer.mkdata()
+    ref_dataset = dd.DataDict(
+        x=dict(values=ref_data, unit='W'),
+        y=dict(values=ref_data**2, unit='T', axes=['x']),
+    )
+    ref_dataset['__dataset.name__'] = ''
+
+    writer.start()
+    while writer.is_alive() and not Path(writer.filepath).exists():
+        time.sleep(0.1)
+
+    # SWMR readers don't wait for the writer's lock, and see the data grow.
+    nrecords = []
+    while writer.is_alive():
+        data_from_file = dds.datadict_from_hdf5(writer.filepath, swmr=True,
+                                                file_timeout=5)
+        nrecords.append(data_from_file.nrecords())
+        assert data_from_file.nrecords() % writer.nrows_per_rep == 0
+        time.sleep(0.2)
+    writer.join()
+
+    assert len(set(nrecords)) > 1
+    assert nrecords == sorted(nrecords)
+
+    dataset_from_file = dds.datadict_from_hdf5(writer.filepath)
+    assert '__close_time_sec__' in dataset_from_file
+    assert(_clean_from_file(dataset_from_file) == ref_dataset)
+
+    rmtree(str(Path(writer.filepath).parent))
@@ -0,0 +1,180 @@
+import numpy as np
+
+from plottr.plot.decimation import LinePyramid, DECIMATE_ABOVE
+
+
+def test_short_trace_not_decimated():
+    x = np.arange(5.)
+    p = LinePyramid(x, x ** 2)
+    xd, yd = p.decimate(0, 4, pixels=2)
+    assert np.array_equal(xd, x)
+    assert np.array_equal(yd, x ** 2)
+
+
+def test_non_monotonic_not_decimated():
+    x = np.tile(np.arange(1000.), 3)
+    p = LinePyramid(x, np.sin(x))
+    xd, yd = p.decimate(0, 10, pixels=10)
+    assert xd.size == x.size
+
+
+def test_envelope_keeps_extrema():
+    n = 2 ** 16
+    x = np.arange(n, dtype=float)
+    y = np.random.default_rng(0).normal(size=n)
+    y[12345] = 100.
+    y[54321] = -100.
+    p = LinePyramid(x, y)
+
+    xd, yd = p.decimate(pixels=100)
+    assert 200 <= xd.size <= 2 * p.factor * 100 + 4
+    assert np.all(np.diff(xd) > 0)
+    assert yd.max() == 100. and yd.min() == -100.
+    assert xd[0] == 0 and xd[-1] == n - 1
+
+    # every returned point is a point of the trace.
+    assert np.array_equal(y[xd.astype(int)], yd)
+
+
+def test_zoom():
+    n = 2 ** 18
+    x = np.linspace(0, 1, n)
+    y = np.sin(2 * np.pi * 50 * x)
+    p = LinePyramid(x, y)
+
+    xd, yd = p.decimate(0.5, 0.5001, pixels=1000)
+    inside = (xd >= 0.5) & (xd <= 0.5001)
+    # fully resolved: all points in the range are there.
+    assert inside.sum() == ((x >= 0.5) & (x <= 0.5001)).sum()
+    # points outside the view are only the neighbours and the anchors.
+    assert (~inside).sum() <= 6
+
+
+def test_decreasing_x_and_invalid_values():
+    n = 2 ** 15
+    x = np.linspace(1, 0, n)
+    y = np.cos(10 * x)
+    y[100:200] = np.nan
+    x[-10:] = np.nan
+    p = LinePyramid(x, y)
+    assert p.monotonic
+    assert len(p) == n - 10
+
+    xd, yd = p.decimate(pixels=50)
+    assert np.all(np.diff(xd) >= 0)
+    assert np.all(np.isfinite(xd))
+    assert np.nanmax(yd) == np.nanmax(y[:-10])
+
+
+def test_mpl_decimated_line(qtbot):
+    from plottr.plot.mpl.autoplot import AutoPlot
+    from plottr.data.datadict import MeshgridDataDict
+    w = AutoPlot()
+    qtbot.addWidget(w)
+    n = 4 * DECIMATE_ABOVE
+    x = np.linspace(0, 1, n)
+    data = MeshgridDataDict(
+        y=dict(values=np.sin(2 * np.pi * 1000 * x), axes=['x']), x=dict(values=x),
+    )
+    w.setData(data)
+    line = w._figureMaker.plotItems[0].plotReturn[0]
+    assert len(line.get_xdata()) < n
+    ax = line.axes
+    assert ax.get_ylim()[0] <= -1 and ax.get_ylim()[1] >= 1
+
+    ax.set_xlim(0.5, 0.5001)
+    xd = line.get_xdata()
+    assert ((xd >= 0.5) & (xd <= 0.5001)).sum() == ((x >= 0.5) & (x <= 0.5001)).sum()
+
+
+def test_block_reduce():
+    from plottr.plot.decimation import block_reduce
+    arr = np.arange(20.).reshape(4, 5)
+    ret = block_reduce(arr, (2, 2))
+    assert ret.shape == (2, 3)
+    assert ret[0, 0] == np.mean([0, 1, 5, 6])
+    # the last blocks are smaller.
+    assert ret[0, 2] == np.mean([4, 9])
+    assert np.array_equal(block_reduce(arr, (2, 2), 'max'), [[6, 8, 9], [16, 18, 19]])
+
+    arr[0, :2] = np.nan
+    arr[1, :2] = np.nan
+    ret = block_reduce(arr, (2, 2))
+    assert np.isnan(ret[0, 0])
+    assert ret[0, 1] == np.mean([2, 3, 7, 8])
+
+
+def test_image_pyramid_views():
+    from plottr.plot.decimation import ImagePyramid
+    img = np.random.default_rng(0).normal(size=(1000, 2000))
+    p = ImagePyramid(img, (0, 2, 0, 1), tileSize=128)
+
+    # the full view is reduced to screen resolution.
+    v, extent = p.view(pixels=(500, 250))
+    assert 500 <= v.shape[1] < 1000 and 250 <= v.shape[0] < 500
+    assert extent[0] == 0 and extent[2] == 0
+    assert extent[1] >= 2 and extent[3] >= 1
+    assert np.isclose(v.mean(), img.mean())
+
+    # zooming in shows the full resolution, and only the visible tiles.
+    v, extent = p.view((1.0, 1.1), (0.5, 0.55), pixels=(500, 250))
+    assert v.shape[0] < img.shape[0] and v.shape[1] < img.shape[1]
+    assert extent[0] <= 1.0 and extent[1] >= 1.1
+    assert extent[2] <= 0.5 and extent[3] >= 0.55
+    c0, r0 = int(round(extent[0] * 1000)), int(round(extent[2] * 1000))
+    assert np.array_equal(v, img[r0:r0 + v.shape[0], c0:c0 + v.shape[1]])
+
+    # tiles are re-used.
+    ntiles = len(p._tiles)
+    p.view((1.0, 1.1), (0.5, 0.55), pixels=(500, 250))
+    assert len(p._tiles) == ntiles
+
+
+def test_mpl_decimated_image(qtbot, monkeypatch):
+    import plottr.plot.mpl.plotting as mplplotting
+    from plottr.plot.mpl.autoplot import AutoPlot
+    from plottr.data.datadict import MeshgridDataDict
+    monkeypatch.setattr(mplplotting, 'IMAGE_DECIMATE_ABOVE', 10_000)
+
+    w = AutoPlot()
+    qtbot.addWidget(w)
+    xx, yy = np.meshgrid(np.linspace(0, 1, 1500), np.linspace(0, 1, 1000),
+                         indexing='ij')
+    data = MeshgridDataDict(
+        z=dict(values=np.sin(20 * xx) * yy, axes=['x', 'y']),
+        x=dict(values=xx), y=dict(values=yy),
+    )
+    w.setData(data)
+    im = w._figureMaker.plotItems[0].plotReturn
+    assert im.get_array().size < xx.size
+
+    ax = im.axes
+    ax.set_xlim(0.5, 0.51)
+    ax.set_ylim(0.5, 0.51)
+    extent = im.get_extent()
+    assert extent[0] <= 0.5 and extent[1] >= 0.51
+    assert extent[1] - extent[0] < 1
+
+    data2 = data.copy()
+    data2['z']['values'] = 2 * data['z']['values']
+    w.setData(data2)
+    assert w._figureMaker.updated
+    assert w._figureMaker.plotItems[0].plotReturn is im
+
+
+def test_pyqtgraph_decimated_image(qtbot, monkeypatch):
+    import plottr.plot.pyqtgraph.plots as pgplots
+    monkeypatch.setattr(pgplots, 'IMAGE_DECIMATE_ABOVE', 10_000)
+
+    plot = pgplots.PlotWithColorbar()
+    qtbot.addWidget(plot)
+    xx, yy = np.meshgrid(np.linspace(0, 1, 1500), np.linspace(0, 1, 1000),
+                         indexing='ij')
+    plot.setImage(xx, yy, xx * yy)
+    assert isinstance(plot.img, pgplots.PyramidImageItem)
+    assert plot.imagePyramid is not None
+
+    vb = plot.plot.getViewBox()
+    vb.setRange(xRange=(0.5, 0.51), yRange=(0.5, 0.51), padding=0)
+    assert plot.img.image.shape[0] < 1500
+    assert plot.img.dataBounds(0) is not None
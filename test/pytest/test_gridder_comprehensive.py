@@ -14,6 +14,7 @@ from plottr.data.datadict import (
 )
 from plottr.node.tools import linearFlowchart
 from plottr.node.grid import DataGridder, GridOption
+from plottr.utils import num
 from plottr.utils.num import (
     guess_grid_from_sweep_direction, find_direction_period,
     _find_switches, array1d_to_meshgrid,
@@ -207,6 +208,20 @@ class TestArray1dToMeshgrid:
         result = array1d_to_meshgrid(arr, (2, 3))  # needs 6, has 3
         assert result.shape == (2, 3)
 
+    def test_padding_reuses_out(self):
+        arr = np.arange(10, dtype=float)
+        result = array1d_to_meshgrid(arr, (4, 4))
+        arr = np.arange(13, dtype=float)
+        result2 = array1d_to_meshgrid(arr, (4, 4), out=result)
+        assert result2 is result
+        assert np.array_equal(result2.ravel()[:13], arr)
+        assert np.all(np.isnan(result2.ravel()[13:]))
+
+        # a different shape or dtype needs a new array
+        assert array1d_to_meshgrid(arr, (4, 5), out=result) is not result
+        assert array1d_to_meshgrid(arr.astype(int), (4, 4), out=result) \
+            is not result
+
 
 # ===========================================================================
 # guess_shape_from_datadict
@@ -231,6 +246,21 @@ class TestGuessShapeFromDatadict:
         for dep in dd.dependents():
             assert shapes[dep] is not None
 
+    def test_shared_axes_guessed_once(self, monkeypatch):
+        dd = make_griddable((10, 8), ndeps=3)
+        calls = []
+        guess = num.guess_grid_from_sweep_direction
+        monkeypatch.setattr(num, 'guess_grid_from_sweep_direction',
+                            lambda **axes: calls.append(axes) or guess(**axes))
+        shapes = guess_shape_from_datadict(dd)
+        assert len(calls) == 1
+        assert len(set(s[1] for s in shapes.values())) == 1
+
+        # results must not be shared between dependents
+        deps = dd.dependents()
+        shapes[deps[0]][0].reverse()
+        assert shapes[deps[1]][0] == list(dd.axes(deps[1]))
+
 
 # ===========================================================================
 # datadict_to_meshgrid
@@ -453,6 +483,53 @@ class TestDataGridderNode:
         for k, orig in ref_vals.items():
             assert np.array_equal(dd.data_vals(k), orig), f"{k} was mutated"
 
+    def test_reuse_buffers(self, qtbot):
+        full = make_griddable((10, 8))
+        fc = linearFlowchart(('g', DataGridder))
+        node = fc.nodes()['g']
+        node.reuseBuffers = True
+        node.grid = GridOption.guessShape, {}
+
+        results = []
+        for n in (66, 70):
+            dd = full.copy()
+            for k, _ in dd.data_items():
+                dd[k]['values'] = dd[k]['values'][:n]
+            fc.setInput(dataIn=dd)
+            out = fc.outputValues()['dataOut']
+            assert out.shape() == (9, 8)
+            assert np.array_equal(out.data_vals('dep0').ravel()[:n],
+                                  full.data_vals('dep0')[:n])
+            assert np.all(np.isnan(out.data_vals('dep0').ravel()[n:]))
+            results.append(out.data_vals('dep0'))
+        assert np.shares_memory(results[0], results[1])
+
+    def test_reuse_buffers_complete_grid(self, qtbot):
+        fc = linearFlowchart(('g', DataGridder))
+        node = fc.nodes()['g']
+        node.reuseBuffers = True
+        node.grid = GridOption.guessShape, {}
+
+        results = []
+        for _ in range(2):
+            dd = make_griddable((10, 8))
+            ref = dd.data_vals('dep0').copy()
+            fc.setInput(dataIn=dd)
+            out = fc.outputValues()['dataOut']
+            assert out.shape() == (10, 8)
+            assert np.array_equal(out.data_vals('dep0').ravel(), ref)
+            assert not np.may_share_memory(out.data_vals('dep0'),
+                                           dd.data_vals('dep0'))
+            assert np.array_equal(dd.data_vals('dep0'), ref)
+            results.append(out.data_vals('dep0'))
+        assert np.shares_memory(results[0], results[1])
+
+        # other shapes need new buffers
+        fc.setInput(dataIn=make_griddable((5, 8)))
+        out = fc.outputValues()['dataOut']
+        assert out.shape() == (5, 8)
+        assert not np.shares_memory(out.data_vals('dep0'), results[0])
+
     def test_multiple_deps(self, qtbot):
         dd = make_griddable((5, 4), ndeps=3)
         fc = linearFlowchart(('g', DataGridder))
@@ -31,6 +31,54 @@ def test_basics():
         dd.validate()
 
 
+def test_cached_validation(monkeypatch):
+    """Validation of unchanged data is cached; changes are detected."""
+    x = np.arange(3)
+    y = np.arange(1, 4)
+    xx, yy = np.meshgrid(x, y, indexing='ij')
+    dd = MeshgridDataDict(
+        x=dict(values=xx),
+        y=dict(values=yy),
+        z=dict(values=xx * yy, axes=['x', 'y'])
+    )
+    assert dd.validate()
+
+    diff_calls = []
+    diff = np.diff
+    monkeypatch.setattr(np, 'diff', lambda *a, **k: diff_calls.append(a) or diff(*a, **k))
+    assert dd.validate()
+    assert len(diff_calls) == 0
+
+    # replacing values
+    dd['x']['values'] = xx[::-1, :].copy()
+    assert dd.validate()
+    assert len(diff_calls) > 0
+    dd['x']['values'] = np.zeros_like(xx)
+    with pytest.raises(ValueError):
+        dd.validate()
+    dd['x']['values'] = xx.copy()
+    assert dd.validate()
+
+    # changing axes and adding fields
+    dd['z']['axes'].reverse()
+    with pytest.raises(ValueError):
+        dd.validate()
+    dd['z']['axes'].reverse()
+    assert dd.validate()
+    dd['w'] = dict(values=np.arange(4), axes=['x', 'y'])
+    with pytest.raises(ValueError):
+        dd.validate()
+    del dd['w']
+    assert dd.validate()
+
+    # in-place changes need explicit invalidation
+    dd['x']['values'][:] = 0
+    assert dd.validate()
+    dd.invalidate()
+    with pytest.raises(ValueError):
+        dd.validate()
+
+
 def test_reorder():
     """Test reordering of axes."""
 
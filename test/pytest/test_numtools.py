@@ -223,3 +223,27 @@ def test_crop_less_than_one_row():
 
     assert zzz.shape == (1, 5)
     assert_array_equal(zzz, zz[0:1, 0:5])
+
+
+def test_sweep_grid_guesser():
+    """Test that the stateful grid guesser gives the same results as the
+    full analysis for growing data, while analyzing all data rarely."""
+    x = np.linspace(0, 1, 6)
+    y = np.arange(8, 0, -1)
+    z = np.arange(5)
+    xx, yy, zz = [a.reshape(-1) for a in np.meshgrid(x, y, z, indexing='ij')]
+    cc = np.ones(xx.size)
+
+    guesser = num.SweepGridGuesser()
+    for n in range(1, xx.size + 1, 7):
+        axes = dict(x=xx[:n], y=yy[:n], z=zz[:n], c=cc[:n])
+        assert guesser.guess(**axes) == \
+            num.guess_grid_from_sweep_direction(**axes)
+    assert guesser.nscans < xx.size // 7 // 2
+
+    # data that does not continue the pattern requires a new analysis
+    nscans = guesser.nscans
+    axes = dict(x=xx[::-1], y=yy[::-1], z=zz[::-1], c=cc)
+    assert guesser.guess(**axes) == \
+        num.guess_grid_from_sweep_direction(**axes)
+    assert guesser.nscans == nscans + 1
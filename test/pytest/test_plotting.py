@@ -175,6 +175,83 @@ class TestAxisOrientation:
         assert plot.img is not None and plot.img.image is not None
 
 
+# -- pyqtgraph in-place update tests --
+
+class TestPyqtgraphInPlaceUpdate:
+    """Verify that pyqtgraph plots re-use their items for new data."""
+
+    def test_image_update(self, qtbot):
+        from plottr.plot.pyqtgraph.plots import PlotWithColorbar
+        _, xx, yy, zz = _make_asymmetric_meshgrid()
+        plot = PlotWithColorbar()
+        qtbot.addWidget(plot)
+        plot.setImage(xx, yy, zz)
+        img = plot.img
+
+        plot.setImage(xx, yy, 2 * zz)
+        assert plot.img is img
+        assert np.allclose(plot.img.image, 2 * zz)
+        assert np.allclose(plot.colorbar.levels(), (2 * zz.min(), 2 * zz.max()),
+                           atol=(zz.max() - zz.min()) * 2e-2)
+
+        # levels set by the user are kept.
+        plot.colorbar.setLevels((0, 1))
+        plot.setImage(xx, yy, 3 * zz)
+        assert plot.colorbar.levels() == (0, 1)
+
+    def test_scatter_update(self, qtbot):
+        from plottr.plot.pyqtgraph.plots import PlotWithColorbar
+        _, xx, yy, zz = _make_asymmetric_meshgrid()
+        plot = PlotWithColorbar()
+        qtbot.addWidget(plot)
+        plot.setScatter2d(xx, yy, zz)
+        scatter = plot.scatter
+
+        plot.setScatter2d(xx, yy, -zz)
+        assert plot.scatter is scatter
+        assert np.allclose(plot.scatterZVals, -zz.flatten())
+
+        # switching to an image replaces the scatter item.
+        plot.setImage(xx, yy, zz)
+        assert plot.scatter is None and plot.img is not None
+
+    def test_autoplot_reuses_curves(self, qtbot):
+        from plottr.plot.pyqtgraph.autoplot import AutoPlot
+        w = AutoPlot(None)
+        qtbot.addWidget(w)
+        x = np.linspace(0, 10, 50)
+        data = MeshgridDataDict(
+            y=dict(values=np.sin(x), axes=['x']), x=dict(values=x),
+        )
+        w.setData(data)
+        curve = w.fmWidget.subPlots[0].plot.listDataItems()[0]
+
+        data2 = data.copy()
+        data2['y']['values'] = np.cos(x)
+        w.setData(data2)
+        curves = w.fmWidget.subPlots[0].plot.listDataItems()
+        assert curves == [curve]
+        assert np.allclose(curve.yData, np.cos(x))
+
+
+def test_pyqtgraph_scatter_colors(qtbot):
+    from plottr.plot.pyqtgraph.plots import PlotWithColorbar
+    plot = PlotWithColorbar()
+    qtbot.addWidget(plot)
+    x = np.arange(5.)
+    z = np.array([0., 0.5, np.nan, 1., 0.25])
+    plot.setScatter2d(x, x, z)
+
+    brushes = plot.scatter.data['brush']
+    assert len(brushes) == 5
+    cmap = plot.colorbar.colorMap()
+    lo, hi = plot.colorbar.levels()
+    expected = cmap.mapToQColor((np.array([0., 1.]) - lo) / (hi - lo))
+    assert brushes[0].color().name() == expected[0].name()
+    assert brushes[3].color().name() == expected[1].name()
+    assert brushes[2].color().alpha() == 0
+
+
 # -- Complex splitting tests --
 
 class TestComplexSplitting:
@@ -275,6 +352,57 @@ class TestMplFirstPlot:
         w.setData(data)
         assert w.plotType == t1
 
+    def test_setData_updates_artists(self, qtbot):
+        from plottr.plot.mpl.autoplot import AutoPlot
+        w = AutoPlot()
+        qtbot.addWidget(w)
+        x = np.linspace(0, 10, 50)
+        data = MeshgridDataDict(
+            y=dict(values=np.sin(x), axes=['x']), x=dict(values=x),
+        )
+        w.setData(data)
+        axes = w.plot.fig.axes
+        line = w._figureMaker.plotItems[0].plotReturn[0]
+
+        data2 = data.copy()
+        data2['y']['values'] = 2 * np.cos(x)
+        w.setData(data2)
+        assert w._figureMaker.updated
+        assert w.plot.fig.axes == axes
+        assert w._figureMaker.plotItems[0].plotReturn[0] is line
+        assert np.allclose(line.get_ydata(), 2 * np.cos(x))
+        assert w.plot.fig.axes[0].get_ylim()[1] >= 2
+
+    def test_setData_updates_image(self, qtbot):
+        from plottr.plot.mpl.autoplot import AutoPlot
+        w = AutoPlot()
+        qtbot.addWidget(w)
+        xx, yy = np.meshgrid(np.linspace(-1, 1, 10), np.linspace(0, 5, 8),
+                             indexing='ij')
+        data = MeshgridDataDict(
+            z=dict(values=xx**2 + yy, axes=['x', 'y']),
+            x=dict(values=xx), y=dict(values=yy),
+        )
+        w.setData(data)
+        im = w._figureMaker.plotItems[0].plotReturn
+
+        data2 = data.copy()
+        data2['z']['values'] = 10 * xx
+        w.setData(data2)
+        assert w._figureMaker.updated
+        assert w._figureMaker.plotItems[0].plotReturn is im
+        assert im.get_clim() == (-10, 10)
+
+        # a different structure needs a new figure.
+        data3 = MeshgridDataDict(
+            z=dict(values=xx**2 + yy, axes=['x', 'y']),
+            w=dict(values=xx - yy, axes=['x', 'y']),
+            x=dict(values=xx), y=dict(values=yy),
+        )
+        w.setData(data3)
+        assert not w._figureMaker.updated
+        assert len(w._figureMaker.plotItems) == 2
+
 
 # -- Pyqtgraph complex mode switching tests --
 
@@ -1,3 +1,7 @@
+import os
+import sqlite3
+from contextlib import closing
+
 import numpy as np
 import pytest
 from packaging import version
@@ -5,15 +9,21 @@ from packaging import version
 import qcodes as qc
 from qcodes import load_or_create_experiment, initialise_or_create_database_at
 
-from plottr.data.datadict import DataDict
+from plottr.data.datadict import DataDict, datasets_are_equal, combine_datadicts
 from plottr.utils import testdata
 from plottr.node.tools import linearFlowchart
 from plottr.data.qcodes_dataset import (
     QCodesDSLoader,
+    LoadedDataCache,
+    cache_dataset,
+    loaded_data_cache,
+    load_dataset_from,
     get_ds_structure,
     get_ds_info,
     get_runs_from_db,
-    ds_to_datadict)
+    ds_to_datadict,
+    parameter_data_to_datadicts,
+    read_parameter_data_from_db)
 
 
 @pytest.fixture(scope='function')
@@ -135,6 +145,137 @@ def test_load_2dsoftsweep_known_shape(experiment):
     assert ddict == dd_expected
 
 
+def test_read_parameter_data_from_db(experiment):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('z', setpoints=['x'], paramtype='complex')
+    m.register_custom_parameter('t', paramtype='array')
+    m.register_custom_parameter('s', setpoints=['t'], paramtype='array')
+
+    with m.run() as datasaver:
+        for i in range(5):
+            datasaver.add_result(('x', float(i)), ('z', i * (1 + 1j)))
+            datasaver.add_result(('t', np.arange(4.)), ('s', i * np.arange(4.)))
+    ds = datasaver.dataset
+
+    from_db = read_parameter_data_from_db(ds)
+    assert from_db is not None
+    pdata, rowid = from_db
+    cached = ds.cache.data()
+    assert set(pdata.keys()) == set(cached.keys())
+    for p, vals in cached.items():
+        for name, v in vals.items():
+            assert pdata[p][name].shape == v.shape
+            assert np.allclose(pdata[p][name], v)
+
+    # reading after the last row gives empty data
+    pdata, rowid2 = read_parameter_data_from_db(ds, after_rowid=rowid)
+    assert rowid2 == rowid
+    assert all(v[p].size == 0 for p, v in pdata.items())
+
+    assert ds_to_datadict(ds) == combine_datadicts(
+        *parameter_data_to_datadicts(ds, cached).values())
+
+
+def test_read_parameter_data_from_db_dtypes(tmp_path, monkeypatch):
+    initialise_or_create_database_at(str(tmp_path / 'data.db'))
+    exp = load_or_create_experiment('dtypes', sample_name='no sample')
+    m = qc.Measurement(exp=exp)
+    m.register_custom_parameter('n')
+    m.register_custom_parameter('k', setpoints=['n'])
+    m.register_custom_parameter('t', paramtype='array')
+    m.register_custom_parameter('c', setpoints=['t'], paramtype='array')
+
+    with m.run() as datasaver:
+        for i in range(5):
+            datasaver.add_result(('n', i), ('k', 3 * i))
+            datasaver.add_result(('t', np.arange(4)), ('c', i * np.arange(4)))
+    ds = datasaver.dataset
+    expected = ds.get_parameter_data()
+
+    # characters that have a meaning in URIs must not break reading.
+    db_path = tmp_path / 'runs #1?%.db'
+    with closing(sqlite3.connect(tmp_path / 'data.db')) as src, \
+            closing(sqlite3.connect(db_path)) as dst:
+        src.backup(dst)
+    monkeypatch.setattr(type(ds), 'path_to_db', property(lambda _: str(db_path)))
+
+    from_db = read_parameter_data_from_db(ds)
+    assert from_db is not None
+    pdata, _ = from_db
+    assert all(n.startswith(('data.db', db_path.name))
+               for n in os.listdir(tmp_path))
+    assert set(pdata.keys()) == set(expected.keys())
+    for p, vals in expected.items():
+        for name, v in vals.items():
+            assert pdata[p][name].dtype == v.dtype
+            assert np.array_equal(pdata[p][name], v)
+    exp.conn.close()
+
+
+def test_loaded_data_cache():
+    cache = LoadedDataCache(max_bytes=2 * 10 * 8 * 2)
+    data = [DataDict(x=dict(values=np.arange(10.) + i),
+                     y=dict(values=np.arange(10.), axes=['x']))
+            for i in range(3)]
+
+    cache.put('a.db', 1, data[0], nresults=10, lastRowId=10)
+    cache.put('a.db', 2, data[1], nresults=10)
+    ret = cache.get('a.db', 1, nresults=10)
+    assert ret is not None
+    assert ret[0] == data[0] and ret[0] is not data[0]
+    assert ret[1] == 10
+    assert cache.get('a.db', 1, nresults=11) is None
+
+    # run 2 is least recently used.
+    cache.put('a.db', 3, data[2], nresults=10)
+    assert len(cache) == 2 and cache.nbytes == 2 * 10 * 8 * 2
+    assert ('a.db', 2) not in cache
+    assert ('a.db', 1) in cache and ('a.db', 3) in cache
+
+
+def test_loader_uses_cached_data(qtbot, experiment, empty_db_path):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('z', setpoints=['x'])
+    with m.run() as datasaver:
+        for i in range(5):
+            datasaver.add_result(('x', float(i)), ('z', i ** 2))
+    run_id = datasaver.dataset.captured_run_id
+
+    cache_dataset(empty_db_path, run_id)
+    cached = loaded_data_cache.get(empty_db_path, run_id)
+    assert cached is not None
+    assert cached[0] == ds_to_datadict(datasaver.dataset)
+
+    fc = linearFlowchart(('loader', QCodesDSLoader))
+    loader = fc.nodes()['loader']
+    loader.pathAndId = empty_db_path, run_id
+    assert datasets_are_equal(fc.output()['dataOut'], cached[0],
+                              ignore_meta=True)
+    assert np.shares_memory(fc.output()['dataOut'].data_vals('z'),
+                            cached[0].data_vals('z'))
+
+
+def test_cache_dataset_skips_large_runs(experiment, empty_db_path, monkeypatch):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('z', setpoints=['x'])
+    with m.run() as datasaver:
+        for i in range(5):
+            datasaver.add_result(('x', float(i)), ('z', i ** 2))
+    run_id = datasaver.dataset.captured_run_id
+
+    # 5 results of 2 parameters, 8 bytes each, don't fit.
+    monkeypatch.setattr(loaded_data_cache, 'max_bytes', 5 * 2 * 8 - 1)
+    cache_dataset(empty_db_path, run_id)
+    assert (empty_db_path, run_id) not in loaded_data_cache
+
+    monkeypatch.setattr(loaded_data_cache, 'max_bytes', 5 * 2 * 8)
+    cache_dataset(empty_db_path, run_id)
+    assert (empty_db_path, run_id) in loaded_data_cache
+
+
 def test_get_ds_structure(experiment):
     N = 5
 
@@ -289,6 +430,9 @@ def test_update_qcloader(qtbot, empty_db_path):
                 assert z_in.size == z_out.size
                 assert np.allclose(z_in, z_out, atol=1e-15)
 
+            # incrementally loaded data is the same as the fully loaded
+            assert datasets_are_equal(ddict, ds_to_datadict(ds), ignore_meta=True)
+
     with m.run() as datasaver:
         ds = datasaver.dataset
         run_id = datasaver.dataset.captured_run_id
@@ -314,6 +458,39 @@ def test_update_qcloader(qtbot, empty_db_path):
     # check()
 
 
+def test_update_qcloader_known_shape(qtbot, empty_db_path):
+    db_path = empty_db_path
+    exp = load_or_create_experiment('2d_softsweep', sample_name='no sample')
+
+    shape = (3, 3)
+    m = qc.Measurement(exp=exp)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('y')
+    m.register_custom_parameter('z_0', setpoints=['x', 'y'])
+    m.set_shapes({'z_0': shape})
+
+    fc = linearFlowchart(('loader', QCodesDSLoader))
+    loader = fc.nodes()['loader']
+
+    with m.run() as datasaver:
+        ds = datasaver.dataset
+        loader.pathAndId = db_path, datasaver.dataset.captured_run_id
+
+        for i, result in enumerate(testdata.generate_2d_scalar_simple(*shape, 1)):
+            datasaver.add_result(*[(k, v) for k, v in result.items()])
+            datasaver.flush_data_to_database()
+            loader.update()
+            ddict = fc.output()['dataOut']
+
+            # new records are appended to the rows read before, and the
+            # output is padded to the shape.
+            assert loader._data is not None
+            assert loader._data.nrecords() == i + 1
+            assert ddict.data_vals('z_0').shape == shape
+            assert np.count_nonzero(~np.isnan(ddict.data_vals('z_0'))) == i + 1
+            assert datasets_are_equal(ddict, ds_to_datadict(ds), ignore_meta=True)
+
+
 # -- Records counter tests (qcodes_db_overview) --
 
 def _make_qcodes_db_with_runs(db_path: str, n_runs: int = 1) -> str:
@@ -381,6 +558,66 @@ class TestRecordsCounter:
         assert _records_from_run_description("") == 0
 
 
+# -- Run catalogue tests (qcodes_run_catalogue) --
+
+class TestRunCatalogue:
+    """The run catalogue mirrors the database overview."""
+
+    def test_catalogue_matches_overview(self, tmp_path):
+        from plottr.data.qcodes_db_overview import get_db_overview
+        from plottr.data.qcodes_run_catalogue import RunCatalogue
+
+        db_path = str(tmp_path / "test.db")
+        _make_qcodes_db_with_runs(db_path, n_runs=3)
+        catalogue = RunCatalogue(str(tmp_path / "catalogue.sqlite"))
+
+        assert catalogue.update(db_path)
+        assert not catalogue.update(db_path)
+        overview = get_db_overview(db_path)
+        runs = catalogue.runs(db_path)
+        assert list(runs.keys()) == list(overview.keys())
+        for run_id, info in overview.items():
+            assert runs[run_id]['inspectr_tag'] == ''
+            assert all(runs[run_id][k] == v for k, v in info.items())
+
+        date = overview[1]['started_date']
+        assert catalogue.dates(db_path) == [date]
+        assert list(catalogue.runs(db_path, dates=[date]).keys()) == [1, 2, 3]
+        assert catalogue.runs(db_path, dates=['1999-01-01']) == {}
+
+        # new runs and tags are picked up after the database changed.
+        _make_qcodes_db_with_runs(db_path, n_runs=1)
+        load_dataset_from(db_path, 2, read_only=False).add_metadata(
+            'inspectr_tag', 'star')
+        assert catalogue.update(db_path)
+        assert list(catalogue.runs(db_path).keys()) == [1, 2, 3, 4]
+        assert list(catalogue.runs(db_path, tag='star').keys()) == [2]
+        assert list(catalogue.runs(
+            db_path, experiment='test_exp', sample='test_sample').keys()) \
+            == [1, 2, 3, 4]
+
+    def test_catalogue_is_opt_in(self, tmp_path, monkeypatch):
+        from plottr.apps.inspectr import LoadDBProcess
+
+        monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+        db_path = str(tmp_path / "test.db")
+        _make_qcodes_db_with_runs(db_path, n_runs=2)
+
+        overviews = []
+        process = LoadDBProcess()
+        process.dbdfLoaded.connect(overviews.append)
+        process.path = db_path
+        process.loadDB()
+        assert process.catalogue is None
+        assert not (tmp_path / 'home').exists()
+
+        process.use_catalogue = True
+        process.catalogue_path = str(tmp_path / "catalogue.sqlite")
+        process.loadDB()
+        assert process.catalogue is not None
+        assert list(overviews[1].index) == list(overviews[0].index) == [1, 2]
+
+
 # -- Dataset refresh tests (inspectr incremental load) --
 
 class TestDatasetRefresh:
@@ -550,6 +787,45 @@ class TestDatasetRefresh:
         assert int(inspector.dbdf.loc[1, 'records']) == 25
         ds.mark_completed()
 
+    def test_inspectr_run_info_thread(self, qtbot, tmp_path):
+        """Run info is loaded in a thread that only runs while loading, and
+        only the info of the most recently selected run is shown."""
+        from plottr.apps.inspectr import QCodesDBInspector
+
+        db_path = str(tmp_path / "test.db")
+        _make_qcodes_db_with_runs(db_path, n_runs=3)
+
+        inspector = QCodesDBInspector(dbPath=db_path)
+        qtbot.addWidget(inspector)
+        qtbot.waitUntil(lambda: inspector.dbdf is not None
+                        and inspector.dbdf.size > 0, timeout=5000)
+
+        for runId in (1, 2):
+            with qtbot.waitSignal(inspector.loadRunInfoProcess.infoLoaded,
+                                  timeout=5000) as blocker:
+                inspector.setRunSelection(runId)
+            assert blocker.args[0] == runId
+            assert 'Data structure' in blocker.args[1]
+            qtbot.waitUntil(lambda: not inspector.loadRunInfoThread.isRunning(),
+                            timeout=5000)
+
+        loaded = []
+        received = []
+        inspector.loadRunInfoProcess.infoLoaded.connect(
+            lambda runId, info: loaded.append((runId, info)))
+        inspector._sendInfo.connect(received.append)
+        for runId in (1, 2, 3):
+            inspector.setRunSelection(runId)
+        qtbot.waitUntil(lambda: len(received) > 0, timeout=5000)
+        qtbot.waitUntil(lambda: not inspector.loadRunInfoThread.isRunning(),
+                        timeout=5000)
+        assert len(received) == 1
+        assert loaded[-1][0] == 3
+        assert received[0] == loaded[-1][1]
+        assert set(received[0].keys()) == {'Data structure', 'Metadata',
+                                           'QCoDeS Snapshot'}
+        assert set(received[0]['Data structure'].keys()) == {'x', 'y'}
+
 
 class TestBackendPersistence:
     """Verify that the chosen plot backend is remembered across launches."""
@@ -731,5 +1007,3 @@ class TestNoDataAvailable:
         assert "No data available" in status
         assert str(run_id) in status
         win.close()
-
-